@@ -3,7 +3,6 @@ from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.utils import timezone
 from .models import CustomUser, FacebookAccount
-import os
 
 
 @admin.register(CustomUser)
@@ -86,26 +85,16 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(FacebookAccount)
 class FacebookAccountAdmin(admin.ModelAdmin):
     list_display = ('email', 'user', 'has_session', 'created_at')
-    list_filter = ('created_at',)
+    list_filter = ('has_session', 'created_at')
     search_fields = ('email', 'user__username', 'user__email')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('has_session', 'session_saved_at', 'created_at')
     actions = ['create_sessions']
 
-    def has_session(self, obj):
-        session_file = f"sessions/{obj.email.replace('@', '_').replace('.', '_')}.json"
-        return os.path.exists(session_file)
-
-    has_session.boolean = True
-    has_session.short_description = 'Session Exists'
-
     def save_model(self, request, obj, form, change):
         """Auto-create session when account is saved (new or edited without session)"""
         super().save_model(request, obj, form, change)
 
-        # Check if session exists
-        session_file = f"sessions/{obj.email.replace('@', '_').replace('.', '_')}.json"
-
-        if not os.path.exists(session_file):
+        if not obj.has_session:
             # Open browser for login
             from automation.post_to_facebook import save_session
             from threading import Thread
@@ -131,8 +120,7 @@ class FacebookAccountAdmin(admin.ModelAdmin):
 
         def process_accounts():
             for account in queryset:
-                session_file = f"sessions/{account.email.replace('@', '_').replace('.', '_')}.json"
-                if os.path.exists(session_file):
+                if account.has_session:
                     print(f"✅ Session exists for {account.email}, skipping...")
                     continue
 
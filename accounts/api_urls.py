@@ -20,6 +20,8 @@ urlpatterns = [
          name='add_account_with_login'),
     path('accounts/bulk-upload/', api_views.bulk_upload_accounts_with_login,
          name='bulk_upload_accounts'),
+    path('accounts/onboarding/<str:batch_id>/', api_views.onboarding_progress,
+         name='onboarding_progress'),
     path('accounts/<int:pk>/update-session/', api_views.update_account_session,
          name='update_account_session'),
     path('accounts/<int:pk>/',
@@ -6,12 +6,16 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from .serializers import UserSerializer, RegisterSerializer, FacebookAccountSerializer
-from .models import CustomUser, FacebookAccount
+from .encryption import PasswordEncryption
+from .models import AccountOnboarding, CustomUser, FacebookAccount
+from .sessions import delete_session
 from postings.models import MarketplacePost
+from automation.onboarding import run_onboarding
 from automation.post_to_facebook import save_session
 from threading import Thread
-import os
+import uuid
 
 
 @api_view(['POST'])
@@ -161,13 +165,11 @@ class FacebookAccountDetailView(generics.RetrieveUpdateDestroyAPIView):
         return FacebookAccount.objects.filter(user=self.request.user)
 
     def delete(self, request, *args, **kwargs):
-        """Override delete to also remove session file"""
+        """Override delete to also remove the saved session"""
         account = self.get_object()
 
-        # Delete session file if exists
-        session_file = f"sessions/{account.email.replace('@', '_').replace('.', '_')}.json"
-        if os.path.exists(session_file):
-            os.remove(session_file)
+        # Sessions are shared by email, so drop the others' copies too
+        delete_session(account.email)
 
         return super().delete(request, *args, **kwargs)
 
@@ -256,9 +258,9 @@ def bulk_upload_accounts_with_login(request):
         content = file.read().decode('utf-8')
         lines = content.strip().split('\n')
 
-        accounts_created = []
         accounts_skipped = []
         accounts_failed = []
+        credentials = {}  # email -> password, first occurrence wins
 
         for line in lines:
             line = line.strip()
@@ -267,69 +269,59 @@ def bulk_upload_accounts_with_login(request):
             if not line or line.startswith('#') or ':' not in line:
                 continue
 
-            try:
-                # Split email and password
-                parts = line.split(':', 1)
-                if len(parts) != 2:
-                    accounts_failed.append({
-                        'line': line,
-                        'error': 'Invalid format (use email:password)'
-                    })
-                    continue
-
-                email = parts[0].strip()
-                password = parts[1].strip()
-
-                # Validate email and password
-                if not email or not password:
-                    accounts_failed.append({
-                        'line': line,
-                        'error': 'Email or password is empty'
-                    })
-                    continue
-
-                # Check if account already exists for this user
-                if FacebookAccount.objects.filter(email=email, user=request.user).exists():
-                    accounts_skipped.append(email)
-                    continue
-
-                # Create account in database with user association
-                account = FacebookAccount(
-                    user=request.user,
-                    email=email
-                )
-                # Encrypt password before saving
-                account.set_password(password)
-                account.save()
-                accounts_created.append(email)
+            # Split email and password
+            email, password = (part.strip() for part in line.split(':', 1))
 
-            except Exception as e:
+            # Validate email and password
+            if not email or not password:
                 accounts_failed.append({
                     'line': line,
-                    'error': str(e)
+                    'error': 'Email or password is empty'
                 })
+                continue
 
-        # Start browser automation for all new accounts in background
-        if accounts_created:
-            def process_bulk_sessions():
-                for email in accounts_created:
-                    try:
-                        account = FacebookAccount.objects.get(email=email)
-                        print(f"\n🌐 Opening browser for {email}...")
-                        # Use decrypted password
-                        success = save_session(email, account.get_password())
-                        if success:
-                            print(f"✅ Session saved for {email}")
-                        else:
-                            print(f"❌ Login failed for {email}")
-                    except Exception as e:
-                        print(f"❌ Error processing {email}: {e}")
-
-            thread = Thread(target=process_bulk_sessions, daemon=True)
+            if email in credentials:
+                accounts_skipped.append(email)
+                continue
+            credentials[email] = password
+
+        # Skip accounts this user already has (one IN query)
+        existing = set(FacebookAccount.objects.filter(
+            user=request.user, email__in=list(credentials)
+        ).values_list('email', flat=True))
+        accounts_skipped.extend(email for email in credentials if email in existing)
+
+        # Create the rest with a single INSERT; the unique (user, email)
+        # constraint rejects the upload if another request added one meanwhile
+        new_credentials = [(email, password) for email, password in credentials.items()
+                           if email not in existing]
+        # Encrypt passwords before saving, all with one cipher
+        encrypted = PasswordEncryption.encrypt_many(
+            [password for _, password in new_credentials])
+        new_accounts = [
+            FacebookAccount(user=request.user, email=email, encrypted_password=token)
+            for (email, _), token in zip(new_credentials, encrypted)
+        ]
+
+        with transaction.atomic():
+            created_accounts = FacebookAccount.objects.bulk_create(new_accounts)
+        accounts_created = [account.email for account in created_accounts]
+
+        # Log the new accounts in concurrently in background; progress is
+        # reported by onboarding_progress
+        batch_id = None
+        if created_accounts:
+            batch_id = str(uuid.uuid4())
+            AccountOnboarding.objects.bulk_create([
+                AccountOnboarding(batch_id=batch_id, account=account)
+                for account in created_accounts
+            ])
+            thread = Thread(target=run_onboarding, args=(batch_id,), daemon=True)
             thread.start()
 
         return Response({
             'message': f'Bulk upload completed. Processing {len(accounts_created)} accounts...',
+            'batch_id': batch_id,
             'summary': {
                 'created': len(accounts_created),
                 'skipped': len(accounts_skipped),
@@ -349,6 +341,48 @@ def bulk_upload_accounts_with_login(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def onboarding_progress(request, batch_id):
+    """
+    Per-account login progress of a bulk upload
+    Usage: GET /api/accounts/onboarding/<batch_id>/
+    Accounts waiting for a checkpoint to be solved by hand are listed
+    under needs_attention.
+    """
+    tasks = AccountOnboarding.objects.filter(
+        batch_id=batch_id, account__user=request.user
+    ).values('account_id', 'account__email', 'status', 'error_message', 'updated_at')
+
+    if not tasks:
+        return Response(
+            {'error': 'Onboarding batch not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    accounts = [{
+        'account_id': task['account_id'],
+        'email': task['account__email'],
+        'status': task['status'],
+        'error_message': task['error_message'],
+        'updated_at': task['updated_at'],
+    } for task in tasks]
+
+    summary = {choice: 0 for choice, _ in AccountOnboarding.STATUS_CHOICES}
+    for account in accounts:
+        summary[account['status']] += 1
+    finished = summary['saved'] + summary['failed'] + summary['checkpoint']
+
+    return Response({
+        'batch_id': batch_id,
+        'total': len(accounts),
+        'progress_percentage': round(finished / len(accounts) * 100, 1),
+        'summary': summary,
+        'needs_attention': [a for a in accounts if a['status'] == 'checkpoint'],
+        'accounts': accounts
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_account_session(request, pk):
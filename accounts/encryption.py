@@ -1,10 +1,23 @@
 """
 Password encryption utilities for Facebook account passwords.
 Uses Fernet (symmetric encryption) to securely store passwords.
+
+The cipher is built once per set of keys and shared by the process. Old
+keys listed in FACEBOOK_PASSWORD_OLD_ENCRYPTION_KEYS still decrypt
+(MultiFernet), while new values are always encrypted with the current key.
 """
 
-from cryptography.fernet import Fernet
+from collections import OrderedDict
+from cryptography.fernet import Fernet, MultiFernet
 from django.conf import settings
+from functools import lru_cache
+import threading
+import time
+
+
+@lru_cache(maxsize=4)
+def _build_cipher(keys):
+    return MultiFernet([Fernet(key.encode()) for key in keys])
 
 
 class PasswordEncryption:
@@ -14,9 +27,10 @@ class PasswordEncryption:
 
     @staticmethod
     def get_cipher():
-        """Get encryption cipher from settings"""
-        key = settings.FACEBOOK_PASSWORD_ENCRYPTION_KEY.encode()
-        return Fernet(key)
+        """Get the cached encryption cipher for the configured keys"""
+        keys = (settings.FACEBOOK_PASSWORD_ENCRYPTION_KEY,) + tuple(
+            getattr(settings, 'FACEBOOK_PASSWORD_OLD_ENCRYPTION_KEYS', ()))
+        return _build_cipher(keys)
 
     @staticmethod
     def encrypt(password):
@@ -51,3 +65,70 @@ class PasswordEncryption:
         cipher = PasswordEncryption.get_cipher()
         decrypted = cipher.decrypt(encrypted_password.encode())
         return decrypted.decode()
+
+    @staticmethod
+    def encrypt_many(passwords):
+        """Encrypt a list of plain text passwords with one cipher lookup"""
+        cipher = PasswordEncryption.get_cipher()
+        return [cipher.encrypt(password.encode()).decode() if password else None
+                for password in passwords]
+
+    @staticmethod
+    def decrypt_many(encrypted_passwords):
+        """Decrypt a list of encrypted passwords with one cipher lookup"""
+        cipher = PasswordEncryption.get_cipher()
+        return [cipher.decrypt(token.encode()).decode() if token else None
+                for token in encrypted_passwords]
+
+    @staticmethod
+    def rotate(encrypted_password):
+        """Re-encrypt a value with the current key; it may use an old one"""
+        if not encrypted_password:
+            return encrypted_password
+        cipher = PasswordEncryption.get_cipher()
+        return cipher.rotate(encrypted_password.encode()).decode()
+
+
+class CredentialCache:
+    """
+    Decrypted passwords kept in memory for a while, so workers touching
+    account.password for every post don't decrypt it each time.
+
+    Entries are keyed by the encrypted value, so a changed password is
+    never served stale; they expire after CREDENTIAL_CACHE TTL_SECONDS and
+    the least recently used are dropped beyond MAX_ENTRIES.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, clock=time.monotonic):
+        config = getattr(settings, 'CREDENTIAL_CACHE', {})
+        self.max_entries = max_entries or config.get('MAX_ENTRIES', 500)
+        self.ttl = ttl if ttl is not None else config.get('TTL_SECONDS', 300)
+        self.clock = clock
+        self._entries = OrderedDict()  # encrypted -> (expires, password)
+        self._lock = threading.Lock()
+
+    def decrypt(self, encrypted_password):
+        """PasswordEncryption.decrypt, served from memory when possible"""
+        if not encrypted_password:
+            return None
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(encrypted_password)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(encrypted_password)
+                return entry[1]
+
+        password = PasswordEncryption.decrypt(encrypted_password)
+        with self._lock:
+            self._entries[encrypted_password] = (now + self.ttl, password)
+            self._entries.move_to_end(encrypted_password)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return password
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+credential_cache = CredentialCache()
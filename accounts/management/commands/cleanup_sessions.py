@@ -1,38 +1,44 @@
 from django.core.management.base import BaseCommand
-from accounts.models import FacebookAccount
+from accounts.sessions import LEGACY_SESSIONS_DIR, import_legacy_session_files, sync_session_flags
 import os
 
 
 class Command(BaseCommand):
-    help = 'Clean up orphaned session files that have no matching account in database'
+    help = 'Reconcile session flags with the saved sessions and move leftover session files into the database'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--import-legacy',
+            action='store_true',
+            help='Import sessions/*.json files of accounts without a saved session',
+            dest='import_legacy'
+        )
+        parser.add_argument(
+            '--delete-legacy-files',
+            action='store_true',
+            help='Import, then delete every file in the sessions directory',
+            dest='delete_legacy_files'
+        )
 
     def handle(self, *args, **options):
-        sessions_dir = "sessions"
-        
-        if not os.path.exists(sessions_dir):
-            self.stdout.write(self.style.WARNING('Sessions directory does not exist'))
-            return
-        
-        # Get all emails from database
-        db_emails = set(FacebookAccount.objects.values_list('email', flat=True))
-        
-        # Get all session files
-        session_files = [f for f in os.listdir(sessions_dir) if f.endswith('.json')]
-        
-        deleted_count = 0
-        
-        for session_file in session_files:
-            # Convert filename back to email
-            email = session_file.replace('.json', '').replace('_', '@', 1).replace('_', '.')
-            
-            # If email not in database, delete session
-            if email not in db_emails:
-                file_path = os.path.join(sessions_dir, session_file)
-                os.remove(file_path)
-                deleted_count += 1
-                self.stdout.write(self.style.SUCCESS(f'🗑️ Deleted orphaned session: {session_file}'))
-        
-        if deleted_count == 0:
-            self.stdout.write(self.style.SUCCESS('✅ No orphaned sessions found'))
+        if options.get('import_legacy') or options.get('delete_legacy_files'):
+            delete = options.get('delete_legacy_files')
+            imported, deleted = import_legacy_session_files(delete=delete)
+            self.stdout.write(self.style.SUCCESS(f'✅ Imported {imported} session file(s)'))
+
+            if delete and os.path.isdir(LEGACY_SESSIONS_DIR):
+                # Whatever is left belongs to no account
+                for session_file in os.listdir(LEGACY_SESSIONS_DIR):
+                    if session_file.endswith('.json'):
+                        os.remove(os.path.join(LEGACY_SESSIONS_DIR, session_file))
+                        deleted += 1
+                        self.stdout.write(self.style.SUCCESS(f'🗑️ Deleted orphaned session: {session_file}'))
+                self.stdout.write(self.style.SUCCESS(f'✅ Deleted {deleted} session file(s)'))
+
+        # Fix accounts whose has_session flag no longer matches their SessionState
+        updated_count = sync_session_flags()
+        if updated_count:
+            self.stdout.write(self.style.SUCCESS(f'✅ Updated session status for {updated_count} account(s)'))
         else:
-            self.stdout.write(self.style.SUCCESS(f'✅ Deleted {deleted_count} orphaned session(s)'))
+            self.stdout.write(self.style.SUCCESS('✅ Session status is up to date'))
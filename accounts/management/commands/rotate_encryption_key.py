@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.encryption import PasswordEncryption, credential_cache
+from accounts.models import FacebookAccount, SessionState
+
+
+class Command(BaseCommand):
+    help = ('Re-encrypt account passwords and saved sessions with FACEBOOK_PASSWORD_ENCRYPTION_KEY; '
+            'list the previous key in FACEBOOK_PASSWORD_OLD_ENCRYPTION_KEYS first')
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows updated per bulk_update (default: 500)',
+            dest='batch_size'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            accounts = list(FacebookAccount.objects.only('id', 'encrypted_password'))
+            for account in accounts:
+                account.encrypted_password = PasswordEncryption.rotate(account.encrypted_password)
+            FacebookAccount.objects.bulk_update(accounts, ['encrypted_password'], batch_size=batch_size)
+
+            sessions = list(SessionState.objects.only('account_id', 'encrypted_state'))
+            for session in sessions:
+                session.encrypted_state = PasswordEncryption.rotate(session.encrypted_state)
+            SessionState.objects.bulk_update(sessions, ['encrypted_state'], batch_size=batch_size)
+
+        credential_cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Re-encrypted {len(accounts)} passwords and {len(sessions)} sessions'))
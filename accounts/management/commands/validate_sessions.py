@@ -0,0 +1,71 @@
+from collections import Counter
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from automation.session_validator import get_validation_config, validate_sessions
+import time
+
+
+class Command(BaseCommand):
+    help = 'Probe saved Facebook sessions in a headless browser and record which are still logged in'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--account-id',
+            type=int,
+            action='append',
+            help='Only validate this account (can be repeated)',
+            dest='account_ids'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Sessions probed at once (default: SESSION_VALIDATION CONCURRENCY)',
+            dest='concurrency'
+        )
+        parser.add_argument(
+            '--probe-url',
+            help='Page that needs a login, e.g. a local stand-in server '
+                 '(default: SESSION_VALIDATION PROBE_URL)',
+            dest='probe_url'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Also probe sessions validated within REVALIDATE_AFTER_HOURS',
+            dest='all'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running and validate again every N minutes',
+            dest='interval'
+        )
+
+    def handle(self, *args, **options):
+        config = get_validation_config()
+        if options.get('concurrency'):
+            config['CONCURRENCY'] = options['concurrency']
+        if options.get('probe_url'):
+            config['PROBE_URL'] = options['probe_url']
+        stale_after = None if options.get('all') or options.get('account_ids') \
+            else timedelta(hours=config['REVALIDATE_AFTER_HOURS'])
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.monotonic()
+                results = validate_sessions(
+                    options.get('account_ids'), stale_after, config)
+
+                counts = Counter(results.values())
+                summary = ', '.join(f'{count} {status}' for status, count in counts.items())
+                print(f"🔍 Validated {len(results)} sessions in "
+                      f"{time.monotonic() - started:.1f}s" + (f" ({summary})" if summary else ""))
+
+                if not options.get('interval'):
+                    break
+                time.sleep(options['interval'] * 60)
+        except KeyboardInterrupt:
+            pass
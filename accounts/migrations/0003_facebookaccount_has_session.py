@@ -0,0 +1,45 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:19
+
+from django.db import migrations, models
+from django.utils import timezone
+import os
+
+
+def flag_existing_sessions(apps, schema_editor):
+    """Set has_session for accounts that already have a session file"""
+    FacebookAccount = apps.get_model('accounts', 'FacebookAccount')
+
+    try:
+        session_files = set(os.listdir('sessions'))
+    except FileNotFoundError:
+        return
+
+    saved = [
+        account.pk for account in FacebookAccount.objects.only('pk', 'email')
+        if f"{account.email.replace('@', '_').replace('.', '_')}.json" in session_files
+    ]
+    FacebookAccount.objects.filter(pk__in=saved).update(
+        has_session=True, session_saved_at=timezone.now())
+
+    print(f"✅ Flagged {len(saved)} accounts with saved sessions")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_encrypt_existing_passwords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookaccount',
+            name='has_session',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='facebookaccount',
+            name='session_saved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(flag_existing_sessions, migrations.RunPython.noop),
+    ]
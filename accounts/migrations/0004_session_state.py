@@ -0,0 +1,64 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:38
+
+import django.db.models.deletion
+from cryptography.fernet import Fernet
+from datetime import datetime, timezone
+from django.db import migrations, models
+import json
+import os
+
+
+def import_session_files(apps, schema_editor):
+    """
+    Copy existing sessions/*.json files into SessionState rows.
+    The files are left in place; cleanup_sessions --delete-legacy-files
+    removes them once the database copy is in use.
+    """
+    from django.conf import settings
+
+    FacebookAccount = apps.get_model('accounts', 'FacebookAccount')
+    SessionState = apps.get_model('accounts', 'SessionState')
+    cipher = Fernet(settings.FACEBOOK_PASSWORD_ENCRYPTION_KEY.encode())
+
+    count = 0
+    for account in FacebookAccount.objects.only('pk', 'email'):
+        session_file = f"sessions/{account.email.replace('@', '_').replace('.', '_')}.json"
+        try:
+            with open(session_file, encoding='utf-8') as f:
+                state = json.load(f)
+            saved_at = datetime.fromtimestamp(
+                os.path.getmtime(session_file), tz=timezone.utc)
+        except (OSError, ValueError):
+            continue
+
+        SessionState.objects.update_or_create(
+            account_id=account.pk,
+            defaults={
+                'encrypted_state': cipher.encrypt(json.dumps(state).encode()).decode(),
+                'saved_at': saved_at,
+            })
+        FacebookAccount.objects.filter(pk=account.pk).update(
+            has_session=True, session_saved_at=saved_at)
+        count += 1
+
+    print(f"✅ Imported {count} saved sessions")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_facebookaccount_has_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionState',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='session_state', serialize=False, to='accounts.facebookaccount')),
+                ('encrypted_state', models.TextField()),
+                ('saved_at', models.DateTimeField(db_index=True)),
+                ('last_validated_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(import_session_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_session_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionstate',
+            name='validation_status',
+            field=models.CharField(choices=[('unknown', 'Unknown'), ('valid', 'Valid'), ('expired', 'Expired'), ('checkpoint', 'Checkpoint'), ('error', 'Error')], default='unknown', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_session_validation_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountOnboarding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('logging_in', 'Logging in'), ('checkpoint', 'Needs manual checkpoint'), ('saved', 'Session saved'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='onboardings', to='accounts.facebookaccount')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
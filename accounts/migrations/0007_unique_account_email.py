@@ -0,0 +1,45 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:43
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_accounts(apps, schema_editor):
+    """
+    Merge accounts a user added more than once with the same email before
+    the unique constraint. The account with a saved session (else the
+    oldest) is kept; the posts of the others are moved to it.
+    """
+    FacebookAccount = apps.get_model('accounts', 'FacebookAccount')
+    MarketplacePost = apps.get_model('postings', 'MarketplacePost')
+
+    duplicates = FacebookAccount.objects.filter(user__isnull=False).values(
+        'user_id', 'email').annotate(count=Count('id')).filter(count__gt=1)
+
+    merged = 0
+    for duplicate in duplicates:
+        accounts = list(FacebookAccount.objects.filter(
+            user_id=duplicate['user_id'], email=duplicate['email']
+        ).order_by('-has_session', 'id').values_list('id', flat=True))
+        keep, extra = accounts[0], accounts[1:]
+        MarketplacePost.objects.filter(account_id__in=extra).update(account_id=keep)
+        FacebookAccount.objects.filter(id__in=extra).delete()
+        merged += len(extra)
+
+    print(f"✅ Merged {merged} duplicate accounts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_account_onboarding'),
+        ('postings', '0009_post_dispatched_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_accounts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='facebookaccount',
+            constraint=models.UniqueConstraint(fields=('user', 'email'), name='unique_account_email_per_user'),
+        ),
+    ]
@@ -1,8 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
-from .encryption import PasswordEncryption
-import os
+from .encryption import PasswordEncryption, credential_cache
+import json
 
 
 class CustomUser(AbstractUser):
@@ -64,8 +64,18 @@ class FacebookAccount(models.Model):
     email = models.EmailField()
     encrypted_password = models.TextField()  # Encrypted password storage
     session_cookie = models.TextField(blank=True, null=True)
+    # Whether a SessionState exists; kept in sync by accounts.sessions so
+    # listings don't have to join the sessions table for every row
+    has_session = models.BooleanField(default=False, db_index=True)
+    session_saved_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'email'],
+                                    name='unique_account_email_per_user'),
+        ]
+
     def __str__(self) -> str:
         return str(self.email)
 
@@ -80,12 +90,12 @@ class FacebookAccount(models.Model):
 
     def get_password(self):
         """
-        Decrypt and return password.
+        Decrypt and return password (cached for a few minutes).
 
         Returns:
             str: Decrypted plain text password
         """
-        return PasswordEncryption.decrypt(self.encrypted_password)
+        return credential_cache.decrypt(self.encrypted_password)
 
     @property
     def password(self):
@@ -98,10 +108,65 @@ class FacebookAccount(models.Model):
         """
         return self.get_password()
 
-    def delete(self, *args, **kwargs):
-        # Delete session file when account is deleted
-        session_file = f"sessions/{self.email.replace('@', '_').replace('.', '_')}.json"
-        if os.path.exists(session_file):
-            os.remove(session_file)
-            print(f"🗑️ Deleted session file: {session_file}")
-        super().delete(*args, **kwargs)
+
+class SessionState(models.Model):
+    """
+    A Facebook account's saved browser session (Playwright storage state),
+    encrypted with the account password key. Deleted with its account.
+    """
+    VALIDATION_CHOICES = [
+        ('unknown', 'Unknown'),
+        ('valid', 'Valid'),
+        ('expired', 'Expired'),
+        ('checkpoint', 'Checkpoint'),
+        ('error', 'Error'),
+    ]
+
+    account = models.OneToOneField(FacebookAccount, on_delete=models.CASCADE,
+                                   primary_key=True, related_name='session_state')
+    encrypted_state = models.TextField()
+    saved_at = models.DateTimeField(db_index=True)
+    # Outcome of the last probe by automation/session_validator.py
+    validation_status = models.CharField(
+        max_length=20, choices=VALIDATION_CHOICES, default='unknown')
+    last_validated_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"Session of {self.account_id}"
+
+    def set_state(self, state):
+        """Encrypt and store a storage state dict"""
+        self.encrypted_state = PasswordEncryption.encrypt(json.dumps(state))
+
+    def get_state(self):
+        """Decrypt and return the storage state dict"""
+        return json.loads(PasswordEncryption.decrypt(self.encrypted_state))
+
+
+class AccountOnboarding(models.Model):
+    """
+    Progress of logging in one account of a bulk upload, for the
+    onboarding runner (automation/onboarding.py) and the progress API.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('logging_in', 'Logging in'),
+        ('checkpoint', 'Needs manual checkpoint'),
+        ('saved', 'Session saved'),
+        ('failed', 'Failed'),
+    ]
+
+    batch_id = models.CharField(max_length=100, db_index=True)
+    account = models.ForeignKey(FacebookAccount, on_delete=models.CASCADE,
+                                related_name='onboardings')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Onboarding {self.account_id} - {self.status}"
@@ -39,7 +39,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class FacebookAccountSerializer(serializers.ModelSerializer):
-    session_exists = serializers.SerializerMethodField()
+    session_exists = serializers.BooleanField(source='has_session', read_only=True)
     # Accept plain password in API
     password = serializers.CharField(write_only=True)
 
@@ -50,10 +50,16 @@ class FacebookAccountSerializer(serializers.ModelSerializer):
             'password': {'write_only': True}
         }
 
-    def get_session_exists(self, obj):
-        import os
-        session_file = f"sessions/{obj.email.replace('@', '_').replace('.', '_')}.json"
-        return os.path.exists(session_file)
+    def validate_email(self, value):
+        """Each user can add an email only once (unique_account_email_per_user)"""
+        request = self.context.get('request')
+        if request is not None:
+            accounts = FacebookAccount.objects.filter(user=request.user, email=value)
+            if self.instance is not None:
+                accounts = accounts.exclude(pk=self.instance.pk)
+            if accounts.exists():
+                raise serializers.ValidationError('Account with this email already exists')
+        return value
 
     def create(self, validated_data):
         """Override create to encrypt password"""
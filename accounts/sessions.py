@@ -0,0 +1,199 @@
+"""
+Saved browser sessions of Facebook accounts.
+
+Each account's Playwright storage state is a SessionState row keyed by the
+account, encrypted with the same key as the account passwords. Whether an
+account has one is mirrored on FacebookAccount.has_session so listings
+don't need a join; session_store.save and delete_session keep both in
+step.
+
+The automation identifies accounts by email, so the store does too: a
+session saved for an email belongs to every account with that email.
+Parsed states are cached in memory and only decrypted again when the
+row's saved_at changes.
+"""
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from postings.cache_utils import invalidate_health_check_cache
+from .models import FacebookAccount, SessionState
+import json
+import os
+import threading
+
+# Where sessions were stored as JSON files before SessionState
+LEGACY_SESSIONS_DIR = "sessions"
+
+# Cookies Facebook rewrites on nearly every page load (chat presence,
+# window size, last activity); a change in these alone isn't worth saving
+VOLATILE_COOKIES = {'presence', 'wd', 'act', 'dpr'}
+
+
+def legacy_session_file(email):
+    """Return the pre-SessionState storage-state file of an account"""
+    return f"{LEGACY_SESSIONS_DIR}/{email.replace('@', '_').replace('.', '_')}.json"
+
+
+def delete_session(email):
+    """Delete the saved session of every account with this email"""
+    with transaction.atomic():
+        SessionState.objects.filter(account__email=email).delete()
+        FacebookAccount.objects.filter(email=email).update(
+            has_session=False, session_saved_at=None)
+        invalidate_health_check_cache()
+    session_store.invalidate(email)
+
+
+def session_fingerprint(state):
+    """The part of a storage state that matters for staying logged in"""
+    return {
+        (cookie['name'], cookie['domain'], cookie['path'], cookie['value'])
+        for cookie in state.get('cookies', ())
+        if cookie['name'] not in VOLATILE_COOKIES
+    }
+
+
+def sync_session_flags():
+    """
+    Reconcile has_session with the SessionState rows (two UPDATEs).
+
+    Returns the number of accounts whose flag changed.
+    """
+    found = FacebookAccount.objects.filter(
+        has_session=False, session_state__isnull=False
+    ).update(has_session=True)
+    missing = FacebookAccount.objects.filter(
+        has_session=True, session_state__isnull=True
+    ).update(has_session=False, session_saved_at=None)
+    if found or missing:
+        invalidate_health_check_cache()
+    return found + missing
+
+
+class SessionStore:
+    """
+    In-memory cache of decrypted storage states, keyed by email.
+
+    Every load costs one indexed query for the row's saved_at; the state is
+    only fetched and decrypted again when that changed (Update Session or
+    another worker process saved it). The least recently used entries are
+    dropped beyond SESSION_STORE_MAX_ENTRIES. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or getattr(
+            settings, 'SESSION_STORE_MAX_ENTRIES', 200)
+        self._entries = OrderedDict()  # email -> (saved_at, state)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0, 'writes': 0}
+
+    def _rows(self, email):
+        return SessionState.objects.filter(
+            account__email=email).order_by('-saved_at')
+
+    def load(self, email):
+        """
+        Return (storage_state, saved_at) for an account, or (None, None)
+        when it has no saved session. The state can be passed to
+        new_context as is.
+        """
+        saved_at = self._rows(email).values_list('saved_at', flat=True).first()
+        if saved_at is None:
+            self.invalidate(email)
+            return None, None
+
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[0] == saved_at:
+                self._entries.move_to_end(email)
+                self.stats['hits'] += 1
+                return entry[1], saved_at
+
+        session = self._rows(email).first()
+        if session is None:
+            return None, None
+        state = session.get_state()
+        with self._lock:
+            self._remember(email, session.saved_at, state)
+            self.stats['loads'] += 1
+        return state, session.saved_at
+
+    def save(self, email, state, validation_status='unknown'):
+        """
+        Store a storage state for the accounts with this email; returns
+        saved_at. A new login hasn't been probed yet, so its validation
+        status is 'unknown' unless the caller knows better.
+        """
+        saved_at = timezone.now()
+        session = SessionState(saved_at=saved_at)
+        session.set_state(state)  # Encrypted once for every account
+
+        with transaction.atomic():
+            account_ids = list(FacebookAccount.objects.filter(
+                email=email).values_list('id', flat=True))
+            for account_id in account_ids:
+                SessionState.objects.update_or_create(
+                    account_id=account_id,
+                    defaults={'encrypted_state': session.encrypted_state,
+                              'saved_at': saved_at,
+                              'validation_status': validation_status,
+                              'last_validated_at': (
+                                  None if validation_status == 'unknown' else saved_at)})
+            FacebookAccount.objects.filter(id__in=account_ids).update(
+                has_session=True, session_saved_at=saved_at)
+            invalidate_health_check_cache()
+
+        with self._lock:
+            self._remember(email, saved_at, state)
+            self.stats['writes'] += 1
+        return saved_at
+
+    def refresh(self, email, state):
+        """
+        Write back the storage state of a context after a successful post,
+        only if Facebook changed more than its volatile cookies. The post
+        proved the session works, so it is stored as 'valid'. Returns its
+        saved_at.
+        """
+        with self._lock:
+            entry = self._entries.get(email)
+        if entry is not None and \
+                session_fingerprint(entry[1]) == session_fingerprint(state):
+            return entry[0]
+        return self.save(email, state, validation_status='valid')
+
+    def invalidate(self, email):
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def _remember(self, email, saved_at, state):
+        self._entries[email] = (saved_at, state)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+session_store = SessionStore()
+
+
+def import_legacy_session_files(delete=False):
+    """
+    Move sessions/*.json files into SessionState rows.
+
+    Files are matched by computing each account's file name, never by
+    parsing file names back into emails. Returns (imported, deleted).
+    """
+    imported = deleted = 0
+    for email in FacebookAccount.objects.values_list('email', flat=True).distinct():
+        session_file = legacy_session_file(email)
+        if not os.path.exists(session_file):
+            continue
+        if not SessionState.objects.filter(account__email=email).exists():
+            with open(session_file, encoding='utf-8') as f:
+                session_store.save(email, json.load(f))
+            imported += 1
+        if delete:
+            os.remove(session_file)
+            deleted += 1
+    return imported, deleted
@@ -1,3 +1,37 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from .models import FacebookAccount, SessionState
+from .sessions import SessionStore
 
-# Create your tests here.
+
+def storage_state(**cookies):
+    return {'cookies': [
+        {'name': name, 'value': value, 'domain': '.facebook.com', 'path': '/'}
+        for name, value in cookies.items()], 'origins': []}
+
+
+class SessionStoreRefreshTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        FacebookAccount.objects.create(user=user, email='a@example.com')
+        self.store = SessionStore()
+        self.store.save('a@example.com', storage_state(c_user='1', xs='old', presence='p1'))
+        SessionState.objects.update(
+            validation_status='valid', last_validated_at=timezone.now())
+
+    def test_volatile_cookie_changes_are_not_written(self):
+        saved_at = SessionState.objects.get().saved_at
+        with self.assertNumQueries(0):
+            self.store.refresh('a@example.com',
+                               storage_state(c_user='1', xs='old', presence='p2'))
+        self.assertEqual(SessionState.objects.get().saved_at, saved_at)
+
+    def test_refreshed_session_is_stored_as_valid(self):
+        self.store.refresh('a@example.com', storage_state(c_user='1', xs='new'))
+
+        session = SessionState.objects.get()
+        self.assertEqual(session.get_state()['cookies'][1]['value'], 'new')
+        self.assertEqual(session.validation_status, 'valid')
+        self.assertIsNotNone(session.last_validated_at)
@@ -2,41 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .forms import BulkAccountUploadForm
 from .models import FacebookAccount
+from .sessions import sync_session_flags
 from automation.post_to_facebook import save_session
-import os
 from threading import Thread
 
 
 def cleanup_orphaned_sessions():
-    """Automatically clean up session files without matching database accounts"""
-    sessions_dir = "sessions"
-    
-    if not os.path.exists(sessions_dir):
-        return
-    
-    # Get all emails from database
-    db_emails = set(FacebookAccount.objects.values_list('email', flat=True))
-    
-    # Get all session files
-    session_files = [f for f in os.listdir(sessions_dir) if f.endswith('.json')]
-    
-    for session_file in session_files:
-        # Convert filename back to email (handle the conversion properly)
-        filename = session_file.replace('.json', '')
-        parts = filename.split('_')
-        
-        # Reconstruct email
-        if len(parts) >= 3:
-            email = f"{parts[0]}@{'_'.join(parts[1:-1])}.{parts[-1]}"
-            
-            # If email not in database, delete session
-            if email not in db_emails:
-                file_path = os.path.join(sessions_dir, session_file)
-                try:
-                    os.remove(file_path)
-                    print(f"🗑️ Auto-deleted orphaned session: {session_file}")
-                except Exception as e:
-                    print(f"Error deleting {session_file}: {e}")
+    """Keep each account's has_session flag in line with its SessionState"""
+    sync_session_flags()
 
 
 def bulk_upload_accounts(request):
@@ -89,19 +62,18 @@ def bulk_upload_accounts(request):
 def process_sessions(accounts_list):
     """Process sessions for accounts in background"""
     for email, is_new in accounts_list:
-        session_file = f"sessions/{email.replace('@', '_').replace('.', '_')}.json"
-        
-        # If session exists, skip
-        if os.path.exists(session_file):
-            print(f"✅ Session exists for {email}, skipping...")
-            continue
-        
         # Get password from database
         try:
             account = FacebookAccount.objects.get(email=email)
             password = account.password
         except FacebookAccount.DoesNotExist:
+            account = None
             password = None
+
+        # If session exists, skip
+        if account is not None and account.has_session:
+            print(f"✅ Session exists for {email}, skipping...")
+            continue
         
         # Open browser for login and save session with auto-login
         print(f"🌐 Opening browser for {email}...")
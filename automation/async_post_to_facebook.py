@@ -0,0 +1,377 @@
+"""
+Async Playwright implementation of the Facebook automation.
+
+Mirrors save_session and login_and_post from post_to_facebook.py on top of
+playwright.async_api, so a single event loop can drive pages for many
+accounts at once. The *_sync functions are thin adapters with the same
+signatures as the sync module for callers that are not async.
+"""
+from accounts.sessions import session_store
+from asgiref.sync import sync_to_async
+from playwright.async_api import async_playwright
+from .listing_form import (
+    CREATE_ITEM_URL, DESCRIPTION_FALLBACK_SELECTOR, DROPDOWNS, HEADER_HEIGHT,
+    IMAGE_INPUT_SELECTOR, NEXT_BUTTON, PUBLISH_BUTTON, SCROLL_TO_BOTTOM,
+    TEXT_INPUT_SELECTOR, VALIDATION_ERROR_SELECTOR, screenshot_path,
+)
+from .readiness import (
+    LOGIN_ERROR_SELECTOR, StepTimer, get_timeout, wait_for_dropdown_async,
+    wait_for_network_idle_async, wait_for_publish_button_async,
+    wait_for_publish_complete_async, wait_for_upload_complete_async,
+    wait_until_async,
+)
+import asyncio
+
+
+async def save_session(email, password=None):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+        try:
+            return await save_session_in_browser(browser, email, password)
+        finally:
+            await browser.close()
+
+
+async def save_session_in_browser(browser, email, password=None):
+    """Log an account in using a fresh context of an already running browser"""
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto("https://www.facebook.com/login",
+                        wait_until="domcontentloaded")
+
+        login_successful = False
+
+        if password:
+            print(f"🔐 Auto-logging in for: {email}")
+
+            try:
+                await page.fill('input[name="email"]', email)
+                await page.fill('input[name="pass"]', password)
+                await page.click('button[name="login"]')
+
+                print("⏳ Waiting for login response...")
+                await wait_until_async(lambda: _login_answered(page), 'LOGIN')
+
+                if await _is_checkpoint(page):
+                    print("🔒 Captcha/2FA/Checkpoint detected!")
+                    print("👉 Please solve it manually in the browser...")
+                    print(
+                        f"⏳ Waiting up to {get_timeout('CHECKPOINT') // 1000} seconds for you to complete...")
+                    await wait_until_async(lambda: _is_logged_in(page),
+                                           'CHECKPOINT')
+
+                    if await _is_logged_in(page):
+                        login_successful = True
+                        print("✅ Login successful after solving checkpoint!")
+                    else:
+                        print("❌ Login still not completed - checkpoint not solved")
+
+                elif await _is_still_login(page):
+                    print("❌ Login failed - wrong password or blocked")
+
+                else:
+                    login_successful = True
+                    print("✅ Auto-login successful!")
+
+            except Exception as e:
+                print(f"⚠️ Auto-login failed: {e}")
+                print("👉 Please log in manually")
+                await wait_until_async(lambda: _is_logged_in(page),
+                                       'MANUAL_LOGIN')
+                login_successful = await _is_logged_in(page)
+                if login_successful:
+                    print("✅ Manual login successful!")
+        else:
+            print(f"👉 Please log in manually for: {email}")
+            print(f"⏳ You have {get_timeout('MANUAL_LOGIN') // 1000} seconds...")
+            await wait_until_async(lambda: _is_logged_in(page), 'MANUAL_LOGIN')
+            login_successful = await _is_logged_in(page)
+            if login_successful:
+                print("✅ Manual login successful!")
+
+        if login_successful:
+            await sync_to_async(session_store.save)(
+                email, await context.storage_state())
+            print(f"✅ Session saved for {email}")
+        else:
+            print(f"❌ Session NOT saved - Login failed for {email}")
+
+        return login_successful
+    finally:
+        await context.close()
+
+
+async def _login_answered(page):
+    return (
+        "login" not in page.url or
+        "checkpoint" in page.url or
+        await page.locator(LOGIN_ERROR_SELECTOR).first.is_visible()
+    )
+
+
+async def _is_still_login(page):
+    return (
+        "login" in page.url or
+        await page.locator('input[name="email"]').is_visible() or
+        await page.locator('input[name="pass"]').is_visible()
+    )
+
+
+async def _is_checkpoint(page):
+    return (
+        "checkpoint" in page.url or
+        "captcha" in page.url or
+        await page.locator('text=Security Check').is_visible() or
+        await page.locator('text=Enter the code').is_visible()
+    )
+
+
+async def _is_logged_in(page):
+    try:
+        return (
+            "facebook.com" in page.url and
+            "login" not in page.url and
+            "checkpoint" not in page.url and
+            not await page.locator('input[name="email"]').is_visible()
+        )
+    except Exception:
+        return False
+
+
+async def login_and_post(email, title, description, price, image_path,
+                         browser=None):
+    """
+    Publish one Marketplace listing for an account.
+
+    Pass a running browser to share it between concurrent posts; each call
+    then only opens its own context. The context's refreshed cookies are
+    written back after a successful post.
+    """
+    storage_state, _ = await sync_to_async(session_store.load)(email)
+    if storage_state is None:
+        raise Exception(
+            f"❌ Session not found. Run save_session('{email}') first.")
+
+    if browser is not None:
+        context = await browser.new_context(storage_state=storage_state)
+        try:
+            page = await context.new_page()
+            timings = await publish_listing(
+                page, title, description, price, image_path, email=email)
+            try:
+                await sync_to_async(session_store.refresh)(
+                    email, await context.storage_state())
+            except Exception as e:
+                print(f"⚠️ Could not save refreshed session for {email}: {str(e)}")
+            return timings
+        finally:
+            await context.close()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+        try:
+            return await login_and_post(email, title, description, price,
+                                        image_path, browser=browser)
+        finally:
+            await browser.close()
+
+
+async def _click_first_visible(page, selector, force=True):
+    """Click the first visible element matching selector; return True if clicked"""
+    for el in await page.locator(selector).all():
+        if await el.is_visible():
+            await el.scroll_into_view_if_needed()
+            await el.click(force=force)
+            return True
+    return False
+
+
+async def _click_button(page, attempts):
+    """
+    Click a button found by the first of listing_form's attempts that
+    matches a visible element; return that (how, target) or None.
+    """
+    for how, target in attempts:
+        try:
+            if how == 'role':
+                button = page.get_by_role("button", name=target)
+                if await button.is_visible():
+                    await button.scroll_into_view_if_needed()
+                    await button.click()
+                    return how, target
+            elif await _click_first_visible(page, target, force=False):
+                return how, target
+        except Exception:
+            pass
+    return None
+
+
+async def _choose_option(page, name, use_keyboard=False):
+    """Pick an option from an open dropdown by role, then text, then keyboard"""
+    try:
+        option = page.get_by_role("option", name=name)
+        if await option.is_visible():
+            await option.click()
+            return "role"
+    except Exception:
+        pass
+
+    try:
+        if await _click_first_visible(page, f"text='{name}'"):
+            return "text"
+    except Exception:
+        pass
+
+    if use_keyboard:
+        try:
+            await page.keyboard.press("Home")
+            await page.keyboard.press("ArrowDown")
+            await page.keyboard.press("Enter")
+            return "keyboard"
+        except Exception:
+            pass
+    return None
+
+
+async def _report_validation_errors(page):
+    """Print the form's visible validation messages, if any"""
+    for i, indicator in enumerate(await page.locator(VALIDATION_ERROR_SELECTOR).all()):
+        try:
+            if await indicator.is_visible():
+                print(f"  ⚠️ Validation error {i+1}: {await indicator.inner_text()}")
+        except Exception:
+            pass
+
+
+async def publish_listing(page, title, description, price, image_path,
+                          email=None):
+    """
+    Fill and publish the Marketplace create-item form on an open page.
+
+    Same steps and selectors (listing_form) as the sync publish_listing.
+    Returns the per-step timings in seconds; on failure a screenshot named
+    after the account is saved under MEDIA_ROOT/error_screenshots.
+    """
+    timer = StepTimer()
+    print("🌐 Opening Marketplace listing page...")
+    await page.goto(CREATE_ITEM_URL, timeout=get_timeout('NAVIGATION'))
+    form_url = page.url
+    timer.lap('open_form')
+
+    try:
+        print("📸 Uploading image first...")
+        await page.locator(IMAGE_INPUT_SELECTOR).set_input_files(image_path)
+        await wait_for_upload_complete_async(page)
+        timer.lap('upload_image')
+
+        print("📝 Filling Title...")
+        title_input = None
+        for el in await page.locator(TEXT_INPUT_SELECTOR).all():
+            if await el.is_visible() and await el.input_value() == "":
+                box = await el.bounding_box()
+                if box and box['y'] > HEADER_HEIGHT:
+                    title_input = el
+                    break
+        if not title_input:
+            raise Exception("Could not find title input field")
+        await title_input.fill(title)
+
+        print("💰 Filling Price...")
+        # The next visible, empty input after the title is the price
+        price_input = None
+        title_filled = False
+        for el in await page.locator(TEXT_INPUT_SELECTOR).all():
+            if not await el.is_visible():
+                continue
+            value = await el.input_value()
+            if not title_filled and value == title:
+                title_filled = True
+                continue
+            if title_filled and value == "":
+                price_input = el
+                break
+        if not price_input:
+            raise Exception("Could not find price input field")
+        await price_input.fill(str(price))
+        timer.lap('fill_title_price')
+
+        for field, trigger, option, use_keyboard in DROPDOWNS:
+            print(f"📂 Selecting {field}: {option}...")
+            if not await _click_first_visible(page, trigger):
+                print(f"❌ Could not find {field} dropdown")
+                continue
+            print(f"✅ Clicked on {field} dropdown")
+            await wait_for_dropdown_async(page)
+            selected_via = await _choose_option(page, option, use_keyboard)
+            if selected_via:
+                print(f"✅ Selected {field}: {option} (via {selected_via})")
+            else:
+                print(f"❌ Could not select {field} {option} - trying to continue anyway")
+
+        print("🧾 Filling Description...")
+        try:
+            await page.get_by_role("textbox", name="Description").fill(description)
+        except Exception:
+            for el in await page.locator(DESCRIPTION_FALLBACK_SELECTOR).all():
+                if await el.is_visible():
+                    await el.fill(description)
+                    break
+
+        timer.lap('fill_details')
+
+        print("📍 Skipping location (using proxy/VPN for region)...")
+
+        print("🔍 Checking for validation errors...")
+        await wait_for_network_idle_async(page)
+        await _report_validation_errors(page)
+
+        print("📜 Scrolling to bottom of form...")
+        await page.evaluate(SCROLL_TO_BOTTOM)
+        await wait_for_network_idle_async(page)
+        timer.lap('validate_form')
+
+        print("📤 Looking for Next button...")
+        found = await _click_button(page, NEXT_BUTTON)
+        if found:
+            print(f"✅ Clicked Next button (via {found[0]})")
+            await wait_for_publish_button_async(page)
+        else:
+            print("⚠️ Could not find Next button - form might be single page, looking for Publish directly")
+
+        await page.evaluate(SCROLL_TO_BOTTOM)
+        await wait_for_network_idle_async(page)
+        timer.lap('next_step')
+
+        print("🔍 Looking for Publish button...")
+        found = await _click_button(page, PUBLISH_BUTTON)
+        if not found:
+            raise Exception("Publish button not found after multiple attempts")
+        print(f"✅ Clicked Publish button (via {found[0]}, {found[1]})")
+
+        # Wait for posting to complete
+        await wait_for_publish_complete_async(page, form_url)
+        timer.lap('publish')
+        print("✅ Posted successfully!")
+        return timer.report()
+
+    except Exception as e:
+        print("❌ Something went wrong while trying to fill the form.")
+        try:
+            path = screenshot_path(email, 'error')
+            await page.screenshot(path=path)
+            print(f"📷 Screenshot saved as {path}")
+        except Exception as screenshot_error:
+            print(f"⚠️ Could not save a screenshot: {str(screenshot_error)}")
+        raise e
+
+
+def save_session_sync(email, password=None):
+    """Blocking adapter for save_session"""
+    return asyncio.run(save_session(email, password))
+
+
+def login_and_post_sync(email, title, description, price, image_path):
+    """Blocking adapter for login_and_post"""
+    return asyncio.run(
+        login_and_post(email, title, description, price, image_path))
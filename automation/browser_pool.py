@@ -0,0 +1,234 @@
+"""
+Long-lived browser pool for Marketplace posting.
+
+One Chromium process is kept per worker and one browser context per
+Facebook account, so consecutive posts for the same account reuse an
+already-loaded session instead of paying a full browser cold start.
+
+Playwright's sync API is bound to the thread that started it, and while
+its driver runs Django refuses ORM queries in that thread
+(SynchronousOnlyOperation). Each pool therefore drives its browser from a
+private thread of its own; callers hand it the page work through run() and
+keep their own thread free for the database. Each worker thread still owns
+its own pool.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from django.conf import settings
+from playwright.sync_api import sync_playwright
+
+from accounts.sessions import session_store
+
+
+class PooledContext:
+    """A browser context kept open for one account"""
+
+    def __init__(self, context, session_saved_at):
+        self.context = context
+        self.session_saved_at = session_saved_at
+        self.uses = 0
+        self.healthy = True
+
+
+class BrowserPool:
+    """
+    Lease pages from per-account browser contexts.
+
+    Usage:
+        with BrowserPool() as pool:
+            result = pool.run(email, lambda page: ...)
+    """
+
+    def __init__(self, headless=None, recycle_after=None,
+                 browser_recycle_after=None, max_contexts=None):
+        config = getattr(settings, 'BROWSER_POOL', {})
+        if headless is None:
+            headless = os.getenv('PLAYWRIGHT_HEADLESS',
+                                 'true').lower() == 'true'
+        self.headless = headless
+        self.recycle_after = recycle_after or config.get(
+            'RECYCLE_AFTER_POSTS', 25)
+        self.browser_recycle_after = browser_recycle_after or config.get(
+            'BROWSER_RECYCLE_AFTER_POSTS', 200)
+        self.max_contexts = max_contexts or config.get('MAX_CONTEXTS', 10)
+
+        self._executor = None
+        self._playwright_manager = None
+        self._playwright = None
+        self._browser = None
+        self._browser_uses = 0
+        self._contexts = OrderedDict()
+        self.stats = {
+            'browser_launches': 0,
+            'contexts_created': 0,
+            'contexts_recycled': 0,
+            'leases': 0,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _call(self, fn, *args):
+        """Run fn in the pool's browser thread and return its result"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='browser-pool')
+        return self._executor.submit(fn, *args).result()
+
+    def start(self):
+        """Start the Playwright driver (the browser itself launches lazily)"""
+        self._call(self._start)
+
+    def close(self):
+        """Close every context, the browser and the Playwright driver"""
+        if self._executor is None:
+            return
+        try:
+            self._call(self._close)
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self, email, action):
+        """
+        Call action(page) with a fresh page in the account's pooled context
+        and return its result. The action runs in the browser thread, so it
+        must only drive the page, never touch the database.
+
+        The session is loaded before and its refreshed cookies are saved
+        after, both from the calling thread.
+        """
+        storage_state, session_saved_at = session_store.load(email)
+        if storage_state is None:
+            raise Exception(
+                f"❌ Session not found. Run save_session('{email}') first.")
+
+        result, pooled, refreshed_state = self._call(
+            self._run_leased, email, storage_state, session_saved_at, action)
+        self._save_cookies(email, pooled, refreshed_state)
+        return result
+
+    def _start(self):
+        if self._playwright is None:
+            self._playwright_manager = sync_playwright()
+            self._playwright = self._playwright_manager.start()
+
+    def _close(self):
+        self._close_browser()
+        if self._playwright_manager is not None:
+            self._playwright_manager.__exit__(None, None, None)
+        self._playwright_manager = None
+        self._playwright = None
+
+    def _run_leased(self, email, storage_state, session_saved_at, action):
+        self._start()
+        self._ensure_browser()
+        pooled = self._get_context(email, storage_state, session_saved_at)
+        page = pooled.context.new_page()
+        self.stats['leases'] += 1
+        try:
+            result = action(page)
+            return result, pooled, self._storage_state(email, pooled)
+        except Exception:
+            # A failed post may leave the context on a checkpoint or a
+            # half-filled dialog, so never hand it to the next post.
+            pooled.healthy = False
+            raise
+        finally:
+            pooled.uses += 1
+            self._browser_uses += 1
+            try:
+                page.close()
+            except Exception:
+                pooled.healthy = False
+
+    def _ensure_browser(self):
+        """Launch the browser, replacing it if it died or hit its post limit"""
+        if self._browser is not None:
+            if (not self._browser.is_connected()
+                    or self._browser_uses >= self.browser_recycle_after):
+                print("♻️ Recycling browser process...")
+                self._close_browser()
+
+        if self._browser is None:
+            print("🚀 Launching pooled browser...")
+            self._browser = self._playwright.chromium.launch(
+                headless=self.headless)
+            self._browser_uses = 0
+            self.stats['browser_launches'] += 1
+
+    def _get_context(self, email, storage_state, session_saved_at):
+        pooled = self._contexts.get(email)
+        if pooled is not None and not self._is_healthy(pooled, session_saved_at):
+            self._discard_context(email)
+            self.stats['contexts_recycled'] += 1
+            pooled = None
+
+        if pooled is None:
+            while len(self._contexts) >= self.max_contexts:
+                oldest_email = next(iter(self._contexts))
+                self._discard_context(oldest_email)
+            context = self._browser.new_context(storage_state=storage_state)
+            pooled = PooledContext(context, session_saved_at)
+            self._contexts[email] = pooled
+            self.stats['contexts_created'] += 1
+
+        self._contexts.move_to_end(email)
+        return pooled
+
+    def _storage_state(self, email, pooled):
+        """Cookies of a context after a successful post, or None"""
+        try:
+            return pooled.context.storage_state()
+        except Exception as e:
+            print(f"⚠️ Could not read refreshed session for {email}: {str(e)}")
+            return None
+
+    def _save_cookies(self, email, pooled, storage_state):
+        """Write the cookies refreshed by a successful post back to the session"""
+        if storage_state is None:
+            return
+        try:
+            pooled.session_saved_at = session_store.refresh(email, storage_state)
+        except Exception as e:
+            print(f"⚠️ Could not save refreshed session for {email}: {str(e)}")
+
+    def _is_healthy(self, pooled, session_saved_at):
+        """Check a pooled context is still usable for the next post"""
+        if not pooled.healthy or pooled.uses >= self.recycle_after:
+            return False
+        # The session was re-saved (e.g. via Update Session) since the
+        # context was created, so it holds stale cookies.
+        if pooled.session_saved_at != session_saved_at:
+            return False
+        try:
+            pooled.context.cookies()
+        except Exception:
+            return False
+        return True
+
+    def _discard_context(self, email):
+        pooled = self._contexts.pop(email, None)
+        if pooled is None:
+            return
+        try:
+            pooled.context.close()
+        except Exception:
+            pass
+
+    def _close_browser(self):
+        for email in list(self._contexts):
+            self._discard_context(email)
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._browser_uses = 0
@@ -1,12 +1,12 @@
-from postings.models import MarketplacePost
-from .post_to_facebook import login_and_post
+from postings.scheduler import dispatch_due_posts
 
 
 def auto_post():
-    posts = MarketplacePost.objects.filter(posted=False)
-    for post in posts:
-        account = post.account
-        login_and_post(account.email, account.password, post.title,
-                       post.description, post.price, post.image.path, post.location)
-        post.posted = True
-        post.save()
+    """
+    Queue every auto_post post whose scheduled_time has come for the
+    posting workers.
+
+    For running from an external cron instead of the resident
+    run_post_scheduler command; run_posting_worker publishes the jobs.
+    """
+    return dispatch_due_posts()
@@ -0,0 +1,63 @@
+"""
+The Marketplace create-item form, shared by the sync and async flows.
+
+post_to_facebook.publish_listing and async_post_to_facebook.publish_listing
+walk the same steps with the selectors and fallbacks defined here; only
+the Playwright API they call differs. A selector fixed here is fixed for
+both flows.
+"""
+from django.conf import settings
+from django.utils import timezone
+import os
+import re
+
+CREATE_ITEM_URL = "https://www.facebook.com/marketplace/create/item"
+
+IMAGE_INPUT_SELECTOR = "input[type='file'][accept*='image']"
+TEXT_INPUT_SELECTOR = "input[type='text']"
+# Empty text inputs above this (in px) are the header's search bar
+HEADER_HEIGHT = 100
+DESCRIPTION_FALLBACK_SELECTOR = "textarea"
+VALIDATION_ERROR_SELECTOR = "[role='alert'], .error, [aria-invalid='true']"
+SCROLL_TO_BOTTOM = "window.scrollTo(0, document.body.scrollHeight)"
+
+# (field, selector that opens it, option to pick, try the keyboard last)
+DROPDOWNS = [
+    ('Category', "text=Category", "Furniture", False),
+    ('Condition', "text=Condition", "New", True),
+    ('Availability', "text=List as in Stock", "In stock", True),
+]
+
+PUBLISH_LABELS = ["Publish", "Publish listing", "Post", "Post listing",
+                  "Confirm", "Submit"]
+
+
+def button_attempts(name):
+    """
+    Ways to find a button labelled name, in the order they are tried:
+    (how, target) where how is 'role' for get_by_role('button', name=target)
+    and otherwise a label for a CSS/text selector.
+    """
+    return [
+        ('text', f"text='{name}'"),
+        ('role', name),
+        ('aria-label', f"button[aria-label*='{name}']"),
+    ]
+
+
+NEXT_BUTTON = button_attempts("Next")
+PUBLISH_BUTTON = [attempt for label in PUBLISH_LABELS
+                  for attempt in button_attempts(label)]
+
+
+def screenshot_path(email, reason):
+    """
+    A new file under MEDIA_ROOT/error_screenshots for a failed post, named
+    after the account and the time so concurrent posts never overwrite
+    each other's screenshots.
+    """
+    folder = os.path.join(settings.MEDIA_ROOT, 'error_screenshots')
+    os.makedirs(folder, exist_ok=True)
+    account = re.sub(r'[^\w@.-]', '_', email or 'unknown')
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(folder, f"{account}_{stamp}_{reason}.png")
@@ -0,0 +1,138 @@
+"""
+Concurrent login of bulk uploaded Facebook accounts.
+
+Bulk uploads used to log their accounts in one after another from a
+single thread, each waiting out its own checkpoint, so 100 accounts took
+hours. run_onboarding logs in up to ACCOUNT_ONBOARDING CONCURRENCY
+accounts at once, each in its own context of one shared browser.
+
+An account that hits a captcha/2FA checkpoint gives its slot to the next
+account straight away. Its window stays open, parked, for the user to
+solve it by hand (up to PARKED_CHECKPOINT); the session is saved as soon
+as the login completes. Accounts still stuck afterwards stay 'checkpoint'
+for Update Session.
+
+Every step is recorded on the batch's AccountOnboarding rows, which the
+onboarding progress API reports.
+"""
+from accounts.encryption import PasswordEncryption
+from accounts.models import AccountOnboarding
+from accounts.sessions import session_store
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from playwright.async_api import async_playwright
+from .async_post_to_facebook import (
+    _is_checkpoint, _is_logged_in, _is_still_login, _login_answered,
+)
+from .readiness import wait_until_async
+import asyncio
+
+
+def get_onboarding_config():
+    config = {
+        'CONCURRENCY': 4,
+        'HEADLESS': False,
+    }
+    config.update(getattr(settings, 'ACCOUNT_ONBOARDING', {}))
+    return config
+
+
+def set_status(task_id, status, error_message=None):
+    AccountOnboarding.objects.filter(pk=task_id).update(
+        status=status, error_message=error_message, updated_at=timezone.now())
+
+
+def load_tasks(batch_id):
+    """(task id, email, password) of the batch's accounts still to log in"""
+    tasks = list(AccountOnboarding.objects.filter(
+        batch_id=batch_id, status='queued').select_related('account'))
+    passwords = PasswordEncryption.decrypt_many(
+        [task.account.encrypted_password for task in tasks])
+    return [(task.pk, task.account.email, password)
+            for task, password in zip(tasks, passwords)]
+
+
+async def _submit_login(page, email, password):
+    await page.goto("https://www.facebook.com/login",
+                    wait_until="domcontentloaded")
+    await page.fill('input[name="email"]', email)
+    await page.fill('input[name="pass"]', password)
+    await page.click('button[name="login"]')
+    await wait_until_async(lambda: _login_answered(page), 'LOGIN')
+
+
+async def onboard_account(browser, semaphore, config, task_id, email, password):
+    """Log one account in and save its session; returns its final status"""
+    context = None
+    parked = False
+    try:
+        async with semaphore:
+            await sync_to_async(set_status)(task_id, 'logging_in')
+            print(f"🔐 Logging in {email}...")
+            context = await browser.new_context()
+            page = await context.new_page()
+            await _submit_login(page, email, password)
+
+            if await _is_checkpoint(page):
+                await sync_to_async(set_status)(
+                    task_id, 'checkpoint', 'Captcha/2FA checkpoint needs solving by hand')
+                if config['HEADLESS']:
+                    return 'checkpoint'
+                parked = True
+            elif await _is_still_login(page):
+                await sync_to_async(set_status)(
+                    task_id, 'failed', 'Login failed - wrong password or blocked')
+                print(f"❌ Login failed for {email}")
+                return 'failed'
+
+        if parked:
+            # Outside the pool: the other accounts carry on meanwhile
+            print(f"🔒 Checkpoint for {email} - solve it in its browser window")
+            if not await wait_until_async(lambda: _is_logged_in(page),
+                                          'PARKED_CHECKPOINT'):
+                print(f"⏰ Checkpoint for {email} not solved; use Update Session later")
+                return 'checkpoint'
+
+        await sync_to_async(session_store.save)(
+            email, await context.storage_state())
+        await sync_to_async(set_status)(task_id, 'saved')
+        print(f"✅ Session saved for {email}")
+        return 'saved'
+
+    except Exception as e:
+        await sync_to_async(set_status)(task_id, 'failed', str(e))
+        print(f"❌ Error onboarding {email}: {str(e)}")
+        return 'failed'
+    finally:
+        if context is not None:
+            await context.close()
+
+
+async def run_onboarding_async(batch_id, config=None):
+    """Log in the queued accounts of a batch; returns {status: count}"""
+    config = config or get_onboarding_config()
+    tasks = await sync_to_async(load_tasks)(batch_id)
+    if not tasks:
+        return {}
+
+    semaphore = asyncio.Semaphore(max(1, config['CONCURRENCY']))
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=config['HEADLESS'])
+        try:
+            results = await asyncio.gather(*(
+                onboard_account(browser, semaphore, config, *task)
+                for task in tasks))
+        finally:
+            await browser.close()
+
+    counts = {}
+    for result in results:
+        counts[result] = counts.get(result, 0) + 1
+    print(f"🏁 Onboarding batch {batch_id} finished: {counts}")
+    return counts
+
+
+def run_onboarding(batch_id, config=None):
+    """run_onboarding_async for a background thread"""
+    return asyncio.run(run_onboarding_async(batch_id, config))
@@ -1,6 +1,33 @@
 from playwright.sync_api import sync_playwright
-import time
-import os
+from accounts.sessions import session_store
+from .listing_form import (
+    CREATE_ITEM_URL, DESCRIPTION_FALLBACK_SELECTOR, DROPDOWNS, HEADER_HEIGHT,
+    IMAGE_INPUT_SELECTOR, NEXT_BUTTON, PUBLISH_BUTTON, SCROLL_TO_BOTTOM,
+    TEXT_INPUT_SELECTOR, VALIDATION_ERROR_SELECTOR, screenshot_path,
+)
+from .readiness import (
+    LOGIN_ERROR_SELECTOR, StepTimer, get_timeout, wait_for_dropdown,
+    wait_for_network_idle, wait_for_publish_button, wait_for_publish_complete,
+    wait_for_selector, wait_for_upload_complete, wait_until,
+)
+
+
+def login_answered(page):
+    """True once Facebook has responded to a submitted login form"""
+    return (
+        "login" not in page.url or
+        "checkpoint" in page.url or
+        page.locator(LOGIN_ERROR_SELECTOR).first.is_visible()
+    )
+
+
+def manual_login_done(page):
+    """True once the user has finished logging in by hand"""
+    return (
+        "login" not in page.url and
+        "checkpoint" not in page.url and
+        not page.locator('input[name="email"]').is_visible()
+    )
 
 
 def debug_page_state(page, step_name):
@@ -34,6 +61,12 @@ def debug_page_state(page, step_name):
 
 
 def save_session(email, password=None):
+    """
+    Log an account in (automatically when a password is given, else by
+    hand) and save its session. The session is written to the database
+    after Playwright exits, since Django refuses queries while it runs.
+    """
+    storage_state = None
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)
         context = browser.new_context()
@@ -51,7 +84,7 @@ def save_session(email, password=None):
                 page.click('button[name="login"]')
                 
                 print("⏳ Waiting for login response...")
-                time.sleep(5)
+                wait_until(page, lambda: login_answered(page), 'LOGIN')
                 
                 # Check if still on login page or error occurred
                 current_url = page.url
@@ -74,8 +107,10 @@ def save_session(email, password=None):
                 if is_checkpoint:
                     print("🔒 Captcha/2FA/Checkpoint detected!")
                     print("👉 Please solve it manually in the browser...")
-                    print("⏳ Waiting 90 seconds for you to complete...")
-                    time.sleep(90)
+                    print(
+                        f"⏳ Waiting up to {get_timeout('CHECKPOINT') // 1000} seconds for you to complete...")
+                    wait_until(page, lambda: manual_login_done(page),
+                               'CHECKPOINT')
                     
                     # Verify login after manual intervention
                     current_url = page.url
@@ -103,7 +138,8 @@ def save_session(email, password=None):
             except Exception as e:
                 print(f"⚠️ Auto-login failed: {e}")
                 print("👉 Please log in manually")
-                time.sleep(60)
+                wait_until(page, lambda: manual_login_done(page),
+                           'MANUAL_LOGIN')
                 
                 # Check if manual login succeeded
                 try:
@@ -115,8 +151,8 @@ def save_session(email, password=None):
                     pass
         else:
             print(f"👉 Please log in manually for: {email}")
-            print("⏳ You have 60 seconds...")
-            time.sleep(60)
+            print(f"⏳ You have {get_timeout('MANUAL_LOGIN') // 1000} seconds...")
+            wait_until(page, lambda: manual_login_done(page), 'MANUAL_LOGIN')
             
             # Check if manual login succeeded
             try:
@@ -128,14 +164,16 @@ def save_session(email, password=None):
                 pass
 
         if login_successful:
-            session_path = f"sessions/{email.replace('@', '_').replace('.', '_')}.json"
-            context.storage_state(path=session_path)
-            print(f"✅ Session saved: {session_path}")
-        else:
-            print(f"❌ Session NOT saved - Login failed for {email}")
-            
+            storage_state = context.storage_state()
+
         browser.close()
-        return login_successful
+
+    if login_successful:
+        session_store.save(email, storage_state)
+        print(f"✅ Session saved for {email}")
+    else:
+        print(f"❌ Session NOT saved - Login failed for {email}")
+    return login_successful
 
 
 def auto_login_and_save_session(email, password):
@@ -147,7 +185,7 @@ def auto_login_and_save_session(email, password):
         
         print(f"🌐 Opening Facebook login page...")
         page.goto("https://www.facebook.com/login", timeout=60000)
-        page.wait_for_timeout(3000)
+        wait_for_selector(page, "input[name='email']", 'NAVIGATION')
         
         print(f"📧 Entering email: {email}")
         email_input = page.locator("input[name='email']")
@@ -163,429 +201,295 @@ def auto_login_and_save_session(email, password):
         
         # Wait for login to complete
         print(f"⏳ Waiting for login to complete...")
-        page.wait_for_timeout(10000)
+        wait_until(page, lambda: login_answered(page), 'LOGIN')
         
         # Check if login was successful
         if "login" in page.url.lower():
             print(f"❌ Login may have failed - still on login page")
             browser.close()
             return False
-        
-        session_path = f"sessions/{email.replace('@', '_').replace('.', '_')}.json"
-        context.storage_state(path=session_path)
-        print(f"✅ Session saved: {session_path}")
-        
+
+        storage_state = context.storage_state()
         browser.close()
-        return True
+
+    # Saved once Playwright has exited; Django refuses queries while it runs
+    session_store.save(email, storage_state)
+    print(f"✅ Session saved for {email}")
+    return True
 
 
 # def login_and_post(email, title, description, price, image_path, location):
-def login_and_post(email, title, description, price, image_path):
-    session_file = f"sessions/{email.replace('@', '_').replace('.', '_')}.json"
-    if not os.path.exists(session_file):
+def login_and_post(email, title, description, price, image_path, pool=None):
+    """
+    Publish one Marketplace listing for an account.
+
+    When a BrowserPool is given the listing is filled in a page of the
+    account's pooled context, in the pool's browser thread; otherwise a
+    browser is launched for this post only. Returns the per-step timings
+    reported by publish_listing. The context's refreshed cookies are
+    written back after a successful post.
+    """
+    if pool is not None:
+        return pool.run(email, lambda page: publish_listing(
+            page, title, description, price, image_path, email=email))
+
+    storage_state, _ = session_store.load(email)
+    if storage_state is None:
         raise Exception(
             f"❌ Session not found. Run save_session('{email}') first.")
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)
-        context = browser.new_context(storage_state=session_file)
+        context = browser.new_context(storage_state=storage_state)
         page = context.new_page()
 
-        print("🌐 Opening Marketplace listing page...")
-        page.goto("https://www.facebook.com/marketplace/create/item",
-                  timeout=60000)
-
         try:
-            print("📸 Uploading image first...")
-            image_input = page.locator("input[type='file'][accept*='image']")
-            image_input.set_input_files(image_path)
-            page.wait_for_timeout(2000)  # Wait for UI to update after upload
-
-            print("📝 Filling Title...")
-            # Find all visible text inputs that are empty and not in the header
-            text_inputs = page.locator("input[type='text']")
-            title_input = None
-
-            for i in range(text_inputs.count()):
-                el = text_inputs.nth(i)
-                # Check if visible and empty
-                if el.is_visible() and el.input_value() == "":
-                    # Optionally, skip if it's in the header (search bar)
-                    # You can check its position on the page
-                    box = el.bounding_box()
-                    if box and box['y'] > 100:  # Skip inputs at the very top
-                        title_input = el
-                        break
-
-            if not title_input:
-                all_inputs = page.locator("input")
-                print(
-                    f"Found {all_inputs.count()} input fields. Printing their outerHTML:")
-                for i in range(all_inputs.count()):
-                    print(all_inputs.nth(i).evaluate("el => el.outerHTML"))
-                raise Exception("Could not find title input field")
-
-            title_input.fill(title)
+            timings = publish_listing(page, title, description, price,
+                                      image_path, email=email)
+            refreshed_state = context.storage_state()
+        finally:
+            context.close()
+            browser.close()
 
-            print("💰 Filling Price...")
+    # Written once Playwright has exited; Django refuses queries while it runs
+    save_refreshed_session(email, refreshed_state)
+    return timings
 
-            # Find all text inputs again
-            text_inputs = page.locator("input[type='text']")
-            price_input = None
-            title_filled = False
 
-            for i in range(text_inputs.count()):
-                el = text_inputs.nth(i)
-                if el.is_visible():
-                    # If this is the title input, mark as found
-                    if not title_filled and el.input_value() == title:
-                        title_filled = True
-                        continue
-                    # The next visible, empty input after title is likely the price
-                    if title_filled and el.input_value() == "":
-                        price_input = el
-                        break
-
-            if not price_input:
-                print(
-                    "Could not find price input. Printing all text input values for debug:")
-                for i in range(text_inputs.count()):
-                    el = text_inputs.nth(i)
-                    print(
-                        f"Input {i}: value='{el.input_value()}', visible={el.is_visible()}")
-                raise Exception("Could not find price input field")
-
-            price_input.fill(str(price))
-            # page.locator("text=Category").first.wait_for(
-            # state="visible", timeout=10000)
-
-            print("📂 Selecting Category...")
-            category_clicked = False
-            category_elements = page.locator("text=Category")
-            for i in range(category_elements.count()):
-                el = category_elements.nth(i)
-                if el.is_visible():
-                    el.scroll_into_view_if_needed()
-                    el.click(force=True)
-                    category_clicked = True
-                    print("✅ Clicked on Category dropdown")
-                    break
+def save_refreshed_session(email, storage_state):
+    """Write the cookies Facebook refreshed during a post back to the session"""
+    try:
+        session_store.refresh(email, storage_state)
+    except Exception as e:
+        print(f"⚠️ Could not save refreshed session for {email}: {str(e)}")
 
-            if not category_clicked:
-                print("❌ Could not find Category dropdown")
-            else:
-                # Wait for dropdown to fully open
-                page.wait_for_timeout(2000)
 
-                # Try to select "Furniture"
-                furniture_selected = False
+def click_first_visible(page, selector, force=True):
+    """Click the first visible element matching selector; return True if clicked"""
+    for el in page.locator(selector).all():
+        if el.is_visible():
+            el.scroll_into_view_if_needed()
+            el.click(force=force)
+            return True
+    return False
 
-                # Approach 1: Try role-based selection
-                try:
-                    furniture_option = page.get_by_role(
-                        "option", name="Furniture")
-                    if furniture_option.is_visible():
-                        furniture_option.click()
-                        furniture_selected = True
-                        print("✅ Selected Category: Furniture (via role)")
-                except Exception:
-                    pass
 
-                # Approach 2: Try text locator
-                if not furniture_selected:
-                    try:
-                        furniture_options = page.locator(
-                            "text='Furniture'").all()
-                        for option in furniture_options:
-                            if option.is_visible():
-                                option.scroll_into_view_if_needed()
-                                option.click(force=True)
-                                furniture_selected = True
-                                print("✅ Selected Category: Furniture (via text)")
-                                break
-                    except Exception:
-                        pass
-
-                if not furniture_selected:
-                    print(
-                        "❌ Could not select Furniture category - trying to continue anyway")
-
-            print("🔧 Selecting Condition...")
-            condition_elements = page.locator("text=Condition")
-            condition_clicked = False
-            for i in range(condition_elements.count()):
-                el = condition_elements.nth(i)
-                if el.is_visible():
-                    el.scroll_into_view_if_needed()
-                    el.click(force=True)
-                    condition_clicked = True
-                    print("✅ Clicked on Condition dropdown")
-                    break
-
-            if not condition_clicked:
-                print("❌ Could not find Condition dropdown")
-            else:
-                # Wait for dropdown to fully open
-                page.wait_for_timeout(2000)
+def click_button(page, attempts):
+    """
+    Click a button found by the first of listing_form's attempts that
+    matches a visible element; return that (how, target) or None.
+    """
+    for how, target in attempts:
+        try:
+            if how == 'role':
+                button = page.get_by_role("button", name=target)
+                if button.is_visible():
+                    button.scroll_into_view_if_needed()
+                    button.click()
+                    return how, target
+            elif click_first_visible(page, target, force=False):
+                return how, target
+        except Exception:
+            pass
+    return None
+
+
+def choose_option(page, name, use_keyboard=False):
+    """Pick an option from an open dropdown by role, then text, then keyboard"""
+    try:
+        option = page.get_by_role("option", name=name)
+        if option.is_visible():
+            option.click()
+            return "role"
+    except Exception:
+        pass
+
+    try:
+        if click_first_visible(page, f"text='{name}'"):
+            return "text"
+    except Exception:
+        pass
+
+    if use_keyboard:
+        try:
+            page.keyboard.press("Home")
+            page.keyboard.press("ArrowDown")
+            page.keyboard.press("Enter")
+            return "keyboard"
+        except Exception:
+            pass
+    return None
 
-                # Try multiple approaches to find and click "New" condition
-                new_clicked = False
 
-                # Approach 1: Try exact text match with role
-                try:
-                    new_option = page.get_by_role("option", name="New")
-                    if new_option.is_visible():
-                        new_option.click()
-                        new_clicked = True
-                        print("✅ Selected Condition: New (via role)")
-                except Exception:
-                    pass
+def print_visible_buttons(page):
+    """Print every visible button, to see what a missing button was called"""
+    print("\n🔍 DEBUG: All visible buttons on page:")
+    for i, btn in enumerate(page.locator("button").all()):
+        try:
+            if btn.is_visible():
+                text = btn.inner_text()
+                aria_label = btn.get_attribute("aria-label")
+                print(f"  Button {i}: text='{text}', aria-label='{aria_label}'")
+        except Exception:
+            pass
 
-                # Approach 2: Try text locator with exact match
-                if not new_clicked:
-                    try:
-                        # Find all elements containing "New" and filter
-                        new_options = page.locator("text='New'").all()
-                        for option in new_options:
-                            if option.is_visible():
-                                option.scroll_into_view_if_needed()
-                                option.click(force=True)
-                                new_clicked = True
-                                print("✅ Selected Condition: New (via text)")
-                                break
-                    except Exception:
-                        pass
-
-                # Approach 3: Use keyboard navigation
-                if not new_clicked:
-                    try:
-                        page.keyboard.press("Home")  # Go to top
-                        page.keyboard.press("ArrowDown")  # Navigate to "New"
-                        page.keyboard.press("Enter")
-                        new_clicked = True
-                        print("✅ Selected Condition: New (via keyboard)")
-                    except Exception:
-                        pass
-
-                if not new_clicked:
-                    print(
-                        "❌ Could not select New condition - trying to continue anyway")
 
-            print("🧾 Filling Description...")
+def report_validation_errors(page):
+    """Print the form's visible validation messages, if any"""
+    error_indicators = page.locator(VALIDATION_ERROR_SELECTOR).all()
+    if error_indicators:
+        print("⚠️ Warning: Found potential validation errors on the page")
+        for i, indicator in enumerate(error_indicators):
             try:
-                # Try by accessible name
-                description_area = page.get_by_role(
-                    "textbox", name="Description")
-                description_area.fill(description)
+                if indicator.is_visible():
+                    print(f"  Error {i+1}: {indicator.inner_text()}")
             except Exception:
-                # Fallback: use the first visible textarea
-                textareas = page.locator("textarea")
-                for i in range(textareas.count()):
-                    el = textareas.nth(i)
-                    if el.is_visible():
-                        el.fill(description)
-                        break
-
-            print("📦 Setting Availability: In Stock...")
-
-            availability_clicked = False
-            availability_elements = page.locator("text=List as in Stock")
-            for i in range(availability_elements.count()):
-                el = availability_elements.nth(i)
-                if el.is_visible():
-                    el.scroll_into_view_if_needed()
-                    el.click(force=True)
-                    availability_clicked = True
-                    print("✅ Clicked on Availability dropdown")
-                    break
-
-            if availability_clicked:
-                page.wait_for_timeout(2000)
+                pass
 
-                # Try to select "In Stock"
-                in_stock_set = False
 
-                # Approach 1: Try direct selection
-                try:
-                    in_stock_option = page.get_by_role(
-                        "option", name="In stock")
-                    if in_stock_option.is_visible():
-                        in_stock_option.click()
-                        in_stock_set = True
-                        print("✅ Set Availability: In Stock (via role)")
-                except Exception:
-                    pass
+def publish_listing(page, title, description, price, image_path, email=None):
+    """
+    Fill and publish the Marketplace create-item form on an open page.
+
+    The steps and selectors live in listing_form, shared with the async
+    flow. Returns the per-step timings in seconds. On failure a screenshot
+    named after the account is saved under MEDIA_ROOT/error_screenshots.
+    """
+    timer = StepTimer()
+    print("🌐 Opening Marketplace listing page...")
+    page.goto(CREATE_ITEM_URL, timeout=get_timeout('NAVIGATION'))
+    form_url = page.url
+    timer.lap('open_form')
+
+    try:
+        print("📸 Uploading image first...")
+        page.locator(IMAGE_INPUT_SELECTOR).set_input_files(image_path)
+        wait_for_upload_complete(page)  # Wait for the photo preview
+        timer.lap('upload_image')
+
+        print("📝 Filling Title...")
+        title_input = None
+        for el in page.locator(TEXT_INPUT_SELECTOR).all():
+            if el.is_visible() and el.input_value() == "":
+                box = el.bounding_box()
+                if box and box['y'] > HEADER_HEIGHT:
+                    title_input = el
+                    break
 
-                # Approach 2: Keyboard navigation
-                if not in_stock_set:
-                    try:
-                        page.keyboard.press("Home")
-                        page.keyboard.press("ArrowDown")
-                        page.keyboard.press("Enter")
-                        in_stock_set = True
-                        print("✅ Set Availability: In Stock (via keyboard)")
-                    except Exception:
-                        pass
-
-                if not in_stock_set:
-                    print("❌ Could not set availability - trying to continue anyway")
+        if not title_input:
+            all_inputs = page.locator("input")
+            print(
+                f"Found {all_inputs.count()} input fields. Printing their outerHTML:")
+            for i in range(all_inputs.count()):
+                print(all_inputs.nth(i).evaluate("el => el.outerHTML"))
+            raise Exception("Could not find title input field")
+
+        title_input.fill(title)
+
+        print("💰 Filling Price...")
+        # The next visible, empty input after the title is the price
+        price_input = None
+        title_filled = False
+        for el in page.locator(TEXT_INPUT_SELECTOR).all():
+            if not el.is_visible():
+                continue
+            value = el.input_value()
+            if not title_filled and value == title:
+                title_filled = True
+                continue
+            if title_filled and value == "":
+                price_input = el
+                break
+
+        if not price_input:
+            print(
+                "Could not find price input. Printing all text input values for debug:")
+            for i, el in enumerate(page.locator(TEXT_INPUT_SELECTOR).all()):
+                print(
+                    f"Input {i}: value='{el.input_value()}', visible={el.is_visible()}")
+            raise Exception("Could not find price input field")
+
+        price_input.fill(str(price))
+        timer.lap('fill_title_price')
+
+        for field, trigger, option, use_keyboard in DROPDOWNS:
+            print(f"📂 Selecting {field}: {option}...")
+            if not click_first_visible(page, trigger):
+                print(f"❌ Could not find {field} dropdown")
+                continue
+            print(f"✅ Clicked on {field} dropdown")
+            wait_for_dropdown(page)
+            selected_via = choose_option(page, option, use_keyboard)
+            if selected_via:
+                print(f"✅ Selected {field}: {option} (via {selected_via})")
             else:
-                print("❌ Could not find Availability dropdown")
+                print(f"❌ Could not select {field} {option} - trying to continue anyway")
 
-            print("📍 Skipping location (using proxy/VPN for region)...")
+        print("🧾 Filling Description...")
+        try:
+            page.get_by_role("textbox", name="Description").fill(description)
+        except Exception:
+            for el in page.locator(DESCRIPTION_FALLBACK_SELECTOR).all():
+                if el.is_visible():
+                    el.fill(description)
+                    break
 
-            # Debug: Check page state after filling all fields
-            debug_page_state(page, "After filling all fields")
-            
-            # Check for any validation errors before proceeding
-            print("🔍 Checking for validation errors...")
-            page.wait_for_timeout(1000)
-            
-            # Look for error messages or required field indicators
-            error_indicators = page.locator("[role='alert'], .error, [aria-invalid='true']").all()
-            if error_indicators:
-                print("⚠️ Warning: Found potential validation errors on the page")
-                for i, indicator in enumerate(error_indicators):
-                    try:
-                        if indicator.is_visible():
-                            text = indicator.inner_text()
-                            print(f"  Error {i+1}: {text}")
-                    except Exception:
-                        pass
-            
-            # Scroll to bottom to ensure all fields are visible and validated
-            print("📜 Scrolling to bottom of form...")
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(2000)
+        timer.lap('fill_details')
 
-            print("📤 Looking for Next button...")
-            next_clicked = False
-            
-            # Try multiple approaches to click Next button
-            # Approach 1: Text-based selector
-            try:
-                next_buttons = page.locator("text='Next'").all()
-                for btn in next_buttons:
-                    if btn.is_visible():
-                        btn.scroll_into_view_if_needed()
-                        btn.click()
-                        next_clicked = True
-                        print("✅ Clicked Next button (via text)")
-                        break
-            except Exception:
-                pass
-            
-            # Approach 2: Role-based selector
-            if not next_clicked:
-                try:
-                    next_btn = page.get_by_role("button", name="Next")
-                    if next_btn.is_visible():
-                        next_btn.click()
-                        next_clicked = True
-                        print("✅ Clicked Next button (via role)")
-                except Exception:
-                    pass
-            
-            # Approach 3: Try finding button with aria-label
-            if not next_clicked:
-                try:
-                    next_btn = page.locator("button[aria-label*='Next']").first
-                    if next_btn.is_visible():
-                        next_btn.click()
-                        next_clicked = True
-                        print("✅ Clicked Next button (via aria-label)")
-                except Exception:
-                    pass
-            
-            if not next_clicked:
-                print("⚠️ Could not find Next button - form might be single page, looking for Publish directly")
-            else:
-                # Wait for page transition after clicking Next
-                page.wait_for_timeout(3000)
-                print("⏳ Waiting for Publish button to appear...")
-            
-            # Debug: Check page state after Next button
-            debug_page_state(page, "After Next button (or if no Next button)")
-            
-            # Scroll to bottom again to reveal Publish button
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(2000)
-            
-            print("🔍 Looking for Publish button...")
-            publish_clicked = False
-            
-            # Try multiple variations of the Publish button
-            publish_variations = [
-                "Publish",
-                "Publish listing",
-                "Post",
-                "Post listing",
-                "Confirm",
-                "Submit"
-            ]
-            
-            for variation in publish_variations:
-                if publish_clicked:
-                    break
-                    
-                # Try text-based selector
-                try:
-                    publish_buttons = page.locator(f"text='{variation}'").all()
-                    for btn in publish_buttons:
-                        if btn.is_visible():
-                            btn.scroll_into_view_if_needed()
-                            page.wait_for_timeout(1000)
-                            btn.click()
-                            publish_clicked = True
-                            print(f"✅ Clicked Publish button (found as '{variation}')")
-                            break
-                except Exception:
-                    pass
-                
-                # Try role-based selector
-                if not publish_clicked:
-                    try:
-                        publish_btn = page.get_by_role("button", name=variation)
-                        if publish_btn.is_visible():
-                            publish_btn.scroll_into_view_if_needed()
-                            page.wait_for_timeout(1000)
-                            publish_btn.click()
-                            publish_clicked = True
-                            print(f"✅ Clicked Publish button (role, found as '{variation}')")
-                            break
-                    except Exception:
-                        pass
-            
-            if not publish_clicked:
-                # Last resort: Take a screenshot and print all buttons for debugging
-                print("❌ Could not find Publish button!")
-                page.screenshot(path="publish_button_missing.png")
-                print("📷 Screenshot saved as publish_button_missing.png")
-                
-                # Print all visible buttons for debugging
-                print("\n🔍 DEBUG: All visible buttons on page:")
-                buttons = page.locator("button").all()
-                for i, btn in enumerate(buttons):
-                    try:
-                        if btn.is_visible():
-                            text = btn.inner_text()
-                            aria_label = btn.get_attribute("aria-label")
-                            print(f"  Button {i}: text='{text}', aria-label='{aria_label}'")
-                    except Exception:
-                        pass
-                
-                raise Exception("Publish button not found after multiple attempts")
-            
-            # Wait for posting to complete
-            page.wait_for_timeout(3000)
-            print("✅ Posted successfully!")
+        print("📍 Skipping location (using proxy/VPN for region)...")
 
-        except Exception as e:
-            print("❌ Something went wrong while trying to fill the form.")
-            page.screenshot(path="error_screenshot.png")
-            print("📷 Screenshot saved as error_screenshot.png")
-            raise e
+        # Debug: Check page state after filling all fields
+        debug_page_state(page, "After filling all fields")
 
-        finally:
-            context.close()
-            browser.close()
+        print("🔍 Checking for validation errors...")
+        wait_for_network_idle(page)
+        report_validation_errors(page)
+
+        # Scroll to bottom to ensure all fields are visible and validated
+        print("📜 Scrolling to bottom of form...")
+        page.evaluate(SCROLL_TO_BOTTOM)
+        wait_for_network_idle(page)
+        timer.lap('validate_form')
+
+        print("📤 Looking for Next button...")
+        found = click_button(page, NEXT_BUTTON)
+        if found:
+            print(f"✅ Clicked Next button (via {found[0]})")
+            print("⏳ Waiting for Publish button to appear...")
+            wait_for_publish_button(page)
+        else:
+            print("⚠️ Could not find Next button - form might be single page, looking for Publish directly")
+
+        debug_page_state(page, "After Next button (or if no Next button)")
+
+        # Scroll to bottom again to reveal Publish button
+        page.evaluate(SCROLL_TO_BOTTOM)
+        wait_for_network_idle(page)
+        timer.lap('next_step')
+
+        print("🔍 Looking for Publish button...")
+        found = click_button(page, PUBLISH_BUTTON)
+        if not found:
+            print("❌ Could not find Publish button!")
+            path = screenshot_path(email, 'publish_button_missing')
+            page.screenshot(path=path)
+            print(f"📷 Screenshot saved as {path}")
+            print_visible_buttons(page)
+            raise Exception("Publish button not found after multiple attempts")
+        print(f"✅ Clicked Publish button (via {found[0]}, {found[1]})")
+
+        # Wait for posting to complete
+        wait_for_publish_complete(page, form_url)
+        timer.lap('publish')
+        print("✅ Posted successfully!")
+        return timer.report()
+
+    except Exception as e:
+        print("❌ Something went wrong while trying to fill the form.")
+        try:
+            path = screenshot_path(email, 'error')
+            page.screenshot(path=path)
+            print(f"📷 Screenshot saved as {path}")
+        except Exception as screenshot_error:
+            print(f"⚠️ Could not save a screenshot: {str(screenshot_error)}")
+        raise e
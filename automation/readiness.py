@@ -0,0 +1,204 @@
+"""
+Event-driven readiness waits for the Facebook automation.
+
+Each helper returns as soon as the page reaches the state the next step
+needs (a selector is visible, the network is idle, an upload preview has
+rendered) instead of sleeping for a fixed time. The values in
+settings.PLAYWRIGHT_TIMEOUTS are upper bounds, not delays.
+
+Sync helpers take a playwright.sync_api Page; the *_async variants take a
+playwright.async_api Page.
+"""
+from django.conf import settings
+import asyncio
+import time
+
+DEFAULT_TIMEOUTS = {
+    'NAVIGATION': 60000,     # Opening the create-listing page
+    'UPLOAD': 15000,         # Image preview rendered after set_input_files
+    'DROPDOWN': 5000,        # Options visible after opening a dropdown
+    'NETWORK_IDLE': 5000,    # Form settled after a scroll or field change
+    'NEXT_STEP': 10000,      # Publish step visible after clicking Next
+    'PUBLISH': 20000,        # Listing submitted after clicking Publish
+    'LOGIN': 15000,          # Login form answered after submitting credentials
+    'MANUAL_LOGIN': 60000,   # User logging in by hand
+    'CHECKPOINT': 90000,     # User solving a captcha/2FA checkpoint
+    'PARKED_CHECKPOINT': 900000,  # Onboarding checkpoint left open for the user
+}
+
+POLL_INTERVAL_MS = 250
+
+UPLOAD_PREVIEW_SELECTOR = "img[src^='blob:'], img[src^='data:image'], [aria-label*='Remove photo'], [aria-label*='Remove image']"
+LOGIN_ERROR_SELECTOR = "[role='alert'], #error_box"
+DROPDOWN_SELECTOR = "[role='listbox'], [role='option'], [role='menu']"
+PUBLISH_BUTTON_SELECTOR = ", ".join(
+    f"[role='button']:has-text('{name}'), button:has-text('{name}')"
+    for name in ("Publish", "Post", "Confirm", "Submit")
+)
+
+
+def get_timeout(name):
+    """Maximum wait in milliseconds for a named readiness step"""
+    configured = getattr(settings, 'PLAYWRIGHT_TIMEOUTS', {})
+    return configured.get(name, DEFAULT_TIMEOUTS[name])
+
+
+class StepTimer:
+    """
+    Record how long each step of a post took.
+
+    Call lap(name) at the end of each step; the time since the previous
+    lap (or since the timer was created) is booked to that step.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.timings[name] = round(
+            self.timings.get(name, 0) + now - self._last, 3)
+        self._last = now
+
+    @property
+    def total(self):
+        return round(sum(self.timings.values()), 3)
+
+    def report(self):
+        """Print and return the per-step timings"""
+        steps = ", ".join(f"{name} {seconds:.2f}s"
+                          for name, seconds in self.timings.items())
+        print(f"⏱️ Step timings: {steps} (total {self.total:.2f}s)")
+        return dict(self.timings, total=self.total)
+
+
+def _is_timeout(error):
+    return type(error).__name__ == 'TimeoutError'
+
+
+def wait_for_selector(page, selector, timeout_name):
+    """Wait until selector is visible; return False if the bound is hit"""
+    try:
+        page.locator(selector).first.wait_for(
+            state="visible", timeout=get_timeout(timeout_name))
+        return True
+    except Exception as e:
+        if _is_timeout(e):
+            return False
+        raise
+
+
+def wait_for_network_idle(page, timeout_name='NETWORK_IDLE'):
+    """Wait for in-flight requests to finish; Facebook may never fully idle"""
+    try:
+        page.wait_for_load_state(
+            "networkidle", timeout=get_timeout(timeout_name))
+        return True
+    except Exception as e:
+        if _is_timeout(e):
+            return False
+        raise
+
+
+def wait_for_upload_complete(page):
+    """Wait for the photo preview, falling back to the network settling"""
+    if wait_for_selector(page, UPLOAD_PREVIEW_SELECTOR, 'UPLOAD'):
+        return True
+    return wait_for_network_idle(page)
+
+
+def wait_for_dropdown(page):
+    return wait_for_selector(page, DROPDOWN_SELECTOR, 'DROPDOWN')
+
+
+def wait_for_publish_button(page):
+    return wait_for_selector(page, PUBLISH_BUTTON_SELECTOR, 'NEXT_STEP')
+
+
+def wait_for_publish_complete(page, form_url):
+    """Wait for Facebook to leave the create form after publishing"""
+    try:
+        page.wait_for_url(lambda url: url != form_url,
+                          timeout=get_timeout('PUBLISH'))
+        return True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+    return wait_for_network_idle(page)
+
+
+def wait_until(page, predicate, timeout_name):
+    """Poll predicate() until it is truthy or the bound is hit"""
+    deadline = time.monotonic() + get_timeout(timeout_name) / 1000
+    while True:
+        try:
+            if predicate():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        page.wait_for_timeout(POLL_INTERVAL_MS)
+
+
+async def wait_for_selector_async(page, selector, timeout_name):
+    try:
+        await page.locator(selector).first.wait_for(
+            state="visible", timeout=get_timeout(timeout_name))
+        return True
+    except Exception as e:
+        if _is_timeout(e):
+            return False
+        raise
+
+
+async def wait_for_network_idle_async(page, timeout_name='NETWORK_IDLE'):
+    try:
+        await page.wait_for_load_state(
+            "networkidle", timeout=get_timeout(timeout_name))
+        return True
+    except Exception as e:
+        if _is_timeout(e):
+            return False
+        raise
+
+
+async def wait_for_upload_complete_async(page):
+    if await wait_for_selector_async(page, UPLOAD_PREVIEW_SELECTOR, 'UPLOAD'):
+        return True
+    return await wait_for_network_idle_async(page)
+
+
+async def wait_for_dropdown_async(page):
+    return await wait_for_selector_async(page, DROPDOWN_SELECTOR, 'DROPDOWN')
+
+
+async def wait_for_publish_button_async(page):
+    return await wait_for_selector_async(
+        page, PUBLISH_BUTTON_SELECTOR, 'NEXT_STEP')
+
+
+async def wait_for_publish_complete_async(page, form_url):
+    try:
+        await page.wait_for_url(lambda url: url != form_url,
+                                timeout=get_timeout('PUBLISH'))
+        return True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+    return await wait_for_network_idle_async(page)
+
+
+async def wait_until_async(predicate, timeout_name):
+    """Await predicate() until it is truthy or the bound is hit"""
+    deadline = time.monotonic() + get_timeout(timeout_name) / 1000
+    while True:
+        try:
+            if await predicate():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(POLL_INTERVAL_MS / 1000)
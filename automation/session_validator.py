@@ -0,0 +1,147 @@
+"""
+Active validation of saved Facebook sessions.
+
+A saved session only proves that a login worked at some point; expired
+cookies used to surface when a post failed after a full browser launch.
+The validator opens each session's storage state in a context of one
+headless browser, loads SESSION_VALIDATION PROBE_URL (a light page that
+needs a login) and classifies where it lands:
+
+- valid: the page loaded logged in
+- expired: Facebook sent it back to the login form
+- checkpoint: Facebook wants a captcha or security check first
+- error: the page could not be loaded, or the session not decrypted
+
+Up to CONCURRENCY accounts are probed at once. Each result is written to
+the account's SessionState (validation_status, last_validated_at) as soon
+as it is known. Point PROBE_URL at a local page server to try it without
+touching Facebook.
+"""
+from accounts.models import SessionState
+from asgiref.sync import sync_to_async
+from cryptography.fernet import InvalidToken
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from playwright.async_api import async_playwright
+from postings.cache_utils import invalidate_health_check_cache
+from .async_post_to_facebook import _is_checkpoint, _is_still_login
+import asyncio
+
+# Requests the probe never needs; skipping them keeps a probe to one page load
+BLOCKED_RESOURCES = {'image', 'media', 'font'}
+
+
+def get_validation_config():
+    config = {
+        'PROBE_URL': 'https://www.facebook.com/settings',
+        'CONCURRENCY': 8,
+        'TIMEOUT_MS': 30000,
+        'REVALIDATE_AFTER_HOURS': 12,
+    }
+    config.update(getattr(settings, 'SESSION_VALIDATION', {}))
+    return config
+
+
+def sessions_to_validate(account_ids=None, stale_after=None):
+    """
+    Return {email: storage_state} of the saved sessions to probe, in one
+    query. Sessions are shared by email, so each is probed once. stale_after
+    (a timedelta) skips sessions validated more recently than that. The
+    state is None when it could not be decrypted.
+    """
+    sessions = SessionState.objects.select_related('account').only(
+        'encrypted_state', 'saved_at', 'account__email'
+    ).order_by('account__email', '-saved_at')
+    if account_ids:
+        sessions = sessions.filter(account_id__in=account_ids)
+    if stale_after is not None:
+        sessions = sessions.filter(
+            Q(last_validated_at__isnull=True) |
+            Q(last_validated_at__lt=timezone.now() - stale_after))
+
+    states = {}
+    for session in sessions:
+        email = session.account.email
+        if email in states:
+            continue
+        try:
+            states[email] = session.get_state()
+        except (InvalidToken, ValueError):
+            states[email] = None
+    return states
+
+
+def record_result(email, status):
+    """Store a probe outcome on the sessions of every account with this email"""
+    SessionState.objects.filter(account__email=email).update(
+        validation_status=status, last_validated_at=timezone.now())
+    invalidate_health_check_cache()
+
+
+async def probe_session(browser, storage_state, config):
+    """Load the probe page with a storage state; return its classification"""
+    if storage_state is None:
+        return 'error'
+
+    context = await browser.new_context(storage_state=storage_state)
+    try:
+        await context.route('**/*', _skip_heavy_resources)
+        page = await context.new_page()
+        await page.goto(config['PROBE_URL'], wait_until='domcontentloaded',
+                        timeout=config['TIMEOUT_MS'])
+        return await classify_page(page)
+    except Exception as e:
+        print(f"⚠️ Session probe failed: {str(e)}")
+        return 'error'
+    finally:
+        await context.close()
+
+
+async def classify_page(page):
+    """Classify the page a probe landed on as valid, expired or checkpoint"""
+    if await _is_checkpoint(page):
+        return 'checkpoint'
+    if await _is_still_login(page):
+        return 'expired'
+    return 'valid'
+
+
+async def _skip_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def validate_sessions_async(states, config=None):
+    """Probe {email: storage_state} in a bounded pool; returns {email: status}"""
+    config = config or get_validation_config()
+    semaphore = asyncio.Semaphore(max(1, config['CONCURRENCY']))
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+
+        async def validate(email, storage_state):
+            async with semaphore:
+                status = await probe_session(browser, storage_state, config)
+            await sync_to_async(record_result)(email, status)
+            print(f"{'✅' if status == 'valid' else '❌'} {email}: {status}")
+            return email, status
+
+        try:
+            results = await asyncio.gather(
+                *(validate(email, state) for email, state in states.items()))
+        finally:
+            await browser.close()
+
+    return dict(results)
+
+
+def validate_sessions(account_ids=None, stale_after=None, config=None):
+    """Probe saved sessions from sync code; returns {email: status}"""
+    config = config or get_validation_config()
+    states = sessions_to_validate(account_ids, stale_after)
+    if not states:
+        return {}
+    return asyncio.run(validate_sessions_async(states, config))
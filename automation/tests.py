@@ -1,3 +1,229 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from accounts.models import FacebookAccount
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from playwright.async_api import async_playwright
+from unittest import SkipTest
+from .browser_pool import BrowserPool
+from .listing_form import NEXT_BUTTON, PUBLISH_BUTTON, screenshot_path
+from .post_to_facebook import click_button
+from .session_validator import classify_page, get_validation_config, probe_session
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
 
-# Create your tests here.
+
+class BrowserPoolTests(TestCase):
+
+    def test_orm_usable_while_pool_started(self):
+        """Playwright runs in the pool's own thread, not the worker's"""
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        pool = BrowserPool()
+        pool.start()
+        try:
+            account = FacebookAccount.objects.create(user=user, email='a@example.com')
+            account.email = 'b@example.com'
+            account.save()
+            self.assertTrue(FacebookAccount.objects.filter(
+                pk=account.pk, email='b@example.com').exists())
+        finally:
+            pool.close()
+
+
+class ProbePageHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the probe page: the c_user cookie picks where a session
+    lands, like Facebook does for live, expired and flagged sessions.
+    """
+    def do_GET(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        session = cookie['c_user'].value if 'c_user' in cookie else ''
+
+        if self.path == '/settings':
+            if session == 'valid':
+                self.page('<h1>Settings</h1>')
+            elif session == 'checkpoint':
+                self.redirect('/checkpoint/?next=/settings')
+            else:
+                self.redirect('/login/?next=/settings')
+        elif self.path.startswith('/login/'):
+            self.page('<form><input name="email"><input name="pass" type="password"></form>')
+        elif self.path.startswith('/checkpoint/'):
+            self.page('<h1>Security Check</h1><p>Enter the code we sent you</p>')
+        else:
+            self.send_error(404)
+
+    def page(self, body):
+        content = f'<html><body>{body}</body></html>'.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def redirect(self, location):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SessionProbeTests(SimpleTestCase):
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ProbePageHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.config = get_validation_config()
+        self.config.update(PROBE_URL=f'http://127.0.0.1:{server.server_port}/settings',
+                           TIMEOUT_MS=10000)
+
+    def state(self, session):
+        return {'cookies': [{'name': 'c_user', 'value': session,
+                             'domain': '127.0.0.1', 'path': '/'}],
+                'origins': []}
+
+    def probe_all(self, states):
+        async def probe():
+            async with async_playwright() as p:
+                try:
+                    browser = await p.chromium.launch(headless=True)
+                except Exception as e:
+                    raise SkipTest(f"Chromium is not available: {str(e).splitlines()[0]}")
+                try:
+                    return [await probe_session(browser, state, self.config)
+                            for state in states]
+                finally:
+                    await browser.close()
+        return asyncio.run(probe())
+
+    def test_probe_classifies_landing_pages(self):
+        results = self.probe_all([self.state('valid'), self.state('expired'),
+                                  self.state('checkpoint'), None])
+
+        self.assertEqual(results, ['valid', 'expired', 'checkpoint', 'error'])
+
+    def test_unreachable_probe_page_is_an_error(self):
+        self.config['PROBE_URL'] = 'http://127.0.0.1:9/settings'
+
+        self.assertEqual(self.probe_all([self.state('valid')]), ['error'])
+
+
+class FakePage:
+    """Just enough of a Playwright page for the landing page checks"""
+    def __init__(self, url, visible=()):
+        self.url = url
+        self.visible = set(visible)
+
+    def locator(self, selector):
+        return FakeLocator(selector in self.visible)
+
+
+class FakeLocator:
+    def __init__(self, visible):
+        self.visible = visible
+
+    async def is_visible(self):
+        return self.visible
+
+
+class ClassifyPageTests(SimpleTestCase):
+    """The landing page checks of probe_session, without a browser"""
+
+    def classify(self, page):
+        return asyncio.run(classify_page(page))
+
+    def test_logged_in_page(self):
+        self.assertEqual(self.classify(FakePage('https://www.facebook.com/settings')), 'valid')
+
+    def test_login_redirect_and_form(self):
+        self.assertEqual(self.classify(FakePage('https://www.facebook.com/login/?next=x')),
+                         'expired')
+        self.assertEqual(self.classify(FakePage('https://www.facebook.com/settings',
+                                                ['input[name="pass"]'])), 'expired')
+
+    def test_checkpoint_redirect_and_prompt(self):
+        self.assertEqual(self.classify(FakePage('https://www.facebook.com/checkpoint/1')),
+                         'checkpoint')
+        self.assertEqual(self.classify(FakePage('https://www.facebook.com/settings',
+                                                ['text=Security Check'])), 'checkpoint')
+
+
+class FakeFormPage:
+    """A sync Playwright page where only the given selectors are visible"""
+    def __init__(self, visible):
+        self.visible = set(visible)
+        self.clicked = []
+
+    def locator(self, selector):
+        return FakeElements([FakeElement(self, selector)])
+
+    def get_by_role(self, role, name):
+        return FakeElement(self, f'{role}:{name}')
+
+
+class FakeElements:
+    def __init__(self, elements):
+        self.elements = elements
+
+    def all(self):
+        return self.elements
+
+
+class FakeElement:
+    def __init__(self, page, key):
+        self.page = page
+        self.key = key
+
+    def is_visible(self):
+        return self.key in self.page.visible
+
+    def scroll_into_view_if_needed(self):
+        pass
+
+    def click(self, force=False):
+        self.page.clicked.append(self.key)
+
+
+class ListingFormTests(SimpleTestCase):
+
+    def test_next_button_found_by_aria_label(self):
+        page = FakeFormPage(["button[aria-label*='Next']"])
+
+        self.assertEqual(click_button(page, NEXT_BUTTON),
+                         ('aria-label', "button[aria-label*='Next']"))
+        self.assertEqual(page.clicked, ["button[aria-label*='Next']"])
+
+    def test_publish_labels_tried_in_order(self):
+        page = FakeFormPage(["text='Submit'", 'button:Post'])
+
+        self.assertEqual(click_button(page, PUBLISH_BUTTON), ('role', 'Post'))
+
+    def test_no_button_found(self):
+        page = FakeFormPage([])
+
+        self.assertIsNone(click_button(page, NEXT_BUTTON))
+        self.assertEqual(page.clicked, [])
+
+    def test_screenshots_named_per_account(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            first = screenshot_path('a/b@example.com', 'error')
+            second = screenshot_path('a/b@example.com', 'error')
+            other = screenshot_path('c@example.com', 'error')
+
+        folder = os.path.join(media_root, 'error_screenshots')
+        self.assertTrue(os.path.isdir(folder))
+        self.assertEqual(os.path.dirname(first), folder)
+        self.assertTrue(os.path.basename(first).startswith('a_b@example.com_'))
+        self.assertTrue(os.path.basename(other).startswith('c@example.com_'))
+        self.assertNotEqual(first, second)
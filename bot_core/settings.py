@@ -31,6 +31,17 @@ FACEBOOK_PASSWORD_ENCRYPTION_KEY = os.environ.get(
     'FB_PASSWORD_KEY',
     'ea9l8USD4t8LOzTSDvfE3FVOOob4NHul3AYmgZ22drc='  # Development key
 )
+# Previous keys, still accepted for decryption while data is re-encrypted
+# with the current one (python manage.py rotate_encryption_key)
+FACEBOOK_PASSWORD_OLD_ENCRYPTION_KEYS = [
+    key for key in os.environ.get('FB_PASSWORD_OLD_KEYS', '').split(',') if key
+]
+
+# Decrypted account passwords kept in memory (accounts/encryption.py)
+CREDENTIAL_CACHE = {
+    'MAX_ENTRIES': 500,
+    'TTL_SECONDS': 300,
+}
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -170,6 +181,125 @@ CACHE_TTL = {
     'DASHBOARD_STATS': 60,  # 1 minute
     'ACCOUNTS_LIST': 300,   # 5 minutes
     'POSTS_LIST': 30,       # 30 seconds
+    'HEALTH_CHECK': 300,    # 5 minutes; also invalidated when posts, accounts or sessions change
+}
+
+# Browser pool used by the posting command (automation/browser_pool.py)
+BROWSER_POOL = {
+    'RECYCLE_AFTER_POSTS': 25,           # New context per account after N posts
+    'BROWSER_RECYCLE_AFTER_POSTS': 200,  # Restart Chromium after N posts
+    'MAX_CONTEXTS': 10,                  # Accounts kept open at once
+}
+
+# Decrypted session storage states kept in memory (accounts/sessions.py)
+SESSION_STORE_MAX_ENTRIES = 200
+
+# Headless probing of saved sessions (automation/session_validator.py)
+SESSION_VALIDATION = {
+    'PROBE_URL': 'https://www.facebook.com/settings',  # Light page that needs a login
+    'CONCURRENCY': 8,                # Sessions probed at once
+    'TIMEOUT_MS': 30000,             # Probe page load timeout
+    'REVALIDATE_AFTER_HOURS': 12,    # validate_sessions skips sessions checked more recently
+}
+
+# How long a worker's claim on a post lasts before another worker may
+# reclaim it (postings.models.MarketplacePostQuerySet.claim_batch)
+POSTING_CLAIM_LEASE_SECONDS = 900
+
+# A running PostingJob/ImportJob whose worker sent no heartbeat for this
+# long is claimed again by another worker (JobQueueQuerySet.claim_next).
+# A little over POSTING_CLAIM_LEASE_SECONDS, so a reclaimed job's posts
+# are claimable again too.
+JOB_CLAIM_TIMEOUT_SECONDS = 960
+
+# Per-account posting limits enforced by the posting engine's scheduler
+# (postings/rate_limit.py). Accounts that can't post again within
+# MAX_WAIT_SECONDS get their remaining posts rescheduled for later.
+# Off by default: once on, Start Posting publishes at most POSTS_PER_HOUR
+# per account and reschedules the rest, so large jobs take hours.
+# Enable with POSTING_RATE_LIMIT=true.
+POSTING_RATE_LIMIT = {
+    'ENABLED': os.environ.get('POSTING_RATE_LIMIT', 'false').lower() == 'true',
+    'POSTS_PER_HOUR': 6,                 # Token bucket refill rate
+    'BURST': 2,                          # Posts allowed back to back
+    'MIN_SPACING_SECONDS': 120,          # Between two posts of an account
+    'JITTER_SECONDS': 60,                # Random extra spacing
+    'DAILY_CAP': 40,                     # Posts per rolling 24 hours
+    'RATE_LIMIT_BACKOFF_SECONDS': 3600,  # Pause after a rate_limit error
+    'MAX_WAIT_SECONDS': 600,
+    'HEARTBEAT_SECONDS': 60,             # Lease renewal while waiting
+}
+
+# Dispatch of due posts by run_post_scheduler (postings/scheduler.py)
+SCHEDULED_DISPATCH = {
+    'BATCH_SIZE': 200,         # Posts per queued posting job
+    'MAX_SLEEP_SECONDS': 30,   # Longest wait before checking for new posts
+}
+
+# Posting progress is written in batches (postings/progress.py): after this
+# many finished posts or seconds, whichever comes first, plus at job end
+POSTING_PROGRESS_FLUSH = {
+    'EVERY_POSTS': 10,
+    'EVERY_SECONDS': 5,
+}
+
+# Rows per bulk_create batch when bulk uploads create posts (postings/bulk.py)
+BULK_UPLOAD_BATCH_SIZE = 500
+
+# Derivatives uploaded instead of the original post images
+# (postings/image_optimizer.py): scaled down, recompressed, metadata stripped.
+IMAGE_OPTIMIZATION = {
+    'ENABLED': True,
+    'MAX_DIMENSION': 2048,   # Longest side in pixels
+    'FORMAT': 'JPEG',        # JPEG or WEBP
+    'QUALITY': 85,
+}
+
+# Image downloads for CSV bulk uploads (postings/image_fetcher.py)
+IMAGE_FETCH = {
+    'WORKERS': 8,                    # Downloads in flight in total
+    'PER_HOST': 4,                   # Downloads in flight per host
+    'TIMEOUT': 10,                   # Seconds per request
+    'RETRIES': 2,                    # Extra attempts for 429 / 5xx / network errors
+    'BACKOFF': 0.5,                  # Seconds, doubled on every retry
+    'MAX_BYTES': 10 * 1024 * 1024,   # Largest image accepted
+}
+
+# Products each import worker chunk parses, downloads and inserts before
+# saving and publishing progress (postings/imports.py)
+IMPORT_CHUNK_ROWS = 100
+
+# Live progress for the status-stream SSE endpoint (postings/progress_channel.py).
+# 'local' only reaches viewers in the same process as the posting engine, so
+# with run_posting_worker in its own process updates arrive through the
+# database re-check every FALLBACK_POLL_SECONDS (one query per watched job
+# per web process, however many viewers); use 'redis' for instant pushes.
+POSTING_PROGRESS_BROKER = {
+    'BACKEND': os.environ.get('POSTING_PROGRESS_BROKER', 'local'),
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    'FALLBACK_POLL_SECONDS': 2,
+    'HEARTBEAT_SECONDS': 15,
+}
+
+# Upper bounds (ms) for the readiness waits in automation/readiness.py.
+# Steps finish as soon as the page is ready; these only cap slow pages.
+PLAYWRIGHT_TIMEOUTS = {
+    'NAVIGATION': 60000,
+    'UPLOAD': 15000,
+    'DROPDOWN': 5000,
+    'NETWORK_IDLE': 5000,
+    'NEXT_STEP': 10000,
+    'PUBLISH': 20000,
+    'LOGIN': 15000,
+    'MANUAL_LOGIN': 60000,
+    'CHECKPOINT': 90000,
+    'PARKED_CHECKPOINT': 900000,
+}
+
+# Bulk account onboarding (automation/onboarding.py)
+ACCOUNT_ONBOARDING = {
+    'CONCURRENCY': 4,    # Accounts logging in at once, one browser context each
+    'HEADLESS': False,   # Checkpoints are solved by hand in the open window
 }
 
 # REST Framework Configuration
@@ -38,6 +38,7 @@ export default function CreatePostPage() {
   const [imageUrl, setImageUrl] = useState("");
   const [imagePreview, setImagePreview] = useState("");
   const [useImageUrl, setUseImageUrl] = useState(false);
+  const [autoPost, setAutoPost] = useState(false);
 
   // Validation errors
   const [errors, setErrors] = useState<{ [key: string]: string }>({});
@@ -142,6 +143,7 @@ export default function CreatePostPage() {
       formData.append("title", title);
       formData.append("description", description);
       formData.append("price", price);
+      formData.append("auto_post", autoPost ? "true" : "false");
 
       if (imageFile) {
         formData.append("image", imageFile);
@@ -352,6 +354,25 @@ export default function CreatePostPage() {
                 <p className="mt-1 text-sm text-red-600">{errors.price}</p>
               )}
             </div>
+
+            {/* Auto Post */}
+            <label className="flex items-start gap-3 cursor-pointer">
+              <input
+                type="checkbox"
+                checked={autoPost}
+                onChange={(e) => setAutoPost(e.target.checked)}
+                className="mt-0.5 h-4 w-4 text-blue-600 rounded border-gray-300 focus:ring-2 focus:ring-blue-500"
+              />
+              <span>
+                <span className="block text-sm font-medium text-gray-700">
+                  Post automatically
+                </span>
+                <span className="block text-sm text-gray-500">
+                  Publish as soon as the posts are created, without clicking
+                  Start Posting
+                </span>
+              </span>
+            </label>
           </CardContent>
         </Card>
 
@@ -23,9 +23,26 @@ import PostingProgress from "@/components/PostingProgress";
 import ConfirmDialog from "@/components/ui/ConfirmDialog";
 import type { MarketplacePost } from "@/types";
 
+// Columns the post lists and the edit modal use
+const POST_LIST_FIELDS = [
+  "id",
+  "title",
+  "description",
+  "price",
+  "image",
+  "scheduled_time",
+  "posted",
+  "status",
+  "error_message",
+  "retry_count",
+  "account",
+];
+
 export default function PostsPage() {
   const [posts, setPosts] = useState<MarketplacePost[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null); // Cursor of the next page
+  const [loadingMore, setLoadingMore] = useState(false);
   const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
   const [isBulkUploadOpen, setIsBulkUploadOpen] = useState(false);
   const [isEditModalOpen, setIsEditModalOpen] = useState(false);
@@ -166,11 +183,13 @@ export default function PostsPage() {
     });
   };
 
+  // Load the first page; further pages are loaded on demand by loadMorePosts
   const fetchPosts = async () => {
     try {
       setLoading(true);
-      const response = await postsAPI.list();
-      setPosts(response.data);
+      const response = await postsAPI.list(null, POST_LIST_FIELDS);
+      setPosts(response.data.results);
+      setNextPage(response.data.next);
     } catch (err) {
       showError("Failed to load posts");
       console.error(err);
@@ -179,6 +198,21 @@ export default function PostsPage() {
     }
   };
 
+  const loadMorePosts = async () => {
+    if (!nextPage || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const response = await postsAPI.list(nextPage);
+      setPosts((prev) => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      showError("Failed to load more posts");
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDelete = async (id: number) => {
     const postToDelete = posts.find((p) => p.id === id);
 
@@ -891,6 +925,18 @@ export default function PostsPage() {
         </Card>
       </div>
 
+      {nextPage && (
+        <div className="flex justify-center">
+          <Button
+            variant="outline"
+            onClick={loadMorePosts}
+            disabled={loadingMore}
+          >
+            {loadingMore ? "Loading..." : "Load more posts"}
+          </Button>
+        </div>
+      )}
+
       {/* Logs Section - BELOW THE TWO BOXES */}
       <Card>
         <CardHeader>
@@ -26,6 +26,11 @@ interface FacebookAccount {
   session_exists: boolean;
 }
 
+// Give up on an upload whose progress hasn't moved for this long. The
+// backend reclaims a stopped worker's import after JOB_CLAIM_TIMEOUT_SECONDS
+// (16 minutes), so this leaves room for another worker to resume it.
+const UPLOAD_STALL_TIMEOUT_MS = 20 * 60 * 1000;
+
 interface UploadError {
   row: number;
   error: string;
@@ -41,6 +46,7 @@ export default function BulkUploadPostsModal({
   const [selectedAccounts, setSelectedAccounts] = useState<number[]>([]);
   const [txtFile, setTxtFile] = useState<File | null>(null);
   const [imageFiles, setImageFiles] = useState<File[]>([]);
+  const [autoPost, setAutoPost] = useState(false);
   const [loading, setLoading] = useState(false);
   const [uploadResult, setUploadResult] = useState<{
     success: boolean;
@@ -172,6 +178,7 @@ High performance gaming laptop with RTX 3060 graphics card. Perfect for gaming a
       imageFiles.forEach((imageFile) => {
         formData.append("images", imageFile);
       });
+      formData.append("auto_post", autoPost ? "true" : "false");
 
       // Call API with images support
       const API_URL =
@@ -195,20 +202,56 @@ High performance gaming laptop with RTX 3060 graphics card. Perfect for gaming a
         throw new Error(data.error || "Upload failed");
       }
 
+      // The upload is processed in the background - poll the import job until it finishes
+      let job = null;
+      let lastProgress = -1;
+      let lastProgressAt = Date.now();
+      do {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(
+          `${API_URL}/posts/import-jobs/${data.job_id}/`,
+          { headers: { Authorization: `Bearer ${token}` } }
+        );
+        job = await jobResponse.json();
+        if (!jobResponse.ok) {
+          throw new Error(job.detail || "Could not load upload status");
+        }
+        if (job.processed_bytes !== lastProgress) {
+          lastProgress = job.processed_bytes;
+          lastProgressAt = Date.now();
+        } else if (Date.now() - lastProgressAt > UPLOAD_STALL_TIMEOUT_MS) {
+          throw new Error(
+            "Upload is taking too long. Check the posts list later to see what was created."
+          );
+        }
+      } while (job.status === "queued" || job.status === "running");
+
+      if (job.status === "failed") {
+        throw new Error(job.error_message || "Upload failed");
+      }
+
+      const message = `Created ${job.created_posts} posts!`;
       setUploadResult({
         success: true,
-        message: data.message,
-        stats: data.stats,
-        errors: data.errors,
-        additional_errors: data.additional_errors,
+        message,
+        stats: {
+          success_count: job.created_posts,
+          error_count: job.error_count,
+          num_posts: job.total_rows - job.error_count,
+          num_accounts: selectedAccounts.length,
+        },
+        errors: job.errors.slice(0, 10),
+        additional_errors:
+          job.error_count > 10 ? job.error_count - 10 : undefined,
       });
 
-      onToast("success", data.message);
+      onToast("success", message);
 
       // Reset form
       setTxtFile(null);
       setImageFiles([]);
       setSelectedAccounts([]);
+      setAutoPost(false);
 
       // Call success callback to refresh posts list
       onSuccess();
@@ -233,6 +276,7 @@ High performance gaming laptop with RTX 3060 graphics card. Perfect for gaming a
   const handleClose = () => {
     setTxtFile(null);
     setSelectedAccounts([]);
+    setAutoPost(false);
     setUploadResult(null);
     onClose();
   };
@@ -465,6 +509,25 @@ High performance gaming laptop with RTX 3060 graphics card. Perfect for gaming a
               </div>
             </div>
 
+            {/* Auto Post */}
+            <label className="flex items-start gap-3 cursor-pointer">
+              <input
+                type="checkbox"
+                checked={autoPost}
+                onChange={(e) => setAutoPost(e.target.checked)}
+                className="mt-0.5 h-4 w-4 text-blue-600 rounded border-gray-300 focus:ring-2 focus:ring-blue-500"
+              />
+              <span>
+                <span className="block text-sm font-medium text-gray-900">
+                  Post automatically
+                </span>
+                <span className="block text-xs text-gray-500">
+                  Publish the posts as soon as they are created, without
+                  clicking Start Posting
+                </span>
+              </span>
+            </label>
+
             {/* Upload Result */}
             {uploadResult && (
               <div
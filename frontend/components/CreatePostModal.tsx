@@ -33,6 +33,7 @@ export default function CreatePostModal({
     price: "",
   });
   const [image, setImage] = useState<File | null>(null);
+  const [autoPost, setAutoPost] = useState(false);
   const [imagePreview, setImagePreview] = useState<string>("");
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
@@ -150,6 +151,7 @@ export default function CreatePostModal({
         submitData.append("price", formData.price);
         submitData.append("account", accountId.toString());
         submitData.append("scheduled_time", now);
+        submitData.append("auto_post", autoPost ? "true" : "false");
         submitData.append("image", image);
         return postsAPI.create(submitData);
       });
@@ -174,6 +176,7 @@ export default function CreatePostModal({
       setSelectedAccounts([]);
       setImage(null);
       setImagePreview("");
+      setAutoPost(false);
 
       onSuccess();
       onClose();
@@ -410,6 +413,25 @@ export default function CreatePostModal({
                 )}
               </div>
             </div>
+
+            {/* Auto Post */}
+            <label className="flex items-start gap-3 cursor-pointer">
+              <input
+                type="checkbox"
+                checked={autoPost}
+                onChange={(e) => setAutoPost(e.target.checked)}
+                className="mt-0.5 h-4 w-4 text-blue-600 rounded border-gray-300 focus:ring-2 focus:ring-blue-500"
+              />
+              <span>
+                <span className="block text-sm font-semibold text-gray-900">
+                  Post automatically
+                </span>
+                <span className="block text-sm text-gray-500">
+                  Publish as soon as the post is created, without clicking
+                  Start Posting
+                </span>
+              </span>
+            </label>
           </div>
 
           {/* Footer */}
@@ -18,8 +18,10 @@ export default function PostingProgress({
 
   useEffect(() => {
     // Server-Sent Events (SSE) connection for real-time updates
+    // EventSource can't set an Authorization header, so pass the token in the URL
+    const token = localStorage.getItem("token");
     const eventSource = new EventSource(
-      `http://localhost:8000/api/posts/status-stream/${jobId}/`
+      `http://localhost:8000/api/posts/status-stream/${jobId}/?token=${token}`
     );
 
     eventSource.onopen = () => {
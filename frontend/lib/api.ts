@@ -93,7 +93,14 @@ export const accountsAPI = {
 };
 
 export const postsAPI = {
-  list: () => api.get("/posts/"),
+  // Cursor-paginated: pass the previous page's `next` URL to get the following page.
+  // `fields` limits the columns returned; `next` URLs keep it.
+  list: (next?: string | null, fields?: string[]) =>
+    next
+      ? api.get(next)
+      : api.get("/posts/", {
+          params: fields ? { fields: fields.join(",") } : undefined,
+        }),
 
   create: (data: FormData) =>
     api.post("/posts/", data, {
@@ -107,12 +114,13 @@ export const postsAPI = {
 
   delete: (id: number) => api.delete(`/posts/${id}/`),
 
-  bulkUpload: (file: File, accountIds: number[]) => {
+  bulkUpload: (file: File, accountIds: number[], autoPost = false) => {
     const formData = new FormData();
     formData.append("csv_file", file);
     accountIds.forEach((id) => {
       formData.append("accounts[]", id.toString());
     });
+    formData.append("auto_post", autoPost ? "true" : "false");
     return api.post("/posts/bulk-upload/", formData, {
       headers: { "Content-Type": "multipart/form-data" },
     });
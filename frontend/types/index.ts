@@ -21,6 +21,8 @@ export interface MarketplacePost {
   price: number;
   image?: string;
   scheduled_time: string;
+  // Published by the scheduler at scheduled_time, without Start Posting
+  auto_post?: boolean;
   posted: boolean;
   // NEW: Enhanced status tracking
   status: "pending" | "posting" | "posted" | "failed";
@@ -15,6 +15,11 @@ urlpatterns = [
     # Bulk upload with images (NEW - CSV + ZIP)
     path('posts/bulk-upload-with-images/',
          BulkUploadWithImagesView.as_view(), name='bulk_upload_with_images'),
+    # Bulk upload job progress and results
+    path('posts/import-jobs/<str:job_id>/',
+         api_views.ImportJobStatusView.as_view(), name='import_job'),
+    path('posts/import-stream/<str:job_id>/',
+         realtime_views.import_status_stream, name='import_stream'),
     # Start posting
     path('posts/start-posting/',
          api_views.StartPostingView.as_view(), name='start_posting'),
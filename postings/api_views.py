@@ -3,30 +3,42 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from .models import MarketplacePost
-from .serializers import MarketplacePostSerializer
+from django.utils import timezone
+from .models import MarketplacePost, PostingJob, ImportJob
+from .pagination import PostCursorPagination
+from .serializers import (
+    ImportJobSerializer, MarketplacePostSerializer, form_flag, requested_fields,
+)
+from .imports import enqueue_import
 from .cache_utils import invalidate_dashboard_cache, invalidate_posts_cache
 from accounts.models import FacebookAccount
 import requests
 from django.core.files.base import ContentFile
 from urllib.parse import urlparse
 import os
-import csv
-import io
-from django.utils import timezone
 
 
 class MarketplacePostListCreateView(generics.ListCreateAPIView):
     """List all marketplace posts or create a new one"""
     serializer_class = MarketplacePostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PostCursorPagination
 
     def get_queryset(self):
         """Filter posts by current user's accounts - optimized with select_related"""
-        # Use select_related to fetch account data in a single query (reduces N+1 queries)
         queryset = MarketplacePost.objects.filter(
             account__user=self.request.user
-        ).select_related('account').order_by('-created_at')
+        )
+
+        # Use select_related to fetch account data in a single query (reduces N+1 queries),
+        # unless ?fields= leaves the nested account out
+        fields = requested_fields(self.request)
+        if fields is None or 'account' in fields:
+            queryset = queryset.select_related('account')
+        if fields:
+            # Slim rows: only load the requested columns plus the cursor keys
+            columns = {f.name for f in MarketplacePost._meta.concrete_fields} & fields
+            queryset = queryset.only('id', 'created_at', *columns)
 
         status = self.request.query_params.get('status', None)
         if status:
@@ -157,15 +169,11 @@ class MarketplacePostDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class BulkUploadPostsView(APIView):
-    """Handle bulk upload of posts via CSV file"""
+    """Handle bulk upload of posts via CSV file (processed as an ImportJob)"""
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        """Process CSV file and create posts for selected accounts"""
-        # Invalidate caches at the start since we'll be creating multiple posts
-        invalidate_dashboard_cache()
-        invalidate_posts_cache()
-
+        """Queue a CSV import that creates posts for the selected accounts"""
         csv_file = request.FILES.get('csv_file')
         account_ids = request.data.getlist(
             'accounts[]') or request.data.getlist('accounts')
@@ -206,139 +214,28 @@ class BulkUploadPostsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Parse CSV
-        try:
-            decoded_file = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(decoded_file))
-
-            success_count = 0
-            error_count = 0
-            errors = []
-            posts_data = []
-
-            # First pass: Validate and collect all post data
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    # Extract data from CSV
-                    title = row.get('title', '').strip()
-                    description = row.get('description', '').strip()
-                    price = row.get('price', '').strip()
-                    image_url = row.get('image_url', '').strip()
-
-                    # Validate required fields
-                    if not all([title, description, price]):
-                        errors.append({
-                            'row': row_num,
-                            'error': 'Missing required fields (title, description, or price)'
-                        })
-                        error_count += 1
-                        continue
-
-                    # Validate price
-                    try:
-                        price_decimal = float(price)
-                        if price_decimal < 0:
-                            raise ValueError("Price cannot be negative")
-                    except ValueError as e:
-                        errors.append({
-                            'row': row_num,
-                            'error': f"Invalid price '{price}' - {str(e)}"
-                        })
-                        error_count += 1
-                        continue
-
-                    # Download image from URL if provided
-                    image_file = None
-                    if image_url:
-                        try:
-                            response = requests.get(
-                                image_url, timeout=10, stream=True)
-                            if response.status_code == 200:
-                                parsed_url = urlparse(image_url)
-                                filename = os.path.basename(parsed_url.path)
-                                if not filename or '.' not in filename:
-                                    filename = f"{title[:30].replace(' ', '_')}.jpg"
-                                image_file = ContentFile(
-                                    response.content, name=filename)
-                            else:
-                                errors.append({
-                                    'row': row_num,
-                                    'error': f'Failed to download image (HTTP {response.status_code})'
-                                })
-                        except requests.exceptions.RequestException as e:
-                            errors.append({
-                                'row': row_num,
-                                'error': f'Error downloading image - {str(e)}'
-                            })
-
-                    # Store validated post data
-                    posts_data.append({
-                        'title': title,
-                        'description': description,
-                        'price': price_decimal,
-                        'image_file': image_file
-                    })
-
-                except Exception as e:
-                    errors.append({
-                        'row': row_num,
-                        'error': f'Unexpected error - {str(e)}'
-                    })
-                    error_count += 1
-                    continue
-
-            # Second pass: Create posts for ALL selected accounts
-            for post_data in posts_data:
-                for account in accounts:
-                    scheduled_time = timezone.now()
-
-                    post = MarketplacePost.objects.create(
-                        account=account,
-                        title=post_data['title'],
-                        description=post_data['description'],
-                        price=post_data['price'],
-                        scheduled_time=scheduled_time,
-                        posted=False
-                    )
-
-                    # Assign image if available
-                    if post_data.get('image_file'):
-                        post.image.save(
-                            post_data['image_file'].name,
-                            post_data['image_file'],
-                            save=True
-                        )
+        # Parsing, image downloads and inserts run in the import worker
+        import_job = enqueue_import(
+            request.user, 'csv', csv_file,
+            accounts.values_list('id', flat=True),
+            auto_post=form_flag(request.data, 'auto_post'))
 
-                    success_count += 1
+        return Response({
+            'success': True,
+            'job_id': import_job.job_id,
+            'status': import_job.status,
+            'message': 'Upload received. Posts are being created in the background.'
+        }, status=status.HTTP_202_ACCEPTED)
 
-            # Prepare response
-            num_posts = len(posts_data)
-            num_accounts = len(accounts)
 
-            response_data = {
-                'success': True,
-                'message': f'Successfully created {success_count} posts! ({num_posts} post(s) × {num_accounts} account(s))',
-                'stats': {
-                    'success_count': success_count,
-                    'error_count': error_count,
-                    'num_posts': num_posts,
-                    'num_accounts': num_accounts
-                }
-            }
-
-            if errors:
-                # Limit to first 10 errors
-                response_data['errors'] = errors[:10]
-                if len(errors) > 10:
-                    response_data['additional_errors'] = len(errors) - 10
-
-            return Response(response_data, status=status.HTTP_201_CREATED)
+class ImportJobStatusView(generics.RetrieveAPIView):
+    """Progress, results and row errors of a bulk upload job"""
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'job_id'
 
-        except Exception as e:
-            return Response(
-                {'error': f'Error processing CSV file: {str(e)}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def get_queryset(self):
+        return ImportJob.objects.filter(user=self.request.user)
 
 
 class StartPostingView(APIView):
@@ -347,8 +244,6 @@ class StartPostingView(APIView):
 
     def post(self, request):
         """Trigger posting process for selected post IDs"""
-        import subprocess
-        import sys
         import uuid
 
         post_ids = request.data.get('post_ids', [])
@@ -379,88 +274,26 @@ class StartPostingView(APIView):
             # Generate unique job ID for tracking
             job_id = str(uuid.uuid4())
 
-            # Start the posting script in background
-            # This runs the Django management command asynchronously
-            python_executable = sys.executable
-
-            # Get the project root directory (where manage.py is)
-            # __file__ is in postings/api_views.py
-            # Go up 2 levels: postings/ -> fb_marketplace_bot/
-            project_root = os.path.dirname(os.path.dirname(__file__))
-            manage_py_path = os.path.join(project_root, 'manage.py')
-
-            # Build command to run the management command
-            # Passing post IDs as comma-separated string and job ID
-            post_ids_str = ','.join(map(str, post_ids))
-            command = [
-                python_executable,
-                manage_py_path,
-                'post_to_marketplace',
-                '--post-ids',
-                post_ids_str,
-                '--job-id',
-                job_id
-            ]
-            post_ids_str = ','.join(map(str, post_ids))
-            command = [
-                python_executable,
-                manage_py_path,
-                'post_to_marketplace',
-                '--post-ids',
-                post_ids_str
-            ]
-
-            # Create log files for debugging
-            log_dir = os.path.join(project_root, 'logs')
-            os.makedirs(log_dir, exist_ok=True)
-            log_file = os.path.join(log_dir, 'posting_process.log')
-
-            # Write initial log entry
-            try:
-                with open(log_file, 'a', encoding='utf-8') as log:
-                    log.write(
-                        f"\n\n=== Starting posting process at {timezone.now()} ===\n")
-                    log.write(f"Project root: {project_root}\n")
-                    log.write(f"manage.py path: {manage_py_path}\n")
-                    log.write(f"Command: {' '.join(command)}\n")
-                    log.write(f"Post IDs: {post_ids_str}\n\n")
-            except Exception as e:
-                print(f"Error writing to log file: {e}")
-
-            # Start subprocess in background with output logging
-            # Open log file separately to avoid context manager closing it
-            log_handle = open(log_file, 'a', encoding='utf-8')
-
-            # Set environment variables for UTF-8 encoding (fixes emoji/unicode issues on Windows)
-            env = os.environ.copy()
-            env['PYTHONIOENCODING'] = 'utf-8'
-
-            # In production (headless), don't create console window
-            # In development, show console for debugging
-            creation_flags = 0
-            if os.name == 'nt':  # Windows
-                # Only show console window if not in headless mode
-                headless = os.getenv('PLAYWRIGHT_HEADLESS',
-                                     'true').lower() == 'true'
-                if not headless:
-                    creation_flags = subprocess.CREATE_NEW_CONSOLE
-
-            subprocess.Popen(
-                command,
-                stdout=log_handle,
-                stderr=log_handle,
-                cwd=project_root,
-                env=env,
-                creationflags=creation_flags
+            # Queue the job - the resident run_posting_worker command claims
+            # it, so no process is spawned per request and concurrent clicks
+            # are processed one after another instead of racing each other.
+            PostingJob.objects.create(
+                job_id=job_id,
+                status='queued',
+                total_posts=pending_count,
+                post_ids=list(pending_posts.values_list('id', flat=True))
             )
+            # Already queued, so run_post_scheduler doesn't queue them again
+            pending_posts.filter(dispatched_at__isnull=True).update(
+                dispatched_at=timezone.now())
 
             return Response({
                 'success': True,
-                'message': f'Started posting process for {pending_count} pending post(s)',
+                'message': f'Queued posting job for {pending_count} pending post(s)',
                 'job_id': job_id,
+                'status': 'queued',
                 'pending_count': pending_count,
                 'total_selected': len(post_ids),
-                'log_file': log_file,
                 'status_stream_url': f'/api/posts/status-stream/{job_id}/'
             }, status=status.HTTP_200_OK)
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PostingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'postings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
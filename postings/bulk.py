@@ -0,0 +1,78 @@
+"""
+Bulk creation of marketplace posts.
+
+The bulk upload views turn every product into one post per selected
+account. Instead of a create() plus an image UPDATE for each of those rows,
+each product's image is stored once up front and the posts are inserted
+with bulk_create in chunks of settings.BULK_UPLOAD_BATCH_SIZE, all inside
+a single transaction.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .cache_utils import invalidate_health_check_cache
+from .models import MarketplacePost
+
+
+def get_batch_size():
+    return getattr(settings, 'BULK_UPLOAD_BATCH_SIZE', 500)
+
+
+def store_image(image_file):
+    """
+    Save an uploaded or downloaded image; return its storage name.
+
+    The image field's storage is content-addressed, so bytes that are
+    already stored are not written again.
+    """
+    field = MarketplacePost._meta.get_field('image')
+    return field.storage.save(
+        field.generate_filename(None, image_file.name), image_file)
+
+
+def create_posts_for_accounts(posts_data, accounts, batch_size=None,
+                              auto_post=False):
+    """
+    Create a pending post for every product in posts_data for every account.
+
+    posts_data is any iterable of dicts with title, description, price and
+    an optional image_file. With auto_post the scheduler publishes the posts
+    right away instead of waiting for Start Posting. Returns the number of
+    posts created.
+    """
+    batch_size = batch_size or get_batch_size()
+    accounts = list(accounts)
+    created = 0
+    batch = []
+
+    with transaction.atomic():
+        for post_data in posts_data:
+            image_name = ''
+            if post_data.get('image_file'):
+                image_name = store_image(post_data['image_file'])
+
+            scheduled_time = timezone.now()
+            for account in accounts:
+                batch.append(MarketplacePost(
+                    account=account,
+                    title=post_data['title'],
+                    description=post_data['description'],
+                    price=post_data['price'],
+                    image=image_name,
+                    scheduled_time=scheduled_time,
+                    auto_post=auto_post,
+                    posted=False
+                ))
+
+            if len(batch) >= batch_size:
+                MarketplacePost.objects.bulk_create(batch, batch_size=batch_size)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            MarketplacePost.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+
+        invalidate_health_check_cache()
+
+    return created
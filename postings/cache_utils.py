@@ -2,6 +2,11 @@
 Cache utility functions for managing cache invalidation
 """
 from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from .models import CacheVersion
+
+HEALTH_CHECK_VERSION_KEY = 'health_check_version'
 
 
 def invalidate_dashboard_cache():
@@ -19,8 +24,38 @@ def invalidate_accounts_cache():
     cache.delete('accounts_list')
 
 
+def health_check_cache_key(user_id):
+    """
+    Cache key of a user's account health check. Keys carry a version that
+    invalidate_health_check_cache bumps, dropping every user's entry at once.
+
+    The version is a CacheVersion row, so bumps made by the workers and
+    management commands reach the web server's local cache.
+    """
+    version = CacheVersion.objects.filter(
+        key=HEALTH_CHECK_VERSION_KEY).values_list('version', flat=True).first()
+    return f'health_check_user_{user_id}_v{version or 0}'
+
+
+def _bump_health_check_version():
+    try:
+        bumped = CacheVersion.objects.filter(key=HEALTH_CHECK_VERSION_KEY).update(
+            version=F('version') + 1)
+        if not bumped:
+            CacheVersion.objects.get_or_create(key=HEALTH_CHECK_VERSION_KEY)
+    except DatabaseError as e:
+        # Runs after the write committed; a stale health check must not fail it
+        print(f"⚠️ Could not invalidate the health check cache: {e}")
+
+
+def invalidate_health_check_cache():
+    """Invalidate account health checks once the current transaction commits"""
+    transaction.on_commit(_bump_health_check_version)
+
+
 def invalidate_all_caches():
     """Invalidate all application caches"""
     invalidate_dashboard_cache()
     invalidate_posts_cache()
     invalidate_accounts_cache()
+    _bump_health_check_version()
@@ -38,6 +38,12 @@ class MarketplacePostForm(forms.Form):
         }),
         help_text='Or provide an image URL (optional)'
     )
+    auto_post = forms.BooleanField(
+        label='Post automatically',
+        help_text='Publish the posts as soon as they are created, without Start Posting',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -67,3 +73,9 @@ class BulkPostUploadForm(forms.Form):
         help_text='Upload a CSV file with columns: title, description, price, image_url (optional)',
         widget=forms.FileInput(attrs={'accept': '.csv'})
     )
+    auto_post = forms.BooleanField(
+        label='Post automatically',
+        help_text='Publish the posts as soon as they are created, without Start Posting',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
@@ -0,0 +1,154 @@
+"""
+Concurrent image downloads for the CSV bulk uploads.
+
+All image URLs of an upload are fetched in parallel before any post is
+inserted, through one shared requests.Session (so connections are reused)
+with a bounded thread pool, a per-host concurrency limit, retries with
+exponential backoff for transient failures and a cap on the size of each
+image. Responses that declare a non-image Content-Type (an HTML error or
+login page, say) are rejected. Limits come from settings.IMAGE_FETCH.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+import os
+import requests
+import threading
+import time
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Served by some storage buckets and CDNs for any file
+GENERIC_CONTENT_TYPES = {'application/octet-stream', 'binary/octet-stream'}
+
+
+def get_fetch_config():
+    config = {
+        'WORKERS': 8,                    # Downloads in flight in total
+        'PER_HOST': 4,                   # Downloads in flight per host
+        'TIMEOUT': 10,                   # Seconds per request
+        'RETRIES': 2,                    # Extra attempts for transient errors
+        'BACKOFF': 0.5,                  # Seconds, doubled on every retry
+        'MAX_BYTES': 10 * 1024 * 1024,   # Largest image accepted
+    }
+    config.update(getattr(settings, 'IMAGE_FETCH', {}))
+    return config
+
+
+class ImageRejected(Exception):
+    pass
+
+
+class ImageTooLarge(ImageRejected):
+    pass
+
+
+def filename_from_url(url):
+    """The file name in a URL's path, or None if it has no extension"""
+    filename = os.path.basename(urlparse(url).path)
+    if not filename or '.' not in filename:
+        return None
+    return filename
+
+
+class ImageFetcher:
+    """Download many image URLs concurrently with per-host limits"""
+
+    def __init__(self, **overrides):
+        self.config = get_fetch_config()
+        self.config.update(overrides)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.config['WORKERS'],
+                              pool_maxsize=self.config['WORKERS'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_slots = defaultdict(
+            lambda: threading.BoundedSemaphore(self.config['PER_HOST']))
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _slot_for(self, url):
+        with self._lock:
+            return self._host_slots[urlparse(url).netloc]
+
+    def fetch(self, url):
+        """
+        Download one image.
+
+        Returns (content, error): the bytes and None on success, or None and
+        an error message.
+        """
+        attempts = self.config['RETRIES'] + 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                with self._slot_for(url):
+                    status_code, content = self._get(url)
+            except ImageRejected as e:
+                return None, str(e)
+            except requests.exceptions.RequestException as e:
+                if last_attempt:
+                    return None, f"Error downloading image - {str(e)}"
+            else:
+                if status_code == 200:
+                    return content, None
+                if last_attempt or status_code not in RETRY_STATUS_CODES:
+                    return None, f"Failed to download image (HTTP {status_code})"
+
+            time.sleep(self.config['BACKOFF'] * 2 ** attempt)
+
+    def _get(self, url):
+        max_bytes = self.config['MAX_BYTES']
+        with self.session.get(url, timeout=self.config['TIMEOUT'],
+                              stream=True) as response:
+            if response.status_code != 200:
+                return response.status_code, None
+
+            content_type = response.headers.get('Content-Type', '')
+            mime_type = content_type.split(';')[0].strip().lower()
+            if (mime_type and not mime_type.startswith('image/')
+                    and mime_type not in GENERIC_CONTENT_TYPES):
+                raise ImageRejected(f"URL did not return an image ({mime_type})")
+
+            declared = response.headers.get('Content-Length')
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ImageTooLarge(
+                    f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLarge(
+                        f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+                chunks.append(chunk)
+            return response.status_code, b''.join(chunks)
+
+    def fetch_all(self, urls):
+        """Download every distinct URL; returns {url: (content, error)}"""
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        if not unique_urls:
+            return {}
+
+        workers = min(self.config['WORKERS'], len(unique_urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(self.fetch, unique_urls)
+            return dict(zip(unique_urls, results))
+
+
+def fetch_images(urls, **overrides):
+    """Download a batch of image URLs concurrently; see ImageFetcher.fetch_all"""
+    with ImageFetcher(**overrides) as fetcher:
+        return fetcher.fetch_all(urls)
@@ -0,0 +1,128 @@
+"""
+Marketplace-sized derivatives of post images.
+
+Uploaded and downloaded images are stored as they arrive, which for phone
+photos means several megabytes of pixels and EXIF data (including GPS
+coordinates) that Facebook only scales down again. Before a post is
+published the engine asks for an optimized derivative instead: rotated
+upright, scaled to IMAGE_OPTIMIZATION['MAX_DIMENSION'], recompressed and
+stripped of metadata.
+
+Derivatives are cached on disk by the SHA-256 of the original plus the
+settings used, so an image shared by many posts is processed once, and
+postings.signals removes them together with the original.
+"""
+from django.conf import settings
+from django.core.files import File
+from PIL import Image, ImageOps
+from .storage import content_hash
+import glob
+import os
+import re
+import tempfile
+
+DERIVATIVES_DIR = 'optimized'
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp'}
+HASH_NAME = re.compile(r'^[0-9a-f]{64}$')
+
+
+def get_optimization_config():
+    config = {
+        'ENABLED': True,
+        'MAX_DIMENSION': 2048,   # Longest side in pixels
+        'FORMAT': 'JPEG',        # JPEG or WEBP
+        'QUALITY': 85,
+    }
+    config.update(getattr(settings, 'IMAGE_OPTIMIZATION', {}))
+    return config
+
+
+def derivatives_root():
+    return os.path.join(settings.MEDIA_ROOT, DERIVATIVES_DIR)
+
+
+def image_digest(source_path):
+    """
+    The SHA-256 of an image file.
+
+    Files from the content-addressed storage are already named after it.
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    if HASH_NAME.match(stem):
+        return stem
+    with open(source_path, 'rb') as source:
+        return content_hash(File(source))
+
+
+def derivative_path(digest, config):
+    """Where the derivative of an image with these settings is cached"""
+    name = f"{digest}-{config['MAX_DIMENSION']}-q{config['QUALITY']}" \
+        f"{EXTENSIONS[config['FORMAT']]}"
+    return os.path.join(derivatives_root(), digest[:2], name)
+
+
+def render_derivative(source_path, target_path, config):
+    """Write the marketplace-optimized version of source_path to target_path"""
+    with Image.open(source_path) as image:
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        max_dimension = config['MAX_DIMENSION']
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Written next to the target and renamed, so concurrent workers
+        # never upload a half-written file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path),
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                # No exif/icc arguments: the derivative carries no metadata
+                if config['FORMAT'] == 'WEBP':
+                    image.save(target, 'WEBP', quality=config['QUALITY'],
+                               method=6)
+                else:
+                    image.save(target, 'JPEG', quality=config['QUALITY'],
+                               optimize=True, progressive=True)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def optimized_image_path(source_path, config=None):
+    """
+    Path of the file to upload for an image: its cached derivative, created
+    on first use, or the original when optimization is disabled or fails.
+    """
+    config = config or get_optimization_config()
+    if not config['ENABLED']:
+        return source_path
+
+    try:
+        target_path = derivative_path(image_digest(source_path), config)
+        if not os.path.exists(target_path):
+            render_derivative(source_path, target_path, config)
+            saved = os.path.getsize(source_path) - os.path.getsize(target_path)
+            print(f"🖼️ Optimized image {os.path.basename(source_path)} "
+                  f"({saved / 1024:+.0f} KB saved)")
+        return target_path
+    except (OSError, Image.DecompressionBombError) as e:
+        print(f"⚠️ Could not optimize {source_path}, uploading the original: {str(e)}")
+        return source_path
+
+
+def delete_derivatives(image_name):
+    """Remove every cached derivative of a stored image"""
+    digest = os.path.splitext(os.path.basename(image_name))[0]
+    if not HASH_NAME.match(digest):
+        return
+    for path in glob.glob(os.path.join(derivatives_root(), digest[:2], f"{digest}-*")):
+        os.remove(path)
@@ -0,0 +1,346 @@
+"""
+Background bulk uploads.
+
+The bulk upload endpoints only validate the request, store the uploaded
+files and enqueue an ImportJob. The run_import_worker command then parses
+the file, downloads images and creates the posts chunk by chunk, saving
+progress and per-row errors on the job and publishing them to the
+progress channel after every chunk.
+
+The source file is decoded incrementally from its storage chunks and the
+parsers are generators, so only one chunk of rows is held in memory no
+matter how large the upload is.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import FacebookAccount
+from .bulk import create_posts_for_accounts
+from .cache_utils import invalidate_dashboard_cache, invalidate_posts_cache
+from .image_fetcher import ImageFetcher, filename_from_url
+from .models import ImportJob
+from .progress_channel import publish_import
+import codecs
+import csv
+import itertools
+import os
+import uuid
+
+MAX_STORED_ERRORS = 100
+
+
+def get_chunk_rows():
+    """Products parsed, downloaded and inserted per progress update"""
+    return getattr(settings, 'IMPORT_CHUNK_ROWS', 100)
+
+
+def enqueue_import(user, kind, source_file, account_ids, image_files=(),
+                   auto_post=False):
+    """Store the uploaded files and queue an ImportJob for them"""
+    job_id = str(uuid.uuid4())
+    stored_images = [
+        default_storage.save(f"imports/{job_id}_{index:05d}_{image.name}", image)
+        for index, image in enumerate(image_files)
+    ]
+    return ImportJob.objects.create(
+        job_id=job_id,
+        user=user if user is not None and user.is_authenticated else None,
+        kind=kind,
+        source_file=File(source_file, name=f"{job_id}_{source_file.name}"),
+        image_files=stored_images,
+        account_ids=[int(account_id) for account_id in account_ids],
+        auto_post=auto_post,
+    )
+
+
+class LineReader:
+    """
+    Iterate over the lines of a binary file, decoding it chunk by chunk.
+
+    Lines keep their line endings (csv needs them for quoted newlines);
+    bytes_read tells how far into the file the reader has got.
+    """
+
+    def __init__(self, file, encoding='utf-8-sig'):
+        self.file = file
+        self.encoding = encoding
+        self.bytes_read = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        pending = ''
+        for chunk in self.file.chunks():
+            self.bytes_read += len(chunk)
+            lines = (pending + decoder.decode(chunk)).splitlines(keepends=True)
+            # Hold back the last line until it is complete; a trailing '\r'
+            # may still be followed by the '\n' of the next chunk
+            pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+            yield from lines
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+
+def parse_csv(lines):
+    """
+    Validate the rows of a bulk upload CSV, given as an iterable of lines.
+
+    Yields (post_data, error) pairs; exactly one of them is set.
+    """
+    csv_reader = csv.DictReader(lines)
+    for row_num, row in enumerate(csv_reader, start=2):
+        try:
+            # Extract data from CSV
+            title = (row.get('title') or '').strip()
+            description = (row.get('description') or '').strip()
+            price = (row.get('price') or '').strip()
+            image_url = (row.get('image_url') or '').strip()
+
+            # Validate required fields
+            if not all([title, description, price]):
+                yield None, {
+                    'row': row_num,
+                    'error': 'Missing required fields (title, description, or price)'
+                }
+                continue
+
+            # Validate price
+            try:
+                price_decimal = float(price)
+                if price_decimal < 0:
+                    raise ValueError("Price cannot be negative")
+            except ValueError as e:
+                yield None, {
+                    'row': row_num,
+                    'error': f"Invalid price '{price}' - {str(e)}"
+                }
+                continue
+
+            yield {
+                'row': row_num,
+                'title': title,
+                'description': description,
+                'price': price_decimal,
+                'image_url': image_url,
+                'image_file': None
+            }, None
+
+        except Exception as e:
+            yield None, {
+                'row': row_num,
+                'error': f'Unexpected error - {str(e)}'
+            }
+
+
+def parse_txt(lines, image_files):
+    """
+    Validate the products of a bulk upload TXT file, given as an iterable of
+    lines.
+
+    Each product is 3 lines (title, description, price) followed by a blank
+    line; the Nth stored image name belongs to the Nth product. Yields
+    (post_data, error) pairs like parse_csv.
+    """
+    product_index = 0
+    product = []
+    skip_separator = False
+    for line_num, line in enumerate(lines, start=1):
+        if skip_separator:
+            skip_separator = False
+            continue
+
+        # Skip empty lines at the start
+        if not product and not line.strip():
+            continue
+
+        # Collect 3 lines for one product
+        product.append(line.strip())
+        if len(product) == 1:
+            first_line = line_num
+        if len(product) < 3:
+            continue
+
+        title, description, price_str = product
+        product = []
+        skip_separator = True  # The blank line after the product
+        image_file = None
+        if product_index < len(image_files):
+            image_file = image_files[product_index]
+        product_index += 1
+
+        # Validate required fields
+        if not all([title, description, price_str]):
+            yield None, {'line': first_line, 'error': 'Missing required fields'}
+            continue
+
+        # Validate price
+        try:
+            price_decimal = float(price_str)
+            if price_decimal < 0:
+                raise ValueError("Price cannot be negative")
+        except ValueError:
+            yield None, {'line': line_num, 'error': f"Invalid price: {price_str}"}
+            continue
+
+        yield {
+            'line': first_line,
+            'title': title,
+            'description': description,
+            'price': price_decimal,
+            'image_file': image_file
+        }, None
+
+    if product:
+        yield None, {
+            'line': first_line,
+            'error': 'Incomplete product data (need 3 lines: title, description, price)'
+        }
+
+
+class ImportRunner:
+    """Process one claimed ImportJob"""
+
+    def __init__(self, import_job, chunk_rows=None):
+        self.import_job = import_job
+        self.chunk_rows = chunk_rows or get_chunk_rows()
+        self.fetcher = None
+        self.reader = None
+
+    def run(self):
+        job = self.import_job
+        accounts = FacebookAccount.objects.filter(id__in=job.account_ids)
+        if job.user_id:
+            accounts = accounts.filter(user_id=job.user_id)
+        accounts = list(accounts)
+        if not accounts:
+            raise Exception('No valid accounts found')
+
+        job.total_bytes = job.source_file.size
+        try:
+            with job.source_file.open('rb') as source:
+                self.reader = LineReader(source)
+                if job.kind == 'csv':
+                    self.fetcher = ImageFetcher()
+                    rows = parse_csv(self.reader)
+                else:
+                    rows = parse_txt(self.reader, job.image_files)
+                if job.processed_rows:
+                    # Reclaimed from a stopped worker: its chunks are saved
+                    print(f"Resuming import {job.job_id} after row {job.processed_rows}")
+                    rows = itertools.islice(rows, job.processed_rows, None)
+
+                while True:
+                    chunk = list(itertools.islice(rows, self.chunk_rows))
+                    if not chunk:
+                        break
+                    self.process_chunk(chunk, accounts)
+                job.processed_bytes = self.reader.bytes_read
+        finally:
+            if self.fetcher is not None:
+                self.fetcher.close()
+
+        invalidate_dashboard_cache()
+        invalidate_posts_cache()
+
+    def process_chunk(self, rows, accounts):
+        job = self.import_job
+        posts_data = []
+        for post_data, error in rows:
+            if error:
+                self.add_error(error)
+            else:
+                posts_data.append(post_data)
+
+        if self.fetcher is not None:
+            self.download_images(posts_data)
+
+        # The posts and the progress that counts them commit together, so a
+        # reclaimed job resumes after exactly the rows already imported
+        with transaction.atomic():
+            if self.fetcher is not None:
+                job.created_posts += create_posts_for_accounts(
+                    posts_data, accounts, auto_post=job.auto_post)
+            else:
+                job.created_posts += self.create_with_uploaded_images(
+                    posts_data, accounts)
+            job.processed_rows += len(rows)
+            # The total is only known once the whole file has been read
+            job.total_rows = job.processed_rows
+            job.processed_bytes = self.reader.bytes_read
+            # Doubles as the worker's heartbeat (JobQueueQuerySet.claim_next)
+            job.claimed_at = timezone.now()
+            job.save(update_fields=['total_bytes', 'processed_bytes', 'total_rows',
+                                    'processed_rows', 'created_posts',
+                                    'error_count', 'errors', 'claimed_at'])
+        publish_import(job)
+
+    def download_images(self, posts_data):
+        """Download the chunk's image URLs concurrently"""
+        images = self.fetcher.fetch_all(
+            post_data['image_url'] for post_data in posts_data)
+        for post_data in posts_data:
+            if not post_data['image_url']:
+                continue
+            content, error = images[post_data['image_url']]
+            if error:
+                # The post is still created, just without an image
+                self.record_error({'row': post_data['row'], 'error': error})
+                continue
+            filename = filename_from_url(post_data['image_url']) or \
+                f"{post_data['title'][:30].replace(' ', '_')}.jpg"
+            post_data['image_file'] = ContentFile(content, name=filename)
+
+    def create_with_uploaded_images(self, posts_data, accounts):
+        """Open the chunk's stored images (TXT uploads) only while inserting"""
+        opened = []
+        try:
+            for post_data in posts_data:
+                name = post_data['image_file']
+                if name:
+                    post_data['image_file'] = File(
+                        default_storage.open(name), name=os.path.basename(name))
+                    opened.append(post_data['image_file'])
+            return create_posts_for_accounts(
+                posts_data, accounts, auto_post=self.import_job.auto_post)
+        finally:
+            for image_file in opened:
+                image_file.close()
+
+    def add_error(self, error):
+        self.import_job.error_count += 1
+        self.record_error(error)
+
+    def record_error(self, error):
+        if len(self.import_job.errors) < MAX_STORED_ERRORS:
+            self.import_job.errors.append(error)
+
+
+def run_import_job(import_job):
+    """Run a claimed ImportJob to completion and record its final state"""
+    import_job.status = 'running'
+    publish_import(import_job)
+    try:
+        ImportRunner(import_job).run()
+        import_job.status = 'completed'
+    except Exception as e:
+        import_job.status = 'failed'
+        import_job.error_message = str(e)
+    finally:
+        import_job.completed_at = timezone.now()
+        import_job.save(update_fields=[
+            'status', 'total_bytes', 'processed_bytes', 'total_rows',
+            'processed_rows', 'created_posts',
+            'error_count', 'errors', 'error_message', 'completed_at'])
+        publish_import(import_job)
+        delete_import_files(import_job)
+    return import_job
+
+
+def delete_import_files(import_job):
+    """The uploaded files are only needed until the import has run"""
+    for name in import_job.image_files:
+        default_storage.delete(name)
+    if import_job.source_file:
+        import_job.source_file.delete(save=False)
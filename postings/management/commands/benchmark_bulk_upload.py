@@ -0,0 +1,97 @@
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from accounts.models import CustomUser, FacebookAccount
+from postings.bulk import create_posts_for_accounts
+from postings.models import MarketplacePost
+import tempfile
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row post creation with the bulk_create pipeline (rows/sec); writes nothing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=200,
+            help='Number of products in the simulated upload',
+            dest='products'
+        )
+        parser.add_argument(
+            '--accounts',
+            type=int,
+            default=10,
+            help='Number of accounts each product is created for',
+            dest='accounts'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows per bulk_create batch (default: BULK_UPLOAD_BATCH_SIZE)',
+            dest='batch_size'
+        )
+
+    def handle(self, *args, **options):
+        products = options['products']
+        rows = products * options['accounts']
+        print(f"📊 Creating {rows} posts ({products} products × {options['accounts']} accounts)")
+
+        # Images go to a throwaway media root and every insert is rolled back
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            per_row = self.measure(self.create_per_row, options)
+            bulk = self.measure(self.create_bulk, options)
+
+        print(f"Per-row create: {per_row:.2f}s ({rows / per_row:.0f} rows/sec)")
+        print(f"Bulk pipeline:  {bulk:.2f}s ({rows / bulk:.0f} rows/sec)")
+        print(f"✅ {per_row / bulk:.1f}x faster")
+
+    def measure(self, create, options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create(username='bulk-benchmark')
+                accounts = FacebookAccount.objects.bulk_create([
+                    FacebookAccount(user=user, email=f"bench{i}@example.com")
+                    for i in range(options['accounts'])
+                ])
+                posts_data = [{
+                    'title': f"Benchmark product {i}",
+                    'description': 'Benchmark description',
+                    'price': 10,
+                    'image_file': ContentFile(b'\x89PNG' + bytes(2048), name=f"product{i}.png"),
+                } for i in range(options['products'])]
+
+                started = time.perf_counter()
+                create(posts_data, accounts, options)
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            return elapsed
+
+    def create_per_row(self, posts_data, accounts, options):
+        """The previous upload loop: one INSERT plus one image save and UPDATE per row"""
+        for post_data in posts_data:
+            for account in accounts:
+                post = MarketplacePost.objects.create(
+                    account=account,
+                    title=post_data['title'],
+                    description=post_data['description'],
+                    price=post_data['price'],
+                    scheduled_time=timezone.now(),
+                    posted=False
+                )
+                post_data['image_file'].seek(0)
+                post.image.save(post_data['image_file'].name,
+                                post_data['image_file'], save=True)
+
+    def create_bulk(self, posts_data, accounts, options):
+        create_posts_for_accounts(posts_data, accounts,
+                                  batch_size=options.get('batch_size'))
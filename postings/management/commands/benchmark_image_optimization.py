@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image
+from postings.image_optimizer import get_optimization_config, optimized_image_path
+import glob
+import os
+import random
+import tempfile
+import time
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes saved and upload time reduced by the image optimization; writes nothing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--images',
+            help='Directory of real photos to use instead of generated phone-sized ones',
+            dest='images'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10,
+            help='Number of photos to generate when --images is not given',
+            dest='count'
+        )
+        parser.add_argument(
+            '--uplink-mbps',
+            type=float,
+            default=10.0,
+            help='Upload bandwidth used to estimate the upload time of each file',
+            dest='uplink_mbps'
+        )
+
+    def handle(self, *args, **options):
+        config = get_optimization_config()
+        config['ENABLED'] = True
+        bytes_per_second = options['uplink_mbps'] * 1000 * 1000 / 8
+
+        # Derivatives go to a throwaway media root
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            if options.get('images'):
+                sources = sorted(
+                    path for path in glob.glob(os.path.join(options['images'], '*'))
+                    if os.path.isfile(path))
+            else:
+                sources = self.generate_photos(media_root, options['count'])
+            if not sources:
+                print("❌ No images to benchmark")
+                return
+
+            print(f"📊 Optimizing {len(sources)} images "
+                  f"(max {config['MAX_DIMENSION']}px, {config['FORMAT']} q{config['QUALITY']})")
+
+            original_bytes = optimized_bytes = 0
+            started = time.perf_counter()
+            for source in sources:
+                derivative = optimized_image_path(source, config)
+                original_bytes += os.path.getsize(source)
+                optimized_bytes += os.path.getsize(derivative)
+            first_pass = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for source in sources:
+                optimized_image_path(source, config)
+            cached_pass = time.perf_counter() - started
+
+        count = len(sources)
+        print(f"Original:  {original_bytes / 1024 / 1024:.1f} MB "
+              f"({original_bytes / count / 1024:.0f} KB per image)")
+        print(f"Optimized: {optimized_bytes / 1024 / 1024:.1f} MB "
+              f"({optimized_bytes / count / 1024:.0f} KB per image)")
+        print(f"✅ {100 * (1 - optimized_bytes / original_bytes):.0f}% fewer bytes")
+        print(f"Processing: {first_pass / count * 1000:.0f} ms per image, "
+              f"{cached_pass / count * 1000:.2f} ms when cached")
+        print(f"Estimated upload at {options['uplink_mbps']:g} Mbps: "
+              f"{original_bytes / count / bytes_per_second:.2f}s -> "
+              f"{optimized_bytes / count / bytes_per_second:.2f}s per image")
+
+    def generate_photos(self, directory, count):
+        """12 MP JPEGs at camera quality with EXIF, like phone uploads"""
+        paths = []
+        width, height = 4032, 3024
+        for i in range(count):
+            rng = random.Random(i)
+            gradient = Image.linear_gradient('L').resize((width, height))
+            noise = Image.effect_noise((width, height), rng.randint(20, 40))
+            photo = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.FLIP_TOP_BOTTOM)))
+            exif = Image.Exif()
+            exif[0x010F] = 'Phone maker'  # Make
+            exif[0x0112] = 1              # Orientation
+            path = os.path.join(directory, f"photo{i}.jpg")
+            photo.save(path, 'JPEG', quality=95, exif=exif)
+            paths.append(path)
+        return paths
@@ -1,12 +1,8 @@
 from django.core.management.base import BaseCommand
-from postings.models import MarketplacePost, PostingJob, ErrorLog
-from automation.post_to_facebook import login_and_post
-from django.utils import timezone
-from django.db.models import QuerySet, Manager
-from django.core.files.base import ContentFile
-import os
+from postings.models import MarketplacePost, PostingJob
+from postings.posting_engine import pending_posts, run_posting_job
+from django.db.models import QuerySet
 import uuid
-import traceback
 
 
 class Command(BaseCommand):
@@ -26,6 +22,26 @@ class Command(BaseCommand):
             help='Job ID for tracking progress',
             dest='job_id'
         )
+        parser.add_argument(
+            '--no-browser-pool',
+            action='store_true',
+            help='Launch a fresh browser for every post instead of reusing pooled contexts',
+            dest='no_browser_pool'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of accounts to post for in parallel (each worker runs its own browser)',
+            dest='workers'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['sync', 'async'],
+            default='sync',
+            help='sync: one browser per worker thread; async: one event loop and browser shared by all workers',
+            dest='engine'
+        )
 
     def handle(self, *args, **options):
         print("Checking for posts to publish...")
@@ -34,26 +50,19 @@ class Command(BaseCommand):
         post_ids_str = options.get('post_ids')
         job_id = options.get('job_id') or str(uuid.uuid4())
 
+        post_ids = None
         if post_ids_str:
             # Parse comma-separated post IDs
             try:
                 post_ids = [int(id.strip()) for id in post_ids_str.split(',')]
                 print(f"Publishing specific posts: {post_ids}")
-
-                # Get posts with specific IDs that haven't been posted
-                posts: QuerySet[MarketplacePost] = MarketplacePost.objects.filter(
-                    id__in=post_ids,
-                    posted=False
-                )
             except ValueError:
                 print(f"Error: Invalid post IDs format: {post_ids_str}")
                 return
-        else:
-            # Get all posts that are scheduled for now or earlier and haven't been posted
-            posts: QuerySet[MarketplacePost] = MarketplacePost.objects.filter(
-                scheduled_time__lte=timezone.now(),
-                posted=False
-            )
+
+        # Posts with the given IDs, or all posts scheduled for now or earlier,
+        # that haven't been posted
+        posts: QuerySet[MarketplacePost] = pending_posts(post_ids)
 
         total_posts = posts.count()
         print(f"Found {total_posts} posts to publish")
@@ -74,90 +83,24 @@ class Command(BaseCommand):
             failed_posts=0
         )
 
-        completed = 0
-        failed = 0
-
-        for post in posts:
-            try:
-                print(f"\nProcessing post: {post.title}")
-
-                # Update job status
-                posting_job.current_post_id = post.id
-                posting_job.current_post_title = post.title
-                posting_job.save()
-
-                # Update post status to 'posting'
-                post.status = 'posting'
-                post.save()
-
-                # Get the absolute path of the image
-                image_path = os.path.abspath(post.image.path)
-                print(f"Image path: {image_path}")
-
-                # Post to Facebook
-                login_and_post(
-                    email=post.account.email,
-                    title=post.title,
-                    description=post.description,
-                    price=float(post.price),
-                    image_path=image_path
-                )
-
-                # Mark as posted
-                post.posted = True
-                post.status = 'posted'
-                post.save()
-
-                completed += 1
-                posting_job.completed_posts = completed
-                posting_job.save()
-
-                print(
-                    f'✓ Successfully posted "{post.title}" to {post.account.email}')
-
-            except Exception as e:
-                print(
-                    f'✗ Failed to post "{post.title}" to {post.account.email}: {str(e)}')
-
-                # Update post status
-                post.status = 'failed'
-                post.error_message = str(e)
-                post.retry_count += 1
-                post.save()
-
-                # Determine error type
-                error_type = 'unknown'
-                error_str = str(e).lower()
-                if 'session' in error_str or 'cookie' in error_str or 'login' in error_str:
-                    error_type = 'session_expired'
-                elif 'network' in error_str or 'connection' in error_str:
-                    error_type = 'network_error'
-                elif 'captcha' in error_str:
-                    error_type = 'captcha'
-                elif 'rate' in error_str or 'limit' in error_str:
-                    error_type = 'rate_limit'
-
-                # Log detailed error
-                ErrorLog.objects.create(
-                    post=post,
-                    error_type=error_type,
-                    error_message=str(e),
-                    stack_trace=traceback.format_exc()
-                )
-
-                failed += 1
-                posting_job.failed_posts = failed
-                posting_job.save()
-
-        # Mark job as complete
-        posting_job.status = 'completed' if failed == 0 else 'failed'
-        posting_job.completed_at = timezone.now()
-        posting_job.error_message = f"{failed} posts failed" if failed > 0 else None
-        posting_job.save()
+        # Shard posts by account and publish them with the requested workers
+        engine = run_posting_job(
+            posting_job,
+            posts,
+            workers=options.get('workers') or 1,
+            engine=options.get('engine'),
+            use_browser_pool=not options.get('no_browser_pool')
+        )
+        completed, failed = engine.completed, engine.failed
 
         print(f"\n{'='*50}")
         print(f"Posting completed!")
         print(
             f"Total: {total_posts} | Successful: {completed} | Failed: {failed}")
+        print(
+            f"Progress write transactions: {engine.progress.write_transactions}")
+        average_timings = engine.average_step_timings()
+        if average_timings:
+            print(f"Average seconds per step: {average_timings}")
         print(f"Job ID: {job_id}")
         print(f"{'='*50}\n")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from postings.imports import run_import_job
+from postings.models import ImportJob
+import os
+import socket
+import time
+
+
+class Command(BaseCommand):
+    help = 'Resident worker that claims queued bulk upload jobs and creates their posts'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait before checking the queue again when it is empty',
+            dest='poll_interval'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit as soon as the queue is empty instead of waiting for new jobs',
+            dest='once'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        print(f"📥 Import worker {worker_id} started. Waiting for uploads...")
+
+        try:
+            while True:
+                close_old_connections()
+                job = ImportJob.objects.claim_next(worker_id)
+
+                if job is None:
+                    if options.get('once'):
+                        break
+                    time.sleep(options.get('poll_interval'))
+                    continue
+
+                print(f"\n{'='*50}")
+                print(f"Claimed import {job.job_id} ({job.kind})")
+                run_import_job(job)
+                if job.status == 'completed':
+                    print(
+                        f"✓ Import {job.job_id} finished | Posts created: {job.created_posts} | Row errors: {job.error_count}")
+                else:
+                    print(f"✗ Import {job.job_id} failed: {job.error_message}")
+        except KeyboardInterrupt:
+            pass
+
+        print(f"📥 Import worker {worker_id} stopped")
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from postings.scheduler import dispatch_due_posts, get_dispatch_config, next_due_time
+import time
+
+
+class Command(BaseCommand):
+    help = 'Resident scheduler that queues posts for the posting workers when their scheduled_time comes'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Posts per queued posting job (default: SCHEDULED_DISPATCH BATCH_SIZE)',
+            dest='batch_size'
+        )
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            help='Longest wait between checks, so newly scheduled posts are noticed '
+                 '(default: SCHEDULED_DISPATCH MAX_SLEEP_SECONDS)',
+            dest='max_sleep'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Queue the posts that are due now and exit',
+            dest='once'
+        )
+
+    def handle(self, *args, **options):
+        config = get_dispatch_config()
+        max_sleep = options.get('max_sleep') or config['MAX_SLEEP_SECONDS']
+        print("📅 Post scheduler started. Waiting for scheduled posts...")
+
+        announced = None
+        try:
+            while True:
+                close_old_connections()
+                dispatch_due_posts(options.get('batch_size'))
+                if options.get('once'):
+                    break
+
+                # Sleep until the next post is due, but wake up regularly
+                # for posts scheduled earlier in the meantime
+                next_due = next_due_time()
+                if next_due is None:
+                    delay = max_sleep
+                else:
+                    delay = (next_due - timezone.now()).total_seconds()
+                    delay = min(max(delay, 0), max_sleep)
+                    if next_due != announced:
+                        print(f"Next post due at {timezone.localtime(next_due):%Y-%m-%d %H:%M:%S}")
+                        announced = next_due
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            pass
+
+        print("📅 Post scheduler stopped")
@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from postings.models import PostingJob
+from postings.posting_engine import pending_posts, run_posting_job
+from postings.progress_channel import publish_job
+import os
+import socket
+import time
+
+
+class Command(BaseCommand):
+    help = 'Resident worker that claims queued posting jobs and publishes them'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of accounts to post for in parallel within a job',
+            dest='workers'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['sync', 'async'],
+            default='sync',
+            help='sync: one browser per worker thread; async: one event loop and browser shared by all workers',
+            dest='engine'
+        )
+        parser.add_argument(
+            '--no-browser-pool',
+            action='store_true',
+            help='Launch a fresh browser for every post instead of reusing pooled contexts',
+            dest='no_browser_pool'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait before checking the queue again when it is empty',
+            dest='poll_interval'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit as soon as the queue is empty instead of waiting for new jobs',
+            dest='once'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        print(f"👷 Posting worker {worker_id} started. Waiting for jobs...")
+
+        try:
+            while True:
+                close_old_connections()
+                job = PostingJob.objects.claim_next(worker_id)
+
+                if job is None:
+                    if options.get('once'):
+                        break
+                    time.sleep(options.get('poll_interval'))
+                    continue
+
+                self.process_job(job, options)
+        except KeyboardInterrupt:
+            pass
+
+        print(f"👷 Posting worker {worker_id} stopped")
+
+    def process_job(self, job, options):
+        """Publish the posts of one claimed job"""
+        print(f"\n{'='*50}")
+        print(f"Claimed job {job.job_id}")
+
+        # Posts may have been published by an earlier job since this one
+        # was queued; pending_posts only returns those still unposted.
+        posts = pending_posts(job.post_ids)
+        total_posts = posts.count()
+
+        if total_posts == 0:
+            job.status = 'completed'
+            job.total_posts = 0
+            job.completed_at = timezone.now()
+            job.save(update_fields=['status', 'total_posts', 'completed_at'])
+            publish_job(job)
+            print("No pending posts left for this job")
+            return
+
+        try:
+            engine = run_posting_job(
+                job,
+                posts,
+                workers=options.get('workers') or 1,
+                engine=options.get('engine'),
+                use_browser_pool=not options.get('no_browser_pool')
+            )
+            print(
+                f"Job {job.job_id} finished | Successful: {engine.completed} | Failed: {engine.failed}")
+        except Exception as e:
+            print(f"✗ Job {job.job_id} crashed: {str(e)}")
+            job.status = 'failed'
+            job.completed_at = timezone.now()
+            job.error_message = str(e)
+            job.save(update_fields=['status', 'completed_at', 'error_message'])
+            publish_job(job)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postingjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postingjob',
+            name='post_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='postingjob',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='postingjob',
+            index=models.Index(fields=['status', 'started_at'], name='job_status_started_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_encrypt_existing_passwords'),
+        ('postings', '0002_posting_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplacepost',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='marketplacepost',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(fields=['status', 'claim_expires_at'], name='status_claim_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_encrypt_existing_passwords'),
+        ('postings', '0003_post_claims'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(fields=['-created_at', 'id'], name='created_id_idx'),
+        ),
+    ]
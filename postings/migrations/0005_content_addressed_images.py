@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:22
+
+import postings.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_facebookaccount_has_session'),
+        ('postings', '0004_post_list_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='marketplacepost',
+            name='image',
+            field=models.ImageField(blank=True, storage=postings.storage.ContentAddressedStorage(), upload_to='posts/'),
+        ),
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(fields=['image'], name='image_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_facebookaccount_has_session'),
+        ('postings', '0007_import_job_bytes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplacepost',
+            name='posted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(fields=['account', 'posted_at'], name='account_posted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_facebookaccount_has_session'),
+        ('postings', '0008_post_posted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketplacepost',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(fields=['status', 'dispatched_at', 'scheduled_time'], name='dispatch_due_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0009_post_dispatched_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='marketplacepost',
+            name='dispatch_due_idx',
+        ),
+        migrations.AddField(
+            model_name='marketplacepost',
+            name='auto_post',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='marketplacepost',
+            index=models.Index(condition=models.Q(('auto_post', True)), fields=['status', 'dispatched_at', 'scheduled_time'], name='dispatch_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0011_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='auto_post',
+            field=models.BooleanField(default=False),
+        ),
+    ]
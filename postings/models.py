@@ -1,5 +1,58 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
 from accounts.models import FacebookAccount
+from .storage import ContentAddressedStorage
+
+
+def get_claim_lease():
+    return timedelta(seconds=getattr(settings, 'POSTING_CLAIM_LEASE_SECONDS', 900))
+
+
+def get_job_claim_timeout():
+    return timedelta(seconds=getattr(settings, 'JOB_CLAIM_TIMEOUT_SECONDS', 960))
+
+
+class MarketplacePostQuerySet(models.QuerySet):
+    def claimable(self, now=None):
+        """
+        Unposted posts no worker currently holds: pending or failed posts,
+        plus 'posting' posts whose lease expired (their worker crashed).
+        """
+        now = now or timezone.now()
+        return self.filter(posted=False).filter(
+            Q(status__in=['pending', 'failed']) |
+            Q(status='posting', claim_expires_at__lt=now) |
+            Q(status='posting', claim_expires_at__isnull=True)
+        )
+
+    def claim_batch(self, owner, limit=None):
+        """
+        Atomically move claimable posts from this queryset to 'posting'.
+
+        A single conditional UPDATE sets the lease owner and expiry, so two
+        workers racing for the same rows can never both win. Returns the
+        posts this owner now holds.
+        """
+        now = timezone.now()
+        expires_at = now + get_claim_lease()
+        candidates = self.claimable(now).order_by().values('pk')
+        if limit is not None:
+            candidates = candidates[:limit]
+
+        MarketplacePost.objects.filter(pk__in=candidates).claimable(now).update(
+            status='posting', claimed_by=owner, claim_expires_at=expires_at,
+            updated_at=now)
+        return self.filter(status='posting', claimed_by=owner,
+                           claim_expires_at=expires_at)
+
+    def renew_claim(self, owner):
+        """Extend the lease on posts still held by owner; returns the count"""
+        now = timezone.now()
+        return self.filter(status='posting', claimed_by=owner).update(
+            claim_expires_at=now + get_claim_lease(), updated_at=now)
 
 
 class MarketplacePost(models.Model):
@@ -14,16 +67,29 @@ class MarketplacePost(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    image = models.ImageField(upload_to='posts/', blank=True)
+    image = models.ImageField(
+        upload_to='posts/', storage=ContentAddressedStorage(), blank=True)
     scheduled_time = models.DateTimeField()
     posted = models.BooleanField(default=False)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='pending')
     error_message = models.TextField(blank=True, null=True)
     retry_count = models.IntegerField(default=0)
+    # Lease held by the worker publishing this post (see claim_batch)
+    claimed_by = models.CharField(max_length=150, blank=True)
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+    # Opt-in: run_post_scheduler only publishes posts the user scheduled;
+    # the others wait for Start Posting (postings/scheduler.py)
+    auto_post = models.BooleanField(default=False)
+    # When run_post_scheduler queued the post
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    # When Facebook accepted the post; the rate limiter's history
+    posted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MarketplacePostQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['posted'], name='posted_idx'),
@@ -33,6 +99,16 @@ class MarketplacePost(models.Model):
             models.Index(fields=['posted', 'scheduled_time'],
                          name='posted_scheduled_idx'),
             models.Index(fields=['status'], name='status_idx'),
+            models.Index(fields=['status', 'claim_expires_at'],
+                         name='status_claim_idx'),
+            models.Index(fields=['-created_at', 'id'],
+                         name='created_id_idx'),
+            models.Index(fields=['image'], name='image_idx'),
+            models.Index(fields=['account', 'posted_at'],
+                         name='account_posted_at_idx'),
+            models.Index(fields=['status', 'dispatched_at', 'scheduled_time'],
+                         condition=models.Q(auto_post=True),
+                         name='dispatch_due_idx'),
         ]
         ordering = ['-created_at']
 
@@ -40,8 +116,50 @@ class MarketplacePost(models.Model):
         return f"{self.title} - {self.account.email}"
 
 
+class JobQueueQuerySet(models.QuerySet):
+    """Queue operations shared by PostingJob and ImportJob"""
+
+    def claim_next(self, worker_id):
+        """
+        Atomically move the oldest queued job to 'running' for this worker.
+
+        Running jobs whose worker stopped sending heartbeats (claimed_at
+        older than JOB_CLAIM_TIMEOUT_SECONDS) are claimed again, so a
+        crashed worker's job doesn't stay 'running' forever.
+
+        The conditional UPDATE only succeeds for one worker, so concurrent
+        workers can never pick up the same job. Returns None when the
+        queue is empty.
+        """
+        while True:
+            now = timezone.now()
+            claimable = Q(status='queued') | Q(
+                status='running', claimed_at__lt=now - get_job_claim_timeout())
+            job = self.filter(claimable).order_by('started_at').first()
+            if job is None:
+                return None
+            claimed = self.filter(
+                claimable, pk=job.pk, status=job.status, claimed_at=job.claimed_at
+            ).update(status='running', worker_id=worker_id, claimed_at=now)
+            if claimed:
+                if job.status == 'running':
+                    print(f"♻️ Reclaimed job {job.job_id} from stopped worker {job.worker_id}")
+                job.refresh_from_db()
+                return job
+            # Another worker claimed it first - try the next one
+
+    def heartbeat(self, pk):
+        """Tell claim_next the job's worker is still alive"""
+        return self.filter(pk=pk, status='running').update(claimed_at=timezone.now())
+
+
 class PostingJob(models.Model):
-    """Track posting job progress for real-time updates"""
+    """
+    Track posting job progress for real-time updates.
+
+    Jobs double as the posting queue: StartPostingView enqueues a 'queued'
+    job and the run_posting_worker command claims and processes it.
+    """
     STATUS_CHOICES = [
         ('queued', 'Queued'),
         ('running', 'Running'),
@@ -58,16 +176,83 @@ class PostingJob(models.Model):
     current_post_id = models.IntegerField(null=True, blank=True)
     current_post_title = models.CharField(max_length=255, blank=True)
     error_message = models.TextField(blank=True, null=True)
+    # Posts requested for this job; empty means every due post
+    post_ids = models.JSONField(default=list, blank=True)
+    worker_id = models.CharField(max_length=100, blank=True)
+    # Refreshed as the worker's heartbeat while the job runs
+    claimed_at = models.DateTimeField(null=True, blank=True)
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = JobQueueQuerySet.as_manager()
+
     class Meta:
+        indexes = [
+            models.Index(fields=['status', 'started_at'],
+                         name='job_status_started_idx'),
+        ]
         ordering = ['-started_at']
 
     def __str__(self):
         return f"Job {self.job_id} - {self.status}"
 
 
+class ImportJob(models.Model):
+    """
+    A bulk upload processed in the background.
+
+    The bulk upload views store the uploaded files and enqueue a 'queued'
+    job; the run_import_worker command claims it, creates the posts and
+    records progress and per-row errors here.
+    """
+    STATUS_CHOICES = PostingJob.STATUS_CHOICES
+    KIND_CHOICES = [
+        ('csv', 'CSV with image URLs'),
+        ('txt', 'TXT with uploaded images'),
+    ]
+
+    job_id = models.CharField(max_length=100, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                             related_name='import_jobs', null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    source_file = models.FileField(upload_to='imports/')
+    # Storage names of the images uploaded with a TXT file, in product order
+    image_files = models.JSONField(default=list, blank=True)
+    account_ids = models.JSONField(default=list, blank=True)
+    # Copied to the created posts: publish them without Start Posting
+    auto_post = models.BooleanField(default=False)
+    # The source file is parsed as a stream, so progress is measured in bytes
+    # read; total_rows only reaches its final value when the import ends
+    total_bytes = models.BigIntegerField(default=0)
+    processed_bytes = models.BigIntegerField(default=0)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    created_posts = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    # The first rows that failed, as {'row' or 'line': n, 'error': message}
+    errors = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True, null=True)
+    worker_id = models.CharField(max_length=100, blank=True)
+    # Refreshed as the worker's heartbeat while the job runs
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobQueueQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'started_at'],
+                         name='import_status_started_idx'),
+        ]
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Import {self.job_id} - {self.status}"
+
+
 class ErrorLog(models.Model):
     """Detailed error logging for posting failures"""
     ERROR_TYPES = [
@@ -94,3 +279,18 @@ class ErrorLog(models.Model):
 
     def __str__(self):
         return f"Error for {self.post.title} - {self.error_type}"
+
+
+class CacheVersion(models.Model):
+    """
+    Version counter of a group of cached responses, shared by every process.
+
+    The web server caches per process, so workers and management commands
+    bump the counter here and readers put it in their cache keys
+    (postings/cache_utils.py).
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
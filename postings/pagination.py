@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the posts list, newest first.
+
+    Pages are fetched with WHERE created_at < <cursor> against the
+    created_id_idx index, so deep pages cost the same as the first one.
+    Follow the `next` link to load more; ?page_size= overrides the size.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
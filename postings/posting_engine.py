@@ -0,0 +1,337 @@
+"""
+Posting engine used by the post_to_marketplace command.
+
+Pending posts are sharded by account so that each account's posts are
+published in order, one at a time, while different accounts can be posted
+in parallel. Workers take their next post from a PostScheduler, which
+enforces the per-account rate limits and interleaves accounts so no
+worker idles on a throttled one. Each worker thread owns its own
+BrowserPool, which drives its browser from a private thread so the
+worker's ORM queries never run next to Playwright's event loop.
+
+AsyncPostingEngine runs the same flow on one event loop instead.
+"""
+from asgiref.sync import sync_to_async
+from collections import OrderedDict
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from .image_optimizer import optimized_image_path
+from .models import MarketplacePost, PostingJob
+from .progress import ProgressReporter
+from .progress_channel import publish_job
+from .rate_limit import PostScheduler, release_deferred
+from automation.post_to_facebook import login_and_post
+from automation.async_post_to_facebook import login_and_post as async_login_and_post
+from automation.browser_pool import BrowserPool
+from playwright.async_api import async_playwright
+import asyncio
+import os
+import socket
+import threading
+import traceback
+
+
+def classify_error(error):
+    """Map an exception raised while posting to an ErrorLog error type"""
+    error_str = str(error).lower()
+    if 'session' in error_str or 'cookie' in error_str or 'login' in error_str:
+        return 'session_expired'
+    if 'network' in error_str or 'connection' in error_str:
+        return 'network_error'
+    if 'captcha' in error_str:
+        return 'captcha'
+    if 'rate' in error_str or 'limit' in error_str:
+        return 'rate_limit'
+    return 'unknown'
+
+
+def pending_posts(post_ids=None):
+    """Unposted posts with the given ids, or every due post when none given"""
+    if post_ids:
+        posts = MarketplacePost.objects.filter(id__in=post_ids, posted=False)
+    else:
+        posts = MarketplacePost.objects.filter(
+            scheduled_time__lte=timezone.now(), posted=False)
+    return posts.select_related('account')
+
+
+def run_posting_job(posting_job, posts, workers=1, engine='sync',
+                    use_browser_pool=True):
+    """Publish posts for a claimed job and mark the job finished"""
+    engine_class = AsyncPostingEngine if engine == 'async' else PostingEngine
+    posting_engine = engine_class(
+        posting_job, workers=workers, use_browser_pool=use_browser_pool)
+    completed, failed = posting_engine.run(posts)
+
+    posting_job.status = 'completed' if failed == 0 else 'failed'
+    posting_job.completed_at = timezone.now()
+    posting_job.error_message = f"{failed} posts failed" if failed > 0 else None
+    posting_job.save(update_fields=['status', 'completed_at', 'error_message'])
+    publish_job(posting_job)
+    return posting_engine
+
+
+def shard_by_account(posts):
+    """Group posts by account_id, keeping the original order inside each shard"""
+    shards = OrderedDict()
+    for post in posts:
+        shards.setdefault(post.account_id, []).append(post)
+    return shards
+
+
+class PostingEngine:
+    """Publish posts for a PostingJob using one or more workers"""
+
+    def __init__(self, posting_job, workers=1, use_browser_pool=True,
+                 claim_owner=None):
+        self.posting_job = posting_job
+        # Lease owner written to every post this engine claims
+        self.claim_owner = claim_owner or (
+            f"{socket.gethostname()}-{os.getpid()}:{posting_job.job_id}")
+        self.workers = max(1, workers)
+        self.use_browser_pool = use_browser_pool
+        self.completed = 0
+        self.failed = 0
+        self.step_timings = []
+        self.progress = ProgressReporter(
+            posting_job, claim_owner=self.claim_owner)
+        # Serializes this job's DB writes across worker threads; SQLite
+        # allows a single writer and the browser work dominates anyway.
+        self._lock = threading.RLock()
+
+    def claim(self, posts):
+        """
+        Claim the job's posts so no other worker publishes them too.
+
+        Posts already held by another live worker are left out and the
+        job's total is corrected to what was actually claimed, plus what a
+        stopped worker already finished when the job was reclaimed.
+        """
+        claimed = list(posts.claim_batch(self.claim_owner))
+        done = self.posting_job.completed_posts + self.posting_job.failed_posts
+        if done + len(claimed) != self.posting_job.total_posts:
+            print(f"Claimed {len(claimed)} posts; the rest are held by other workers")
+            PostingJob.objects.filter(pk=self.posting_job.pk).update(
+                total_posts=done + len(claimed))
+            self.posting_job.total_posts = done + len(claimed)
+        publish_job(self.posting_job)
+        return claimed
+
+    def run(self, posts):
+        """Publish all posts and return (completed, failed)"""
+        scheduler = PostScheduler(shard_by_account(self.claim(posts)))
+        try:
+            self._run_workers(scheduler)
+        finally:
+            self.progress.flush()
+            self.release_deferred(scheduler)
+        return self.completed, self.failed
+
+    def _run_workers(self, scheduler):
+        num_workers = min(self.workers, len(scheduler.queues))
+        if num_workers <= 1:
+            self._worker(scheduler)
+        else:
+            print(f"Starting {num_workers} workers for {len(scheduler.queues)} accounts")
+            threads = [
+                threading.Thread(target=self._worker, args=(scheduler,),
+                                 name=f'posting-worker-{i + 1}', daemon=True)
+                for i in range(num_workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    def average_step_timings(self):
+        """Average seconds per step over every successful post"""
+        if not self.step_timings:
+            return {}
+        totals = {}
+        for timings in self.step_timings:
+            for step, seconds in timings.items():
+                totals[step] = totals.get(step, 0) + seconds
+        return {step: round(seconds / len(self.step_timings), 2)
+                for step, seconds in totals.items()}
+
+    def _worker(self, scheduler):
+        """Publish posts in the order the scheduler hands them out"""
+        pool = BrowserPool() if self.use_browser_pool else None
+        try:
+            while True:
+                post = scheduler.next_post(heartbeat=self.renew_claims)
+                if post is None:
+                    break
+                outcome = self.publish(post, pool)
+                scheduler.done(post, attempted=outcome != 'skipped',
+                               rate_limited=outcome == 'rate_limit')
+        finally:
+            if pool is not None:
+                pool.close()
+                print(f"Browser pool: {pool.stats}")
+            if threading.current_thread() is not threading.main_thread():
+                close_old_connections()
+
+    def renew_claims(self):
+        """Keep the job's leases alive while the scheduler waits"""
+        with self._lock:
+            MarketplacePost.objects.renew_claim(self.claim_owner)
+            PostingJob.objects.heartbeat(self.posting_job.pk)
+
+    def release_deferred(self, scheduler):
+        """Put back the posts the rate limits did not allow in this job"""
+        if not scheduler.deferred:
+            return
+        with self._lock:
+            released = release_deferred(scheduler.deferred, self.claim_owner)
+            PostingJob.objects.filter(pk=self.posting_job.pk).update(
+                total_posts=F('total_posts') - released)
+            self.posting_job.total_posts -= released
+        publish_job(self.posting_job)
+        print(f"⏳ {released} posts rescheduled by the rate limits")
+
+    def publish(self, post, pool=None):
+        """
+        Publish a single post and record the outcome.
+
+        Returns 'posted', 'skipped' or the error type of the failure.
+        """
+        try:
+            with self._lock:
+                if not self.mark_posting(post):
+                    return 'skipped'
+            # Rendering the derivative can be slow; other workers keep
+            # recording progress meanwhile
+            image_path = self.upload_image_path(post)
+
+            # Post to Facebook
+            timings = login_and_post(
+                email=post.account.email,
+                title=post.title,
+                description=post.description,
+                price=float(post.price),
+                image_path=image_path,
+                pool=pool
+            )
+
+            with self._lock:
+                self.mark_posted(post, timings)
+            return 'posted'
+
+        except Exception as e:
+            with self._lock:
+                return self.mark_failed(post, e, traceback.format_exc())
+
+    def mark_posting(self, post):
+        """
+        Confirm the claim on the post and record that posting started.
+
+        Returns False when the lease expired and another worker reclaimed
+        the post in the meantime, in which case it must be skipped.
+        """
+        print(f"\nProcessing post: {post.title}")
+
+        # The post is already 'posting' since claim() and its lease is
+        # renewed on every progress flush, so this is a read, not a write.
+        held = MarketplacePost.objects.filter(
+            pk=post.pk, status='posting', claimed_by=self.claim_owner,
+            claim_expires_at__gt=timezone.now()).exists()
+        if not held:
+            print(f'⚠️ Skipping "{post.title}" - claimed by another worker')
+            return False
+
+        self.progress.post_started(post)
+        return True
+
+    def upload_image_path(self, post):
+        """Absolute path of the image to upload (its optimized derivative)"""
+        image_path = optimized_image_path(os.path.abspath(post.image.path))
+        print(f"Image path: {image_path}")
+        return image_path
+
+    def mark_posted(self, post, timings=None):
+        self.completed += 1
+        if timings:
+            self.step_timings.append(timings)
+        self.progress.post_posted(post)
+
+        print(
+            f'✓ Successfully posted "{post.title}" to {post.account.email}')
+
+    def mark_failed(self, post, error, stack_trace):
+        print(
+            f'✗ Failed to post "{post.title}" to {post.account.email}: {str(error)}')
+
+        self.failed += 1
+        error_type = classify_error(error)
+        self.progress.post_failed(post, error_type, str(error), stack_trace)
+        return error_type
+
+
+class AsyncPostingEngine(PostingEngine):
+    """
+    Publish posts from a single event loop with the async Playwright API.
+
+    One browser is shared by every account; up to `workers` accounts post
+    concurrently, each in its own context. Database writes are handed to
+    Django's thread-sensitive executor.
+    """
+
+    def run(self, posts):
+        scheduler = PostScheduler(shard_by_account(self.claim(posts)))
+        try:
+            asyncio.run(self._run(scheduler))
+        finally:
+            self.progress.flush()
+            self.release_deferred(scheduler)
+        return self.completed, self.failed
+
+    async def _run(self, scheduler):
+        num_workers = min(self.workers, len(scheduler.queues))
+        if num_workers == 0:
+            return
+        async with async_playwright() as p:
+            headless = os.getenv('PLAYWRIGHT_HEADLESS',
+                                 'true').lower() == 'true'
+            browser = await p.chromium.launch(headless=headless)
+            try:
+                await asyncio.gather(*[
+                    self._worker_async(browser, scheduler)
+                    for _ in range(num_workers)
+                ])
+            finally:
+                await browser.close()
+
+    async def _worker_async(self, browser, scheduler):
+        heartbeat = sync_to_async(self.renew_claims)
+        while True:
+            post = await scheduler.next_post_async(heartbeat=heartbeat)
+            if post is None:
+                break
+            outcome = await self.publish_async(post, browser)
+            scheduler.done(post, attempted=outcome != 'skipped',
+                           rate_limited=outcome == 'rate_limit')
+
+    async def publish_async(self, post, browser):
+        try:
+            if not await sync_to_async(self.mark_posting)(post):
+                return 'skipped'
+            image_path = await sync_to_async(
+                self.upload_image_path, thread_sensitive=False)(post)
+
+            timings = await async_login_and_post(
+                email=post.account.email,
+                title=post.title,
+                description=post.description,
+                price=float(post.price),
+                image_path=image_path,
+                browser=browser
+            )
+
+            await sync_to_async(self.mark_posted)(post, timings)
+            return 'posted'
+
+        except Exception as e:
+            return await sync_to_async(self.mark_failed)(
+                post, e, traceback.format_exc())
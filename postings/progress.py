@@ -0,0 +1,125 @@
+"""
+Batched progress writes for posting jobs.
+
+Instead of saving the PostingJob on every state change, the engine
+reports into a ProgressReporter which buffers the job's counters and the
+ErrorLog rows and writes them in one transaction every few posts or
+seconds, plus a final flush when the job ends. On SQLite, where writers
+are serialized, this keeps the rest of the app responsive while a job runs.
+
+A post's own outcome is written straight away with a single UPDATE: a post
+Facebook accepted must not stay 'posting' until the next flush, or a
+worker crash in between would let its lease expire and the post be
+claimed and published again.
+
+Live viewers don't have to wait for a flush: every state change is also
+published to the progress channel straight away.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .cache_utils import invalidate_health_check_cache
+from .models import MarketplacePost, PostingJob, ErrorLog
+from .progress_channel import publish_job
+import time
+
+
+class ProgressReporter:
+    """Buffer a job's progress and flush it every N posts or T seconds"""
+
+    def __init__(self, posting_job, claim_owner=None, flush_every=None,
+                 flush_seconds=None):
+        config = getattr(settings, 'POSTING_PROGRESS_FLUSH', {})
+        self.posting_job = posting_job
+        self.claim_owner = claim_owner
+        self.flush_every = flush_every or config.get('EVERY_POSTS', 10)
+        self.flush_seconds = flush_seconds or config.get('EVERY_SECONDS', 5)
+
+        self.write_transactions = 0
+        self._last_flush = time.monotonic()
+        self._reset()
+
+    def _reset(self):
+        self._completed = 0
+        self._failed = 0
+        self._current = None
+        self._error_logs = []
+
+    @property
+    def pending(self):
+        return self._completed + self._failed
+
+    def post_started(self, post):
+        self._current = (post.id, post.title)
+        self.posting_job.current_post_id = post.id
+        self.posting_job.current_post_title = post.title
+        publish_job(self.posting_job)
+
+    def post_posted(self, post):
+        now = timezone.now()
+        MarketplacePost.objects.filter(pk=post.pk).update(
+            posted=True, status='posted', claimed_by='',
+            claim_expires_at=None, posted_at=now, updated_at=now)
+        self._completed += 1
+        self.posting_job.completed_posts += 1
+        publish_job(self.posting_job)
+        self._maybe_flush()
+
+    def post_failed(self, post, error_type, error_message, stack_trace):
+        post.status = 'failed'
+        post.error_message = error_message
+        post.retry_count += 1
+        post.claimed_by = ''
+        post.claim_expires_at = None
+        post.updated_at = timezone.now()
+        MarketplacePost.objects.filter(pk=post.pk).update(
+            status=post.status, error_message=post.error_message,
+            retry_count=post.retry_count, claimed_by='',
+            claim_expires_at=None, updated_at=post.updated_at)
+        self._failed += 1
+        self._error_logs.append(ErrorLog(
+            post=post,
+            error_type=error_type,
+            error_message=error_message,
+            stack_trace=stack_trace
+        ))
+        self.posting_job.failed_posts += 1
+        publish_job(self.posting_job)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (self.pending >= self.flush_every or
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far in a single transaction"""
+        self._last_flush = time.monotonic()
+        if not (self.pending or self._current):
+            return
+
+        with transaction.atomic():
+            job_updates = {}
+            if self._completed:
+                job_updates['completed_posts'] = F('completed_posts') + self._completed
+            if self._failed:
+                job_updates['failed_posts'] = F('failed_posts') + self._failed
+            if self._current:
+                job_updates['current_post_id'], job_updates['current_post_title'] = self._current
+            # Doubles as the worker's heartbeat (JobQueueQuerySet.claim_next)
+            job_updates['claimed_at'] = timezone.now()
+            PostingJob.objects.filter(pk=self.posting_job.pk).update(**job_updates)
+
+            if self._error_logs:
+                ErrorLog.objects.bulk_create(self._error_logs)
+
+            if self.pending:
+                invalidate_health_check_cache()
+
+            # Heartbeat: keep the leases on this job's remaining posts alive
+            if self.claim_owner:
+                MarketplacePost.objects.renew_claim(self.claim_owner)
+
+        self.write_transactions += 1
+        self._reset()
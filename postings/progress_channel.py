@@ -0,0 +1,230 @@
+"""
+Pub/sub channel for posting job and bulk upload job progress.
+
+The posting engine and the import worker publish a job snapshot on every
+state change and the SSE status endpoints subscribe to it, so watchers
+get sub-second updates without polling the database.
+
+Two brokers are available, selected by settings.POSTING_PROGRESS_BROKER:
+- 'local' (default): in-process fan-out. Only reaches viewers in the
+  process that runs the job, which run_posting_worker is not.
+- 'redis': Redis pub/sub for separate worker processes. Requires the
+  optional `redis` package.
+
+Updates the broker can't carry come from job_poller: while a job has
+viewers, one thread per web process re-reads it every FALLBACK_POLL_SECONDS
+and publishes it when it changed, so the database load doesn't grow with
+the number of viewers.
+
+Subscriptions block on get(), so the SSE views can stream from a plain
+generator under the WSGI runserver.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+import json
+import queue
+import threading
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker_config():
+    config = {
+        'BACKEND': 'local',
+        'REDIS_URL': 'redis://localhost:6379/0',
+        'FALLBACK_POLL_SECONDS': 2,
+        'HEARTBEAT_SECONDS': 15,
+    }
+    config.update(getattr(settings, 'POSTING_PROGRESS_BROKER', {}))
+    return config
+
+
+def channel_name(job_id):
+    return f"posting_job:{job_id}"
+
+
+def import_channel(job_id):
+    """Broker key for a bulk upload job, kept apart from posting job ids"""
+    return f"import:{job_id}"
+
+
+class LocalSubscription:
+    def __init__(self, broker, job_id):
+        self.broker = broker
+        self.job_id = job_id
+        self.queue = queue.SimpleQueue()
+
+    def deliver(self, payload):
+        """Called from the publishing thread"""
+        self.queue.put(payload)
+
+    def get(self, timeout):
+        """Next payload, or None if nothing was published within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process broadcaster; a local stand-in for Redis pub/sub"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(payload)
+
+    def subscribe(self, job_id):
+        subscription = LocalSubscription(self, job_id)
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.job_id]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub, job_id):
+        self.pubsub = pubsub
+        self.job_id = job_id
+        self._subscribed = False
+
+    def get(self, timeout):
+        if not self._subscribed:
+            self.pubsub.subscribe(channel_name(self.job_id))
+            self._subscribed = True
+        message = self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """Redis pub/sub broker for workers running in separate processes"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                "POSTING_PROGRESS_BROKER backend 'redis' requires the redis package")
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, job_id, payload):
+        self._client.publish(channel_name(job_id), json.dumps(payload))
+
+    def subscribe(self, job_id):
+        return RedisSubscription(self._client.pubsub(), job_id)
+
+
+def get_broker():
+    """Process-wide broker configured by settings.POSTING_PROGRESS_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = get_broker_config()
+                if config['BACKEND'] == 'redis':
+                    _broker = RedisBroker(config['REDIS_URL'])
+                else:
+                    _broker = LocalBroker()
+    return _broker
+
+
+def publish_job(posting_job):
+    """Publish a job's current state; never lets a broker error stop posting"""
+    from .serializers import PostingJobSerializer
+
+    try:
+        get_broker().publish(
+            posting_job.job_id, PostingJobSerializer(posting_job).data)
+    except Exception as e:
+        print(f"⚠️ Could not publish progress for job {posting_job.job_id}: {e}")
+
+
+def publish_import(import_job):
+    """Publish a bulk upload job's current state"""
+    from .serializers import ImportJobSerializer
+
+    try:
+        get_broker().publish(import_channel(import_job.job_id),
+                             ImportJobSerializer(import_job).data)
+    except Exception as e:
+        print(f"⚠️ Could not publish progress for import {import_job.job_id}: {e}")
+
+
+class SnapshotPoller:
+    """
+    Re-read watched jobs from the database and publish them when they change.
+
+    Each channel gets one polling thread per process however many viewers
+    watch it; the thread stops once the last viewer releases the channel.
+    load() returns the job's snapshot, or None once it no longer exists.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._watchers = {}  # channel -> number of viewers
+        self._lock = threading.Lock()
+
+    def watch(self, channel, load):
+        with self._lock:
+            count = self._watchers.get(channel, 0)
+            self._watchers[channel] = count + 1
+        if count == 0:
+            threading.Thread(target=self._poll, args=(channel, load),
+                             name=f'poll-{channel}', daemon=True).start()
+
+    def release(self, channel):
+        with self._lock:
+            count = self._watchers.get(channel, 0) - 1
+            if count > 0:
+                self._watchers[channel] = count
+            else:
+                self._watchers.pop(channel, None)
+
+    def watching(self, channel):
+        with self._lock:
+            return channel in self._watchers
+
+    def _poll(self, channel, load):
+        interval = self.interval or get_broker_config()['FALLBACK_POLL_SECONDS']
+        last = None
+        stop = threading.Event()
+        try:
+            while not stop.wait(interval) and self.watching(channel):
+                try:
+                    snapshot = load()
+                except Exception as e:
+                    print(f"⚠️ Could not poll progress of {channel}: {e}")
+                    continue
+                if snapshot is None:
+                    snapshot = {'status': 'failed', 'error': 'Job not found'}
+                if snapshot != last:
+                    last = snapshot
+                    get_broker().publish(channel, snapshot)
+        finally:
+            connection.close()
+
+
+job_poller = SnapshotPoller()
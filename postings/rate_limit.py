@@ -0,0 +1,283 @@
+"""
+Per-account posting rate limits.
+
+Posting as fast as the browser allows gets accounts blocked, and the
+resulting rate_limit errors only showed up afterwards in ErrorLog. The
+posting engine now asks a PostScheduler for its next post. The scheduler
+keeps one AccountLimit per FacebookAccount:
+
+- a token bucket refilled at POSTS_PER_HOUR, holding up to BURST posts
+- MIN_SPACING_SECONDS plus random jitter between two posts of an account
+- DAILY_CAP posts per rolling 24 hours
+
+and hands out the post of whichever account becomes ready first, so
+workers move on to other accounts instead of idling on a throttled one.
+
+Limits are seeded from the posted_at history of the last day, so they hold
+across jobs and restarts. Accounts that could not post again within
+MAX_WAIT_SECONDS have their remaining posts handed back as deferred, for
+the engine to reschedule.
+
+The limits are off unless POSTING_RATE_LIMIT ENABLED is set: with them on,
+a manual Start Posting of many posts for one account takes hours and
+posts beyond MAX_WAIT_SECONDS are rescheduled instead of published.
+"""
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from .models import MarketplacePost
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+
+def get_rate_limit_config():
+    config = {
+        'ENABLED': False,
+        'POSTS_PER_HOUR': 6,
+        'BURST': 2,
+        'MIN_SPACING_SECONDS': 120,
+        'JITTER_SECONDS': 60,
+        'DAILY_CAP': 40,
+        'RATE_LIMIT_BACKOFF_SECONDS': 3600,
+        'MAX_WAIT_SECONDS': 600,
+        'HEARTBEAT_SECONDS': 60,
+    }
+    config.update(getattr(settings, 'POSTING_RATE_LIMIT', {}))
+    return config
+
+
+class TokenBucket:
+    """Tokens refill continuously at `rate` per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    def refill(self, now):
+        if self.updated is not None and now > self.updated:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+        self.updated = max(now, self.updated or now)
+
+    def ready_at(self, now):
+        """When the next token is available"""
+        self.refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self.refill(now)
+        self.tokens -= 1
+
+
+class AccountLimit:
+    """Rate limit state of one account; times are Unix timestamps"""
+
+    def __init__(self, config, history=()):
+        self.config = config
+        self.bucket = TokenBucket(config['POSTS_PER_HOUR'] / 3600,
+                                  config['BURST'])
+        self.recent = deque()
+        self.not_before = 0
+        for posted_at in history:
+            self.record(posted_at, jitter=False)
+
+    def ready_at(self, now):
+        """Earliest time this account may post again"""
+        while self.recent and self.recent[0] <= now - DAY:
+            self.recent.popleft()
+        ready = max(now, self.not_before, self.bucket.ready_at(now))
+        cap = self.config['DAILY_CAP']
+        if cap and len(self.recent) >= cap:
+            ready = max(ready, self.recent[-cap] + DAY)
+        return ready
+
+    def record(self, at, jitter=True):
+        """A post was attempted at `at`"""
+        self.bucket.take(at)
+        self.recent.append(at)
+        spacing = self.config['MIN_SPACING_SECONDS']
+        if jitter:
+            spacing += random.uniform(0, self.config['JITTER_SECONDS'])
+        self.not_before = max(self.not_before, at + spacing)
+
+    def back_off(self, now):
+        """Facebook reported a rate limit; stay away for a while"""
+        self.not_before = max(
+            self.not_before, now + self.config['RATE_LIMIT_BACKOFF_SECONDS'])
+
+
+def load_history(account_ids, now):
+    """Posting times of the last day per account, oldest first (one query)"""
+    since = datetime.fromtimestamp(now - DAY, tz=dt_timezone.utc)
+    history = {}
+    rows = MarketplacePost.objects.filter(
+        account_id__in=account_ids, posted_at__gte=since
+    ).order_by('posted_at').values_list('account_id', 'posted_at')
+    for account_id, posted_at in rows:
+        history.setdefault(account_id, []).append(posted_at.timestamp())
+    return history
+
+
+class PostScheduler:
+    """
+    Hand out posts across accounts as their rate limits allow.
+
+    An account's posts are still published in order and one at a time:
+    while a worker publishes one of them the account is busy and no other
+    worker gets its next post.
+    """
+
+    def __init__(self, shards, config=None, clock=time.time):
+        self.config = config or get_rate_limit_config()
+        self.clock = clock
+        self.queues = {account_id: deque(posts)
+                       for account_id, posts in shards.items() if posts}
+        self.deferred = []
+        self.busy = set()
+        self._ready = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._last_heartbeat = clock()
+
+        now = clock()
+        enabled = self.config['ENABLED']
+        history = load_history(list(self.queues), now) if enabled else {}
+        self.limits = {
+            account_id: AccountLimit(self.config, history.get(account_id, ()))
+            for account_id in self.queues
+        }
+        for account_id in self.queues:
+            self._push(account_id, now)
+
+    def _push(self, account_id, now):
+        ready = self.limits[account_id].ready_at(now) \
+            if self.config['ENABLED'] else now
+        heapq.heappush(self._ready, (ready, next(self._order), account_id))
+
+    def _poll(self):
+        """
+        Return (post, wait): the next post to publish, else the seconds to
+        wait before asking again, or (None, None) when everything is done.
+        """
+        with self._condition:
+            now = self.clock()
+            while self._ready:
+                ready, order, account_id = self._ready[0]
+                if self.config['ENABLED']:
+                    ready = max(ready, self.limits[account_id].ready_at(now))
+
+                if ready - now > self.config['MAX_WAIT_SECONDS']:
+                    heapq.heappop(self._ready)
+                    self._defer(account_id, ready)
+                    continue
+                if ready > now:
+                    if ready > self._ready[0][0]:
+                        heapq.heapreplace(self._ready, (ready, order, account_id))
+                        continue
+                    return None, ready - now
+
+                heapq.heappop(self._ready)
+                self.busy.add(account_id)
+                return self.queues[account_id].popleft(), None
+
+            if self.busy:
+                # Only accounts being posted right now have posts left
+                return None, self.config['HEARTBEAT_SECONDS']
+            return None, None
+
+    def _defer(self, account_id, ready):
+        until = datetime.fromtimestamp(ready, tz=dt_timezone.utc)
+        posts = self.queues.pop(account_id)
+        self.deferred.extend((post, until) for post in posts)
+        email = posts[0].account.email
+        print(f"⏳ Rate limit: deferring {len(posts)} posts of {email} "
+              f"until {timezone.localtime(until):%Y-%m-%d %H:%M}")
+
+    def _maybe_heartbeat(self, heartbeat):
+        if heartbeat is None:
+            return
+        now = self.clock()
+        with self._condition:
+            due = now - self._last_heartbeat >= self.config['HEARTBEAT_SECONDS']
+            if due:
+                self._last_heartbeat = now
+        if due:
+            heartbeat()
+
+    def next_post(self, heartbeat=None):
+        """
+        Block until a post may be published and return it, or None when no
+        posts are left. heartbeat is called periodically while waiting.
+        """
+        while True:
+            post, wait = self._poll()
+            if post is not None or wait is None:
+                return post
+            with self._condition:
+                self._condition.wait(
+                    min(wait, self.config['HEARTBEAT_SECONDS']))
+            self._maybe_heartbeat(heartbeat)
+
+    async def next_post_async(self, heartbeat=None):
+        """next_post for the async engine; heartbeat is a coroutine function"""
+        while True:
+            post, wait = self._poll()
+            if post is not None or wait is None:
+                return post
+            await asyncio.sleep(min(wait, 1))
+            now = self.clock()
+            if now - self._last_heartbeat >= self.config['HEARTBEAT_SECONDS']:
+                self._last_heartbeat = now
+                if heartbeat is not None:
+                    await heartbeat()
+
+    def done(self, post, attempted=True, rate_limited=False):
+        """
+        Record the outcome of a post handed out by next_post.
+
+        attempted is False when the post was skipped without opening
+        Facebook; rate_limited when Facebook refused it for posting too
+        much.
+        """
+        with self._condition:
+            now = self.clock()
+            account_id = post.account_id
+            limit = self.limits[account_id]
+            if attempted:
+                limit.record(now)
+            if rate_limited:
+                limit.back_off(now)
+            self.busy.discard(account_id)
+            if self.queues.get(account_id):
+                self._push(account_id, now)
+            else:
+                self.queues.pop(account_id, None)
+            self._condition.notify_all()
+
+
+def release_deferred(deferred, claim_owner):
+    """
+    Hand deferred posts back to the queue as pending, scheduled for when
+    their account may post again; run_post_scheduler dispatches them then
+    (they were started by the user, so they are marked auto_post).
+    Returns how many were released.
+    """
+    released = 0
+    for post, until in deferred:
+        released += MarketplacePost.objects.filter(
+            pk=post.pk, status='posting', claimed_by=claim_owner
+        ).update(status='pending', claimed_by='', claim_expires_at=None,
+                 scheduled_time=until, auto_post=True, dispatched_at=None,
+                 updated_at=timezone.now())
+    return released
@@ -1,61 +1,122 @@
 """
 Real-time status updates and health check views
 """
-from django.http import StreamingHttpResponse
+from cryptography.fernet import InvalidToken as InvalidFernetToken
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import PostingJob, ErrorLog
-from .serializers import PostingJobSerializer, ErrorLogSerializer
-from accounts.models import FacebookAccount
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .cache_utils import health_check_cache_key
+from .models import PostingJob, ImportJob, ErrorLog
+from .progress_channel import get_broker, get_broker_config, import_channel, job_poller
+from .serializers import PostingJobSerializer, ImportJobSerializer, ErrorLogSerializer
+from accounts.models import FacebookAccount, SessionState
+from accounts.sessions import session_store
 import json
-import time
-import os
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def posting_status_stream(request, job_id):
+# Probe results of automation/session_validator.py that make a session unusable
+INVALID_SESSION_STATUSES = ('expired', 'checkpoint')
+
+
+def _authenticate_stream(request):
     """
-    Server-Sent Events endpoint for real-time posting status updates
-    Usage: GET /api/posts/status-stream/<job_id>/
+    Resolve the JWT user for an SSE request.
+
+    EventSource cannot send an Authorization header, so the access token
+    may also be passed as ?token=.
+    """
+    auth = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    try:
+        if raw_token:
+            return auth.get_user(auth.get_validated_token(raw_token))
+        result = auth.authenticate(request)
+        return result[0] if result else None
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _posting_progress(data):
+    return data['completed_posts'] + data['failed_posts']
+
+
+def _import_progress(data):
+    return data['processed_rows']
+
+
+def _is_behind(snapshot, data, progress):
+    """Whether an update is older than the last one sent"""
+    if snapshot.get('status') != data.get('status'):
+        return False
+    return progress(snapshot) < progress(data)
+
+
+def _job_status_stream(request, channel, load_snapshot, progress):
+    """
+    Stream a job's progress as Server-Sent Events.
+
+    Updates are pushed through the progress channel as they happen. Jobs
+    run by workers the channel can't reach are covered by job_poller,
+    which re-reads each watched job once per process, not once per viewer.
+    load_snapshot(user) checks the viewer may see the job;
+    load_snapshot() is what the poller re-reads.
+
+    The stream is a plain generator, so runserver (WSGI) sends each event
+    as it is yielded; each open stream holds one server thread.
     """
+    user = _authenticate_stream(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=401)
+
+    heartbeat_seconds = get_broker_config()['HEARTBEAT_SECONDS']
+
     def event_stream():
-        """Generator function that yields SSE formatted data"""
-        last_completed = -1
-        max_iterations = 600  # 10 minutes max (600 * 1 second)
-        iteration = 0
-
-        while iteration < max_iterations:
-            try:
-                # Get current job status
-                job = PostingJob.objects.filter(job_id=job_id).first()
-
-                if not job:
-                    # Job not found
-                    yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                    break
-
-                # Send update if progress changed or every 5 seconds
-                if job.completed_posts != last_completed or iteration % 5 == 0:
-                    serializer = PostingJobSerializer(job)
-                    data = serializer.data
-                    yield f"data: {json.dumps(data)}\n\n"
-                    last_completed = job.completed_posts
-
-                # Check if job is complete
-                if job.status in ['completed', 'failed']:
-                    yield f"data: {json.dumps({'status': 'complete', 'final': True})}\n\n"
-                    break
-
-                time.sleep(1)  # Poll every second
-                iteration += 1
-
-            except Exception as e:
-                error_data = {'error': str(e)}
-                yield f"data: {json.dumps(error_data)}\n\n"
-                break
+        """Generator that yields SSE formatted data"""
+        subscription = get_broker().subscribe(channel)
+        watching = False
+        try:
+            data = load_snapshot(user)
+            if data is None:
+                yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
+                return
+
+            yield f"data: {json.dumps(data)}\n\n"
+            if data.get('status') not in ['completed', 'failed']:
+                job_poller.watch(channel, load_snapshot)
+                watching = True
+
+            while data.get('status') not in ['completed', 'failed']:
+                pushed = subscription.get(timeout=heartbeat_seconds)
+                if pushed is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if pushed == data or _is_behind(pushed, data, progress):
+                    # The poller read the database before a pushed update
+                    continue
+
+                data = pushed
+                yield f"data: {json.dumps(data)}\n\n"
+
+            yield f"data: {json.dumps({'status': 'complete', 'final': True})}\n\n"
+
+        except Exception as e:
+            error_data = {'error': str(e)}
+            yield f"data: {json.dumps(error_data)}\n\n"
+        finally:
+            if watching:
+                job_poller.release(channel)
+            subscription.close()
 
         # Send final close event
         yield f"data: {json.dumps({'status': 'stream_closed'})}\n\n"
@@ -69,6 +130,39 @@ def posting_status_stream(request, job_id):
     return response
 
 
+def posting_status_stream(request, job_id):
+    """
+    Server-Sent Events endpoint for real-time posting status updates
+    Usage: GET /api/posts/status-stream/<job_id>/?token=<access token>
+    """
+    def load_snapshot(user=None):
+        job = PostingJob.objects.filter(job_id=job_id).first()
+        if job is None:
+            return None
+        return PostingJobSerializer(job).data
+
+    return _job_status_stream(
+        request, job_id, load_snapshot, _posting_progress)
+
+
+def import_status_stream(request, job_id):
+    """
+    Server-Sent Events endpoint for bulk upload (ImportJob) progress
+    Usage: GET /api/posts/import-stream/<job_id>/?token=<access token>
+    """
+    def load_snapshot(user=None):
+        jobs = ImportJob.objects.filter(job_id=job_id)
+        if user is not None:
+            jobs = jobs.filter(user=user)
+        job = jobs.first()
+        if job is None:
+            return None
+        return ImportJobSerializer(job).data
+
+    return _job_status_stream(
+        request, import_channel(job_id), load_snapshot, _import_progress)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_posting_job_status(request, job_id):
@@ -129,44 +223,55 @@ def health_check_accounts(request):
     """
     Health check endpoint to verify account sessions are valid
     Usage: GET /api/accounts/health-check/
-    Returns status of all accounts and their sessions
+    Returns status of the user's accounts and their sessions, computed in
+    one query and cached until posts, accounts or sessions change
     """
-    accounts = FacebookAccount.objects.all()
+    cache_key = health_check_cache_key(request.user.id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Response(cached)
+
+    # Post statistics of every account in a single aggregate query
+    accounts = FacebookAccount.objects.filter(user=request.user).annotate(
+        total_posts=Count('marketplacepost'),
+        posted_count=Count('marketplacepost',
+                           filter=Q(marketplacepost__posted=True)),
+        failed_count=Count('marketplacepost',
+                           filter=Q(marketplacepost__status='failed')),
+    ).order_by('id').values(
+        'id', 'email', 'has_session', 'session_saved_at',
+        'session_state__validation_status',
+        'total_posts', 'posted_count', 'failed_count')
+
+    now = timezone.now()
     results = []
 
     for account in accounts:
-        # Check if session file exists
-        session_file = f"sessions/{account.email.replace('@', '_').replace('.', '_')}.json"
-        session_exists = os.path.exists(session_file)
-
-        # Check if session file is recent (DISABLED - Keep sessions forever)
-        session_valid = session_exists  # Session is always valid if it exists
+        # has_session mirrors the account's SessionState row
+        session_exists = account['has_session']
+        validation_status = account['session_state__validation_status']
+
+        # No age limit; a session is valid unless validate_sessions found
+        # it logged out or stuck at a checkpoint
+        session_valid = session_exists and \
+            validation_status not in INVALID_SESSION_STATUSES
         session_age_days = None
 
-        if session_exists:
-            import datetime
-            file_modified = os.path.getmtime(session_file)
-            age_seconds = time.time() - file_modified
+        if session_exists and account['session_saved_at']:
+            age_seconds = (now - account['session_saved_at']).total_seconds()
             session_age_days = round(age_seconds / 86400, 1)  # Convert to days
-            # No age limit - session valid forever as long as file exists
-
-        # Get post statistics for this account
-        from .models import MarketplacePost
-        total_posts = MarketplacePost.objects.filter(account=account).count()
-        posted_count = MarketplacePost.objects.filter(
-            account=account, posted=True).count()
-        failed_count = MarketplacePost.objects.filter(
-            account=account, status='failed').count()
+            # No age limit - session valid forever as long as it exists
 
         results.append({
-            'account_id': account.id,
-            'email': account.email,
+            'account_id': account['id'],
+            'email': account['email'],
             'session_exists': session_exists,
             'session_valid': session_valid,
             'session_age_days': session_age_days,
-            'total_posts': total_posts,
-            'posted_count': posted_count,
-            'failed_count': failed_count,
+            'validation_status': validation_status,
+            'total_posts': account['total_posts'],
+            'posted_count': account['posted_count'],
+            'failed_count': account['failed_count'],
             'health_status': 'healthy' if session_valid else ('warning' if session_exists else 'error')
         })
 
@@ -175,7 +280,7 @@ def health_check_accounts(request):
     warning_count = sum(1 for r in results if r['health_status'] == 'warning')
     error_count = sum(1 for r in results if r['health_status'] == 'error')
 
-    return Response({
+    response_data = {
         'overall_health': 'healthy' if error_count == 0 else ('warning' if healthy_count > 0 else 'error'),
         'summary': {
             'total_accounts': len(results),
@@ -184,7 +289,10 @@ def health_check_accounts(request):
             'error': error_count
         },
         'accounts': results
-    })
+    }
+    cache.set(cache_key, response_data, settings.CACHE_TTL['HEALTH_CHECK'])
+
+    return Response(response_data)
 
 
 @api_view(['GET'])
@@ -197,42 +305,50 @@ def validate_account_session(request, account_id):
     try:
         account = FacebookAccount.objects.get(id=account_id)
 
-        # Check session file
-        session_file = f"sessions/{account.email.replace('@', '_').replace('.', '_')}.json"
-        session_exists = os.path.exists(session_file)
-
-        if not session_exists:
-            return Response({
-                'valid': False,
-                'message': 'Session file does not exist',
-                'action_required': 'Please update session for this account'
-            }, status=status.HTTP_200_OK)
-
-        # Check file age
-        import datetime
-        file_modified = os.path.getmtime(session_file)
-        age_seconds = time.time() - file_modified
-        age_days = round(age_seconds / 86400, 1)
-
-        # Read session file to check if it's valid JSON
+        # Read the session through the store (decrypted once, cached by saved_at)
         try:
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
-
-            # Session is valid if file exists and has cookies (no age limit)
-            session_valid = 'cookies' in session_data
+            session_data, saved_at = session_store.load(account.email)
+
+            if session_data is None:
+                return Response({
+                    'valid': False,
+                    'message': 'Session does not exist',
+                    'action_required': 'Please update session for this account'
+                }, status=status.HTTP_200_OK)
+
+            # Check session age
+            age_seconds = (timezone.now() - saved_at).total_seconds()
+            age_days = round(age_seconds / 86400, 1)
+
+            # Outcome of the last headless probe (validate_sessions command)
+            validation_status, last_validated_at = SessionState.objects.filter(
+                account=account).values_list(
+                'validation_status', 'last_validated_at').first() or ('unknown', None)
+
+            # Session is valid if it has cookies and the last probe did not
+            # find it logged out (no age limit)
+            if 'cookies' not in session_data:
+                session_valid, message = False, 'Session missing cookies'
+            elif validation_status == 'expired':
+                session_valid, message = False, 'Session expired on Facebook'
+            elif validation_status == 'checkpoint':
+                session_valid, message = False, 'Facebook requires a security check'
+            else:
+                session_valid, message = True, 'Session is valid (kept forever)'
 
             return Response({
                 'valid': session_valid,
                 'session_age_days': age_days,
-                'message': 'Session is valid (kept forever)' if session_valid else 'Session file missing cookies',
+                'validation_status': validation_status,
+                'last_validated_at': last_validated_at,
+                'message': message,
                 'action_required': None if session_valid else 'Please update session for this account'
             })
 
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, InvalidFernetToken):
             return Response({
                 'valid': False,
-                'message': 'Session file is corrupted',
+                'message': 'Session is corrupted',
                 'action_required': 'Please update session for this account'
             }, status=status.HTTP_200_OK)
 
@@ -0,0 +1,87 @@
+"""
+Dispatching of scheduled posts.
+
+Posts are normally published when someone clicks Start Posting. Posts
+created with auto_post set are published at their scheduled_time instead:
+the run_post_scheduler command queues them for the posting workers as
+they come due. Every batch of due posts becomes a queued PostingJob and
+the posts are marked dispatched_at so they are queued only once. Posts
+without auto_post are never touched, even though the creation paths give
+them a scheduled_time of now.
+
+Both queries the scheduler makes, the due batch and the next wake-up time,
+are range scans from the start of dispatch_due_idx (status,
+dispatched_at, scheduled_time of auto_post posts only), so their cost
+does not grow with the number of posts scheduled further in the future.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import MarketplacePost, PostingJob
+import uuid
+
+
+def get_dispatch_config():
+    config = {
+        'BATCH_SIZE': 200,
+        'MAX_SLEEP_SECONDS': 30,
+    }
+    config.update(getattr(settings, 'SCHEDULED_DISPATCH', {}))
+    return config
+
+
+def undispatched_posts():
+    """Pending auto_post posts not yet handed to a posting job by the scheduler"""
+    return MarketplacePost.objects.filter(
+        auto_post=True, status='pending', dispatched_at__isnull=True)
+
+
+def next_due_time():
+    """scheduled_time of the earliest undispatched post, or None"""
+    return undispatched_posts().order_by('scheduled_time').values_list(
+        'scheduled_time', flat=True).first()
+
+
+def dispatch_due_batch(now=None, batch_size=None):
+    """
+    Queue a PostingJob for up to batch_size posts that are due.
+
+    Returns the job, or None when nothing is due.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or get_dispatch_config()['BATCH_SIZE']
+
+    with transaction.atomic():
+        post_ids = list(undispatched_posts().filter(
+            scheduled_time__lte=now
+        ).order_by('scheduled_time').values_list('id', flat=True)[:batch_size])
+        if not post_ids:
+            return None
+
+        # Conditional, like claim_batch: posts another dispatcher took in the
+        # meantime keep their own dispatched_at and are left out
+        undispatched_posts().filter(pk__in=post_ids).update(
+            dispatched_at=now, updated_at=now)
+        post_ids = list(MarketplacePost.objects.filter(
+            pk__in=post_ids, dispatched_at=now).values_list('id', flat=True))
+        if not post_ids:
+            return None
+
+        return PostingJob.objects.create(
+            job_id=str(uuid.uuid4()),
+            status='queued',
+            total_posts=len(post_ids),
+            post_ids=post_ids
+        )
+
+
+def dispatch_due_posts(batch_size=None):
+    """Queue every post that is due, in batches; returns the jobs created"""
+    now = timezone.now()
+    jobs = []
+    while True:
+        job = dispatch_due_batch(now, batch_size)
+        if job is None:
+            return jobs
+        print(f"📅 Queued job {job.job_id} for {job.total_posts} scheduled posts")
+        jobs.append(job)
@@ -1,10 +1,40 @@
 from rest_framework import serializers
-from .models import MarketplacePost, PostingJob, ErrorLog
+from .models import MarketplacePost, PostingJob, ImportJob, ErrorLog
 from accounts.models import FacebookAccount
 from accounts.serializers import FacebookAccountSerializer
 
 
-class MarketplacePostSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Let GET requests choose the fields returned with ?fields=a,b,c.
+
+    Unknown names are ignored; without the parameter every field is kept.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+def form_flag(data, name):
+    """A checkbox-style boolean from request data; False when it is missing"""
+    return data.get(name, False) in serializers.BooleanField.TRUE_VALUES
+
+
+def requested_fields(request):
+    """Field names from ?fields= on a GET request, or None"""
+    if request is None or request.method != 'GET':
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+
+class MarketplacePostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Nested account object for read operations
     account = FacebookAccountSerializer(read_only=True)
     # Account ID for write operations
@@ -28,7 +58,7 @@ class MarketplacePostSerializer(serializers.ModelSerializer):
         super().__init__(*args, **kwargs)
         # Dynamically set queryset based on the request user
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
+        if request and hasattr(request, 'user') and 'account_id' in self.fields:
             self.fields['account_id'].queryset = FacebookAccount.objects.filter(
                 user=request.user
             )
@@ -37,7 +67,7 @@ class MarketplacePostSerializer(serializers.ModelSerializer):
         model = MarketplacePost
         fields = [
             'id', 'title', 'description', 'price', 'image',
-            'scheduled_time', 'posted', 'status', 'error_message',
+            'scheduled_time', 'auto_post', 'posted', 'status', 'error_message',
             'retry_count', 'account', 'account_id',
             'created_at', 'updated_at'
         ]
@@ -81,6 +111,26 @@ class PostingJobSerializer(serializers.ModelSerializer):
         return round((obj.completed_posts / obj.total_posts) * 100, 1)
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for bulk upload job status"""
+    progress_percentage = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'job_id', 'kind', 'status', 'auto_post', 'total_bytes', 'processed_bytes',
+            'total_rows', 'processed_rows', 'created_posts', 'error_count', 'errors', 'error_message',
+            'started_at', 'completed_at', 'progress_percentage'
+        ]
+
+    def get_progress_percentage(self, obj):
+        if obj.status == 'completed':
+            return 100
+        if obj.total_bytes == 0:
+            return 0
+        return round((obj.processed_bytes / obj.total_bytes) * 100, 1)
+
+
 class ErrorLogSerializer(serializers.ModelSerializer):
     """Serializer for error logs"""
     post_title = serializers.CharField(source='post.title', read_only=True)
@@ -0,0 +1,37 @@
+from accounts.models import FacebookAccount, SessionState
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache_utils import invalidate_health_check_cache
+from .image_optimizer import delete_derivatives
+from .models import MarketplacePost
+
+
+@receiver(post_delete, sender=MarketplacePost)
+def delete_unreferenced_image(sender, instance, **kwargs):
+    """Delete a post's image once no other post references the shared file"""
+    name = instance.image.name
+    if not name:
+        return
+
+    def delete_if_unreferenced():
+        # Checked after commit so a post created meanwhile keeps the file
+        storage = instance.image.storage
+        if storage.exists(name) and \
+                not MarketplacePost.objects.filter(image=name).exists():
+            storage.delete(name)
+            delete_derivatives(name)
+            print(f"🗑️ Deleted unused image: {name}")
+
+    transaction.on_commit(delete_if_unreferenced)
+
+
+@receiver(post_save, sender=MarketplacePost)
+@receiver(post_delete, sender=MarketplacePost)
+@receiver(post_save, sender=FacebookAccount)
+@receiver(post_delete, sender=FacebookAccount)
+@receiver(post_save, sender=SessionState)
+@receiver(post_delete, sender=SessionState)
+def invalidate_health_check(sender, **kwargs):
+    """Account health checks show post counts and sessions; recompute them"""
+    invalidate_health_check_cache()
@@ -0,0 +1,46 @@
+"""
+Content-addressed storage for post images.
+
+The same product image is usually attached to one post per account. This
+storage names every file after the SHA-256 of its bytes
+(posts/ab/abcdef....jpg), so identical uploads resolve to the file that is
+already on disk instead of writing another copy. Posts share the blob by
+name; postings.signals deletes it when the last post using it is deleted.
+"""
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+import hashlib
+import os
+
+
+def content_hash(content):
+    """SHA-256 of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """MEDIA_ROOT storage that stores each distinct image once"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)
+        name = os.path.join(directory, digest[:2], f"{digest}{extension}")
+
+        if self.exists(name):
+            return name.replace('\\', '/')
+        return super().save(name, content, max_length=max_length)
@@ -1,3 +1,557 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import FacebookAccount
+from .cache_utils import HEALTH_CHECK_VERSION_KEY
+from .image_fetcher import fetch_images
+from .imports import LineReader, parse_csv, parse_txt, run_import_job
+from .models import CacheVersion, ImportJob, MarketplacePost, PostingJob
+from .progress import ProgressReporter
+from .progress_channel import LocalBroker, SnapshotPoller
+from .rate_limit import (
+    DAY, AccountLimit, PostScheduler, TokenBucket, get_rate_limit_config,
+    release_deferred,
+)
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+
+class HealthCheckAccountsTests(TestCase):
+    """GET /api/accounts/health-check/"""
+
+    url = '/api/accounts/health-check/'
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='owner', password='p')
+        other = User.objects.create_user(username='other', password='p')
+
+        now = timezone.now()
+        posts = []
+        for i in range(20):
+            account = FacebookAccount.objects.create(
+                user=self.user, email=f'account{i}@example.com',
+                has_session=i % 2 == 0, session_saved_at=now if i % 2 == 0 else None)
+            for status in ('pending', 'posted', 'posted', 'failed'):
+                posts.append(MarketplacePost(
+                    account=account, title='Chair', description='Wooden',
+                    price=10, scheduled_time=now, status=status,
+                    posted=status == 'posted'))
+        FacebookAccount.objects.create(user=other, email='other@example.com')
+        MarketplacePost.objects.bulk_create(posts)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_single_query_regardless_of_account_count(self):
+        # The cache version lookup, then the one aggregate query
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['total_accounts'], 20)
+        self.assertEqual(response.data['summary']['healthy'], 10)
+        first = response.data['accounts'][0]
+        self.assertEqual(first['email'], 'account0@example.com')
+        self.assertEqual(
+            (first['total_posts'], first['posted_count'], first['failed_count']),
+            (4, 2, 1))
+        self.assertTrue(first['session_exists'])
+        self.assertEqual(first['session_age_days'], 0.0)
+
+    def test_cached_until_posts_change(self):
+        self.client.get(self.url)
+        # Only the cache version is read
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MarketplacePost.objects.filter(
+                account__email='account0@example.com', status='pending').delete()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['accounts'][0]['total_posts'], 3)
+
+    def test_version_shared_through_the_database(self):
+        """Bumps from another process are seen by the next read"""
+        self.client.get(self.url)
+        CacheVersion.objects.update_or_create(
+            key=HEALTH_CHECK_VERSION_KEY, defaults={'version': 99})
+
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_failed_invalidation_does_not_break_writes(self):
+        with mock.patch.object(CacheVersion.objects, 'filter',
+                               side_effect=OperationalError('no such table')):
+            with self.captureOnCommitCallbacks(execute=True):
+                account = FacebookAccount.objects.create(
+                    user=self.user, email='new@example.com')
+        self.assertTrue(FacebookAccount.objects.filter(pk=account.pk).exists())
+
+
+class StatusStreamTests(TestCase):
+    """GET /api/posts/status-stream/<job_id>/"""
+
+    def test_streams_from_a_sync_generator(self):
+        """runserver is WSGI, so the events must come from a plain generator"""
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        PostingJob.objects.create(
+            job_id='job-1', status='completed', total_posts=2, completed_posts=2)
+
+        response = self.client.get(
+            '/api/posts/status-stream/job-1/', {'token': str(AccessToken.for_user(user))})
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertFalse(response.is_async)
+        events = b''.join(response.streaming_content).decode()
+        self.assertIn('"completed_posts": 2', events)
+        self.assertIn('stream_closed', events)
+
+
+class SnapshotPollerTests(SimpleTestCase):
+
+    def test_one_poll_per_job_whatever_the_number_of_viewers(self):
+        broker = LocalBroker()
+        poller = SnapshotPoller(interval=0.05)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return {'status': 'running', 'completed_posts': len(loads)}
+
+        with mock.patch('postings.progress_channel.get_broker', return_value=broker):
+            viewers = [broker.subscribe('posting_job:1') for _ in range(5)]
+            for _ in viewers:
+                poller.watch('posting_job:1', load)
+            updates = [viewer.get(timeout=2) for viewer in viewers]
+            for _ in viewers:
+                poller.release('posting_job:1')
+            time.sleep(0.2)
+            polls = len(loads)
+            time.sleep(0.2)
+
+        self.assertTrue(all(update is not None for update in updates))
+        self.assertEqual(len({update['completed_posts'] for update in updates}), 1)
+        self.assertEqual(len(loads), polls)  # Stopped with the last viewer
+
+
+class ProgressReporterTests(TestCase):
+
+    def test_post_outcome_written_before_the_flush(self):
+        """A crash before the flush must not leave an accepted post 'posting'"""
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        account = FacebookAccount.objects.create(user=user, email='a@example.com')
+        post = MarketplacePost.objects.create(
+            account=account, title='Chair', description='Wooden', price=10,
+            scheduled_time=timezone.now(), status='posting', claimed_by='worker-1',
+            claim_expires_at=timezone.now() + timedelta(minutes=5))
+        job = PostingJob.objects.create(job_id='job-1', status='running', total_posts=1)
+        reporter = ProgressReporter(job, claim_owner='worker-1', flush_every=10)
+
+        reporter.post_posted(post)
+
+        post.refresh_from_db()
+        self.assertEqual((post.status, post.posted, post.claimed_by), ('posted', True, ''))
+        self.assertIsNotNone(post.posted_at)
+        self.assertEqual(PostingJob.objects.get(pk=job.pk).completed_posts, 0)
+
+        reporter.flush()
+        self.assertEqual(PostingJob.objects.get(pk=job.pk).completed_posts, 1)
+
+
+class ClaimTests(TestCase):
+    """Leases that keep two workers from publishing the same post"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        account = FacebookAccount.objects.create(user=user, email='a@example.com')
+        self.posts = MarketplacePost.objects.bulk_create([
+            MarketplacePost(account=account, title=f'Chair {i}', description='Wooden',
+                            price=10, scheduled_time=timezone.now())
+            for i in range(3)])
+
+    def test_two_owners_cannot_claim_the_same_post(self):
+        first = set(MarketplacePost.objects.claim_batch('worker-1', limit=2))
+        second = set(MarketplacePost.objects.claim_batch('worker-2'))
+        nothing_left = MarketplacePost.objects.claim_batch('worker-3')
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(first & second)
+        self.assertFalse(nothing_left.exists())
+
+    def test_only_expired_leases_are_reclaimed(self):
+        expired, live, _ = self.posts
+        MarketplacePost.objects.claim_batch('worker-1')
+        MarketplacePost.objects.filter(pk=expired.pk).update(
+            claim_expires_at=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = list(MarketplacePost.objects.claim_batch('worker-2'))
+
+        self.assertEqual(reclaimed, [MarketplacePost.objects.get(pk=expired.pk)])
+        self.assertEqual(MarketplacePost.objects.get(pk=live.pk).claimed_by, 'worker-1')
+
+    def test_renew_claim_only_extends_own_leases(self):
+        mine, theirs, _ = self.posts
+        MarketplacePost.objects.filter(pk=mine.pk).claim_batch('worker-1')
+        MarketplacePost.objects.filter(pk=theirs.pk).claim_batch('worker-2')
+        soon = timezone.now() + timedelta(seconds=5)
+        MarketplacePost.objects.filter(status='posting').update(claim_expires_at=soon)
+
+        renewed = MarketplacePost.objects.renew_claim('worker-1')
+
+        self.assertEqual(renewed, 1)
+        self.assertGreater(MarketplacePost.objects.get(pk=mine.pk).claim_expires_at, soon)
+        self.assertEqual(MarketplacePost.objects.get(pk=theirs.pk).claim_expires_at, soon)
+
+    def test_claim_next_hands_a_job_to_one_worker(self):
+        PostingJob.objects.create(job_id='job-1', status='queued', total_posts=1)
+
+        job = PostingJob.objects.claim_next('worker-1')
+
+        self.assertEqual((job.job_id, job.status, job.worker_id),
+                         ('job-1', 'running', 'worker-1'))
+        self.assertIsNone(PostingJob.objects.claim_next('worker-2'))
+
+    def test_claim_next_reclaims_jobs_of_stopped_workers(self):
+        stale = timezone.now() - timedelta(hours=1)
+        PostingJob.objects.create(job_id='live', status='running', total_posts=1,
+                                  worker_id='worker-1', claimed_at=timezone.now())
+        PostingJob.objects.create(job_id='stale', status='running', total_posts=1,
+                                  worker_id='worker-2', claimed_at=stale)
+
+        job = PostingJob.objects.claim_next('worker-3')
+
+        self.assertEqual((job.job_id, job.worker_id), ('stale', 'worker-3'))
+        self.assertIsNone(PostingJob.objects.claim_next('worker-4'))
+
+    def test_heartbeat_keeps_a_running_job(self):
+        job = PostingJob.objects.create(
+            job_id='job-1', status='running', worker_id='worker-1', total_posts=1,
+            claimed_at=timezone.now() - timedelta(hours=1))
+
+        PostingJob.objects.heartbeat(job.pk)
+
+        self.assertIsNone(PostingJob.objects.claim_next('worker-2'))
+
+
+def rate_limit_config(**overrides):
+    config = get_rate_limit_config()
+    config.update({
+        'ENABLED': True, 'POSTS_PER_HOUR': 60, 'BURST': 2,
+        'MIN_SPACING_SECONDS': 0, 'JITTER_SECONDS': 0, 'DAILY_CAP': 0,
+        'MAX_WAIT_SECONDS': 600,
+    })
+    config.update(overrides)
+    return config
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=1 / 60, capacity=2)
+        bucket.take(0)
+        bucket.take(0)
+
+        self.assertEqual(bucket.ready_at(0), 60)
+        self.assertEqual(bucket.ready_at(30), 60)
+        self.assertEqual(bucket.ready_at(60), 60)
+
+    def test_refill_stops_at_capacity(self):
+        bucket = TokenBucket(rate=1 / 60, capacity=2)
+        bucket.take(0)
+        bucket.ready_at(10000)
+        self.assertEqual(bucket.tokens, 2)
+
+
+class AccountLimitTests(SimpleTestCase):
+
+    def test_min_spacing(self):
+        limit = AccountLimit(rate_limit_config(MIN_SPACING_SECONDS=120))
+        limit.record(1000)
+        self.assertEqual(limit.ready_at(1000), 1120)
+
+    def test_daily_cap(self):
+        limit = AccountLimit(rate_limit_config(DAILY_CAP=2, POSTS_PER_HOUR=3600))
+        limit.record(0)
+        limit.record(100)
+        self.assertEqual(limit.ready_at(200), DAY)
+        self.assertEqual(limit.ready_at(DAY + 1), DAY + 1)
+
+
+class PostSchedulerTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='owner', password='p')
+        self.busy = FacebookAccount.objects.create(user=user, email='busy@example.com')
+        self.idle = FacebookAccount.objects.create(user=user, email='idle@example.com')
+        self.now = timezone.now()
+        self.clock = lambda: self.now.timestamp()
+
+    def make_posts(self, account, count, **fields):
+        return MarketplacePost.objects.bulk_create([
+            MarketplacePost(account=account, title=f'Chair {i}', description='Wooden',
+                            price=10, scheduled_time=self.now, **fields)
+            for i in range(count)])
+
+    def test_accounts_beyond_max_wait_are_deferred(self):
+        # busy@ posted twice a minute ago: its bucket refills in an hour
+        self.make_posts(self.busy, 2, posted=True, status='posted',
+                        posted_at=self.now - timedelta(minutes=1))
+        busy_posts = self.make_posts(self.busy, 2, status='posting', claimed_by='w')
+        idle_posts = self.make_posts(self.idle, 1, status='posting', claimed_by='w')
+        scheduler = PostScheduler(
+            {self.busy.pk: busy_posts, self.idle.pk: idle_posts},
+            config=rate_limit_config(POSTS_PER_HOUR=1), clock=self.clock)
+
+        self.assertEqual(scheduler.next_post(), idle_posts[0])
+        scheduler.done(idle_posts[0])
+        self.assertIsNone(scheduler.next_post())
+        self.assertEqual([post for post, _ in scheduler.deferred], busy_posts)
+
+        until = scheduler.deferred[0][1]
+        self.assertEqual(release_deferred(scheduler.deferred, 'w'), 2)
+        released = MarketplacePost.objects.get(pk=busy_posts[0].pk)
+        self.assertEqual((released.status, released.claimed_by, released.auto_post),
+                         ('pending', '', True))
+        self.assertEqual(released.scheduled_time, until)
+
+    def test_disabled_limits_hand_out_everything(self):
+        posts = self.make_posts(self.busy, 3, status='posting', claimed_by='w')
+        scheduler = PostScheduler({self.busy.pk: posts}, clock=self.clock,
+                                  config=rate_limit_config(ENABLED=False, POSTS_PER_HOUR=1))
+
+        handed_out = []
+        while (post := scheduler.next_post()) is not None:
+            handed_out.append(post)
+            scheduler.done(post)
+        self.assertEqual(handed_out, posts)
+
+
+class ImageServer(ThreadingHTTPServer):
+    """Local image host that counts requests and concurrent downloads"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ImageHandler)
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_port}{path}'
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            hits = server.hits[self.path]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path.startswith('/slow/'):
+                time.sleep(0.2)
+                self.reply(200, 'image/jpeg', b'jpeg')
+            elif self.path == '/flaky.jpg' and hits <= 2:
+                self.reply(503, 'text/plain', b'busy')
+            elif self.path == '/flaky.jpg':
+                self.reply(200, 'image/png', b'png')
+            elif self.path == '/login.jpg':
+                self.reply(200, 'text/html; charset=utf-8', b'<html>Log in</html>')
+            elif self.path == '/bucket.jpg':
+                self.reply(200, 'application/octet-stream', b'jpeg')
+            else:
+                self.reply(404, 'text/plain', b'missing')
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageFetcherTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ImageServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_per_host_limit(self):
+        urls = [self.server.url(f'/slow/{n}.jpg') for n in range(6)]
+
+        results = fetch_images(urls, WORKERS=6, PER_HOST=2)
+
+        self.assertEqual(results, {url: (b'jpeg', None) for url in urls})
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    def test_transient_errors_are_retried(self):
+        url = self.server.url('/flaky.jpg')
+
+        results = fetch_images([url], RETRIES=2, BACKOFF=0.01)
+
+        self.assertEqual(results[url], (b'png', None))
+        self.assertEqual(self.server.hits['/flaky.jpg'], 3)
+
+    def test_retries_give_up(self):
+        url = self.server.url('/flaky.jpg')
+
+        content, error = fetch_images([url], RETRIES=1, BACKOFF=0.01)[url]
+
+        self.assertIsNone(content)
+        self.assertEqual(error, 'Failed to download image (HTTP 503)')
+        self.assertEqual(self.server.hits['/flaky.jpg'], 2)
+
+    def test_client_errors_are_not_retried(self):
+        url = self.server.url('/missing.jpg')
+
+        content, error = fetch_images([url], RETRIES=2, BACKOFF=0.01)[url]
+
+        self.assertEqual(error, 'Failed to download image (HTTP 404)')
+        self.assertEqual(self.server.hits['/missing.jpg'], 1)
+
+    def test_non_image_content_type_is_rejected(self):
+        page = self.server.url('/login.jpg')
+        bucket = self.server.url('/bucket.jpg')
+
+        results = fetch_images([page, bucket], RETRIES=2, BACKOFF=0.01)
+
+        self.assertEqual(results[page], (None, 'URL did not return an image (text/html)'))
+        self.assertEqual(self.server.hits['/login.jpg'], 1)
+        self.assertEqual(results[bucket], (b'jpeg', None))
+
+
+class ChunkedFile:
+    """An upload whose chunks() yields the given byte strings"""
+    def __init__(self, *chunks):
+        self._chunks = chunks
+
+    def chunks(self):
+        return iter(self._chunks)
+
+
+def split_at_every_byte(data):
+    """A ChunkedFile for each way of cutting data in two"""
+    for cut in range(len(data) + 1):
+        yield cut, ChunkedFile(data[:cut], data[cut:])
+
+
+class LineReaderTests(SimpleTestCase):
+    def test_multibyte_character_split_across_chunks(self):
+        data = 'Café crème\nÜber €5\n'.encode()
+
+        for cut, upload in split_at_every_byte(data):
+            with self.subTest(cut=cut):
+                self.assertEqual(list(LineReader(upload)),
+                                 ['Café crème\n', 'Über €5\n'])
+
+    def test_crlf_split_across_chunks(self):
+        upload = ChunkedFile(b'first\r', b'\nsecond\r\n')
+
+        self.assertEqual(list(LineReader(upload)), ['first\r\n', 'second\r\n'])
+
+    def test_last_line_without_newline(self):
+        upload = ChunkedFile(b'first\nlast', b' line')
+
+        self.assertEqual(list(LineReader(upload)), ['first\n', 'last line'])
+
+    def test_bom_is_dropped_and_bytes_counted(self):
+        data = '\ufefftitle\n'.encode()
+        reader = LineReader(ChunkedFile(data[:2], data[2:]))
+
+        self.assertEqual(list(reader), ['title\n'])
+        self.assertEqual(reader.bytes_read, len(data))
+
+
+class ParseUploadTests(SimpleTestCase):
+    def test_csv_rows_split_across_chunks(self):
+        data = ('title,description,price,image_url\r\n'
+                'Chaise,"Bois, très ""solide""\r\nTBE",25,\r\n'
+                'Lampe,Laiton,12.5,http://example.com/a.jpg').encode()
+
+        for cut, upload in split_at_every_byte(data):
+            with self.subTest(cut=cut):
+                rows = list(parse_csv(LineReader(upload)))
+                self.assertEqual([error for _, error in rows], [None, None])
+                first, second = (post for post, _ in rows)
+                self.assertEqual(first['description'], 'Bois, très "solide"\r\nTBE')
+                self.assertEqual((second['title'], second['price'], second['image_url']),
+                                 ('Lampe', 12.5, 'http://example.com/a.jpg'))
+
+    def test_txt_products_grouped_across_chunks(self):
+        data = ('\nVélo\nBon état\n80\n\n'
+                'Table\nChêne massif\n150\n\n'
+                'Tapis\nSans prix\n').encode()
+
+        for cut, upload in split_at_every_byte(data):
+            with self.subTest(cut=cut):
+                rows = list(parse_txt(LineReader(upload), ['a.jpg', 'b.jpg']))
+                self.assertEqual(
+                    [(post['line'], post['title'], post['price'], post['image_file'])
+                     for post, _ in rows[:2]],
+                    [(2, 'Vélo', 80.0, 'a.jpg'), (6, 'Table', 150.0, 'b.jpg')])
+                self.assertEqual(rows[2], (None, {
+                    'line': 10,
+                    'error': 'Incomplete product data (need 3 lines: title, description, price)'
+                }))
+
+
+class AutoPostUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = get_user_model().objects.create_user(username='owner', password='p')
+        self.account = FacebookAccount.objects.create(user=self.user, email='a@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, **data):
+        txt_file = SimpleUploadedFile('posts.txt', b'Chair\nWooden\n25\n\n')
+        response = self.client.post('/api/posts/bulk-upload-with-images/', {
+            'txt_file': txt_file, 'account_ids[]': [self.account.pk], **data,
+        })
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(job_id=response.data['job_id'])
+        run_import_job(job)
+        return job, MarketplacePost.objects.get(account=self.account)
+
+    def test_auto_post_reaches_the_created_posts(self):
+        job, post = self.upload(auto_post='true')
+
+        self.assertTrue(job.auto_post)
+        self.assertEqual((post.title, post.auto_post), ('Chair', True))
+
+    def test_posts_wait_for_start_posting_by_default(self):
+        job, post = self.upload()
+
+        self.assertFalse(job.auto_post)
+        self.assertFalse(post.auto_post)
@@ -12,7 +12,10 @@ echo [2/3] Running migrations...
 python manage.py migrate
 
 echo.
-echo [3/3] Starting Django server...
+echo [3/3] Starting workers and Django server...
+start "Posting Worker" python manage.py run_posting_worker
+start "Import Worker" python manage.py run_import_worker
+start "Post Scheduler" python manage.py run_post_scheduler
 echo.
 echo Backend will run on: http://localhost:8000
 echo API endpoints available at: http://localhost:8000/api/